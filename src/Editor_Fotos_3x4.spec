@@ -93,6 +93,25 @@ hidden_imports = [
     'modules.utils',
 	'modules.config_manager',
 	'modules.logger',
+	'modules.image_loader',
+	'modules.batch_executor',
+	'modules.cs_worker',
+	'modules.shm_transport',
+	'modules.fingerprint',
+	'modules.cs_async',
+	'modules.preview_renderer',
+	'modules.preview_cache',
+	'modules.image_store',
+	'modules.edit_graph',
+	'modules.edit_history',
+	'modules.tiled_processing',
+	'modules.face_backends',
+	'modules.geometry',
+	'modules.encoder',
+	'modules.print_layout',
+	'modules.thumbnail_cache',
+	'modules.session',
+	'modules.batch_detection',
 ]
 
 a = Analysis(
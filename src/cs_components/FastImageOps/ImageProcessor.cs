@@ -1,5 +1,6 @@
 using System;
 using System.IO;
+using System.IO.MemoryMappedFiles;
 using SkiaSharp;
 using Newtonsoft.Json;
 
@@ -165,6 +166,66 @@ namespace FastImageOps
             }
         }
 
+        /// <summary>
+        /// Aplica filtros direto no buffer de pixels compartilhado (in-place)
+        /// O Python cria a memória compartilhada e envia nome, dimensões e stride
+        /// </summary>
+        public static string ApplyImageFiltersRaw(string inputJson)
+        {
+            try
+            {
+                var request = JsonConvert.DeserializeObject<RawFilterRequest>(inputJson);
+                var header = request?.Image;
+                if (header == null || string.IsNullOrEmpty(header.Shm))
+                    return JsonConvert.SerializeObject(new { Success = false, Error = "Invalid request" });
+                
+                int channels = header.Format switch
+                {
+                    "RGB24" => 3,
+                    "RGBA32" => 4,
+                    _ => 0
+                };
+                if (channels == 0)
+                    return JsonConvert.SerializeObject(new { Success = false, Error = $"Formato não suportado: {header.Format}" });
+                
+                long size = (long)header.Stride * header.Height;
+                using var mmf = MemoryMappedFile.OpenExisting(header.Shm);
+                using var view = mmf.CreateViewAccessor(0, size);
+                
+                unsafe
+                {
+                    byte* basePtr = null;
+                    view.SafeMemoryMappedViewHandle.AcquirePointer(ref basePtr);
+                    try
+                    {
+                        basePtr += view.PointerOffset;
+                        for (int y = 0; y < header.Height; y++)
+                        {
+                            byte* row = basePtr + (long)y * header.Stride;
+                            for (int x = 0; x < header.Width; x++)
+                            {
+                                byte* px = row + x * channels;
+                                // Canal alfa (se houver) permanece intacto
+                                px[0] = ClampByte((int)(px[0] * request!.Contrast + request.Brightness));
+                                px[1] = ClampByte((int)(px[1] * request.Contrast + request.Brightness));
+                                px[2] = ClampByte((int)(px[2] * request.Contrast + request.Brightness));
+                            }
+                        }
+                    }
+                    finally
+                    {
+                        view.SafeMemoryMappedViewHandle.ReleasePointer();
+                    }
+                }
+                
+                return JsonConvert.SerializeObject(new { Success = true });
+            }
+            catch (Exception ex)
+            {
+                return JsonConvert.SerializeObject(new { Success = false, Error = ex.Message });
+            }
+        }
+
         /// <summary>
         /// Operação de crop otimizada para múltiplas imagens
         /// </summary>
@@ -289,6 +350,22 @@ namespace FastImageOps
         public double Brightness { get; set; } = 0.0;
     }
 
+    public class SharedImageHeader
+    {
+        public string Shm { get; set; } = "";
+        public int Width { get; set; }
+        public int Height { get; set; }
+        public int Stride { get; set; }
+        public string Format { get; set; } = "RGB24";
+    }
+
+    public class RawFilterRequest
+    {
+        public SharedImageHeader? Image { get; set; }
+        public double Contrast { get; set; } = 1.0;
+        public double Brightness { get; set; } = 0.0;
+    }
+
     public class BatchCropRequest
     {
         public List<CropItem> Images { get; set; } = new();
@@ -1,5 +1,9 @@
 using System;
+using System.IO;
+using System.Text;
 using FastImageOps;
+using Newtonsoft.Json;
+using Newtonsoft.Json.Linq;
 
 namespace FastImageOps
 {
@@ -11,9 +15,16 @@ namespace FastImageOps
     {
         static void Main(string[] args)
         {
+            if (args.Length == 1 && args[0].ToLower() == "--worker")
+            {
+                RunWorker();
+                return;
+            }
+
             if (args.Length < 2)
             {
                 Console.WriteLine("Uso: FastImageOps <operacao> <json_input>");
+                Console.WriteLine("     FastImageOps --worker");
                 Console.WriteLine("Operações disponíveis: batch-resize, apply-filters, batch-crop");
                 return;
             }
@@ -23,20 +34,71 @@ namespace FastImageOps
 
             try
             {
-                string result = operation switch
-                {
-                    "batch-resize" => ImageProcessor.BatchResize(jsonInput),
-                    "apply-filters" => ImageProcessor.ApplyImageFilters(jsonInput),
-                    "batch-crop" => ImageProcessor.BatchCrop(jsonInput),
-                    _ => "{\"Error\": \"Operação não reconhecida\"}"
-                };
-
-                Console.WriteLine(result);
+                Console.WriteLine(Dispatch(operation, jsonInput));
             }
             catch (Exception ex)
             {
                 Console.WriteLine($"{{\"Error\": \"{ex.Message}\"}}");
             }
         }
+
+        static string Dispatch(string operation, string jsonInput)
+        {
+            return operation switch
+            {
+                "batch-resize" => ImageProcessor.BatchResize(jsonInput),
+                "apply-filters" => ImageProcessor.ApplyImageFilters(jsonInput),
+                "apply-filters-raw" => ImageProcessor.ApplyImageFiltersRaw(jsonInput),
+                "batch-crop" => ImageProcessor.BatchCrop(jsonInput),
+                "ping" => "{\"Pong\": true}",
+                _ => "{\"Error\": \"Operação não reconhecida\"}"
+            };
+        }
+
+        /// <summary>
+        /// Modo worker persistente: quadros JSON com prefixo de tamanho
+        /// (uint32 little-endian) via stdin/stdout até o stdin fechar
+        /// </summary>
+        static void RunWorker()
+        {
+            using var input = new BinaryReader(Console.OpenStandardInput());
+            using var output = new BinaryWriter(Console.OpenStandardOutput());
+
+            while (true)
+            {
+                byte[] body;
+                try
+                {
+                    int length = (int)input.ReadUInt32();
+                    body = input.ReadBytes(length);
+                    if (body.Length < length) break;
+                }
+                catch (EndOfStreamException)
+                {
+                    break;
+                }
+
+                // Quadro malformado vira resposta de erro (Id nulo), sem derrubar o worker
+                var response = new JObject { ["Id"] = JValue.CreateNull() };
+
+                try
+                {
+                    var request = JObject.Parse(Encoding.UTF8.GetString(body));
+                    response["Id"] = request["Id"];
+                    string operation = request.Value<string>("Operation")?.ToLower() ?? "";
+                    string data = request["Data"]?.ToString(Formatting.None) ?? "{}";
+                    response["Result"] = JToken.Parse(Dispatch(operation, data));
+                }
+                catch (Exception ex)
+                {
+                    response["Error"] = ex.Message;
+                }
+
+                byte[] payload = Encoding.UTF8.GetBytes(response.ToString(Formatting.None));
+                output.Write((uint)payload.Length);
+                output.Write(payload);
+                output.Flush();
+            }
+        }
     }
 }
@@ -7,6 +7,9 @@ Versão 3.1.0 - Melhorias UX Borda + Versão na Interface
 
 import sys
 import os
+import queue
+import threading
+import multiprocessing
 import tkinter as tk
 import customtkinter as ctk
 from tkinter import messagebox
@@ -15,31 +18,41 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'modules'))
 
-from modules.gui_components import ControlPanel, ImageCanvas
+from modules.gui_components import ControlPanel, Filmstrip, ImageCanvas
 from modules.cs_bridge import get_cs_bridge, is_cs_available
-from modules.face_detection import expand_and_pad_face_crop
+from modules.face_detection import face_crop_box, pad_face_box
+from modules.geometry import DEFAULT_RATIO, RATIOS, enforce_aspect
+from modules.batch_detection import BatchDetector
 from modules.file_manager import FileManager
+from modules.image_loader import MAX_DIMENSION
+from modules.image_store import ImageStore, DEFAULT_BUDGET_MB
+from modules.batch_executor import BatchExecutor, EditedSource
+from modules.preview_renderer import PreviewRenderer, render_adjustments
+from modules.preview_cache import PreviewCache
+from modules.edit_graph import EditGraph
+from modules.edit_history import EditHistory, DEFAULT_MAX_KB
+from modules.tiled_processing import scale_box
+from modules.print_layout import PHOTO_SIZES, SheetLayout, save_sheets
+from modules.session import SessionStore, build_manifest, restore_entries
+from modules.thumbnail_cache import ThumbnailCache
+from modules.image_processing import adjust_contrast_brightness, gray_mean
 from modules.utils import get_image_name_from_path
 from modules.config_manager import get_config_manager
 
 try:
     from modules.image_processing_hybrid import (
-        enforce_3x4, apply_image_enhancements, 
-        resize_image, add_border, compute_initial_scale,
-        get_performance_info
+        add_border, compute_initial_scale, get_performance_info
     )
     HYBRID_MODE = True
 except ImportError:
     from modules.image_processing import (
-        enforce_3x4, apply_image_enhancements, 
-        resize_image, add_border, compute_initial_scale
+        add_border, compute_initial_scale
     )
     HYBRID_MODE = False
 
 VERSION = Path("../version.txt").read_text().strip().lstrip('v') if Path("../version.txt").exists() else "3.1.0"
 
-MAX_DIMENSION = 4000
-MAX_IMAGES = 50
+MAX_IMAGES = 500
 
 class PhotoEditor(ctk.CTk):
     """Editor de Fotos 3x4"""
@@ -55,17 +68,58 @@ class PhotoEditor(ctk.CTk):
         
         # Estado
         self.image_paths = []
-        self.original_images = []
-        self.processed_images = []
+        self.images = ImageStore(
+            memory_budget_mb=self.config_mgr.get("memory_budget_mb", DEFAULT_BUDGET_MB),
+            max_dimension=MAX_DIMENSION
+        )
+        self.histories = []   # EditHistory por imagem (edições não destrutivas)
+        self.undo_max_kb = self.config_mgr.get("undo_memory_kb", DEFAULT_MAX_KB)
         self.current_index = 0
         self.crop_box = None
         self.tk_image = None
         self.zoom_memory = {}
         
+        # Salvamento em lote paralelo
+        self.batch_executor = BatchExecutor(
+            use_processes=self.config_mgr.get("batch_use_processes", False)
+        )
+        self._save_events = queue.Queue()
+        
+        # Auto crop em lote (resultados de detecção em cache no disco)
+        self.face_detector = self.config_mgr.get("face_detector", "haar")
+        self.batch_detector = BatchDetector(backend=self.face_detector)
+        self._detect_events = queue.Queue()
+        
+        # Folhas de impressão (montadas em segundo plano)
+        self._print_events = queue.Queue()
+        self._print_thread = None
+        
+        # Sessão salva em disco (retomada na próxima abertura) e miniaturas
+        self.session = SessionStore()
+        self.thumbnails = ThumbnailCache()
+        self._thumb_events = queue.Queue()
+        self._thumb_deferred = {}   # índice -> (caminho, miniatura) à espera do tamanho
+        self._session_save_pending = None
+        
+        # Proporção do crop (manual, facial e em lote)
+        self.crop_ratio = self.config_mgr.get("crop_ratio", DEFAULT_RATIO)
+        if self.crop_ratio not in RATIOS:
+            self.crop_ratio = DEFAULT_RATIO
+        
+        # Preview ao vivo dos ajustes (cópia em tamanho de exibição)
+        self.preview_cache = PreviewCache()
+        self._preview_events = queue.Queue()
+        self._preview_polling = False
+        self.preview_renderer = PreviewRenderer(
+            on_result=lambda gen, img: self._preview_events.put((gen, img)),
+            on_error=lambda gen, error: self._preview_events.put((gen, error))
+        )
+        
         # Variáveis controle
         self.contrast_var = tk.DoubleVar(value=1.0)
         self.brightness_var = tk.DoubleVar(value=1.0)
         self.quality_var = tk.IntVar(value=100)
+        self.max_kb_var = tk.IntVar(value=self.config_mgr.get("max_file_kb", 0))
         self.scale_var = tk.DoubleVar(value=1.0)
         
         # CARREGAR ESTADO BORDA DA CONFIG
@@ -76,10 +130,17 @@ class PhotoEditor(ctk.CTk):
         
         self.setup_ui()
         self.setup_shortcuts()
+        self.after(33, self._poll_thumbnails)
+        self.after(200, self._offer_resume)
     
     def setup_ui(self):
         """Configura interface"""
-        self.canvas = ImageCanvas(self, on_selection=self.on_crop_selection)
+        # Faixa de miniaturas (largura toda, abaixo do canvas)
+        self.filmstrip = Filmstrip(self, on_select=self.go_to_image,
+                                   on_need=self._request_thumbnails)
+        self.filmstrip.pack(side="bottom", fill="x", padx=10, pady=(0, 5))
+        
+        self.canvas = ImageCanvas(self, on_selection=self.on_crop_selection, ratio=self.crop_ratio)
         self.canvas.pack(side="left", fill="both", expand=True, padx=10, pady=10)
         
         self.control_panel = ControlPanel(
@@ -90,11 +151,15 @@ class PhotoEditor(ctk.CTk):
                 'next_image': self.next_image,
                 'crop_selection': self.crop_selection,
                 'revert_current': self.reset_image,
+                'undo': self.undo,
+                'redo': self.redo,
                 'remove_current': self.remove_current,
                 'auto_crop_face': self.auto_crop_face,
+                'auto_crop_all': self.auto_crop_all,
                 'apply_changes': self.apply_changes,
                 'save_image': self.save_image,
-                'save_all': self.save_all_images
+                'save_all': self.save_all_images,
+                'print_sheet': self.print_sheet
             },
             contrast_var=self.contrast_var,
             brightness_var=self.brightness_var,
@@ -102,7 +167,10 @@ class PhotoEditor(ctk.CTk):
             scale_var=self.scale_var,
             border_var=self.border_var,
             replace_var=self.replace_var,
-            on_border_change=self.on_border_change  # CALLBACK BORDA
+            max_kb_var=self.max_kb_var,
+            on_border_change=self.on_border_change,  # CALLBACK BORDA
+            on_adjust=self.on_adjust_preview,
+            on_zoom=self.on_zoom_change
         )
         self.control_panel.pack(side="right", fill="y", padx=10, pady=10)
         
@@ -131,7 +199,10 @@ class PhotoEditor(ctk.CTk):
         self.bind("<Control-Shift-S>", lambda e: self.save_all_images())
         self.bind("<Left>", lambda e: self.prev_image())
         self.bind("<Right>", lambda e: self.next_image())
-        self.bind("<Control-z>", lambda e: self.reset_image())
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<Control-Shift-Z>", lambda e: self.redo())
+        self.bind("<Escape>", lambda e: self.cancel_batch_save())
     
     def on_border_change(self):
         """Callback quando borda é alterada - APLICAÇÃO AUTOMÁTICA"""
@@ -139,7 +210,7 @@ class PhotoEditor(ctk.CTk):
         self.config_mgr.set("border_enabled", self.border_var.get())
         
         # Aplicar automaticamente
-        if self.processed_images:
+        if self.images:
             self.refresh_preview()
     
     def update_status(self):
@@ -163,55 +234,275 @@ class PhotoEditor(ctk.CTk):
             messagebox.showwarning("Limite", f"Máximo {MAX_IMAGES} imagens por sessão.")
             paths = paths[:MAX_IMAGES]
         
-        self.image_paths = paths
-        self.original_images = []
-        self.processed_images = []
-        self.zoom_memory = {}
+        self._reset_images()
         
+        # Apenas registra os arquivos: decodificação acontece sob demanda
         for p in paths:
             try:
-                img = Image.open(p).convert("RGB")
-                if max(img.size) > MAX_DIMENSION:
-                    img.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
-                self.original_images.append(img.copy())
-                self.processed_images.append(img.copy())
+                self.images.add(p)
+                self.image_paths.append(p)
+                self.histories.append(EditHistory(max_kb=self.undo_max_kb))
             except Exception as e:
                 messagebox.showerror("Erro", f"Erro ao abrir {p}:\n{str(e)}")
         
-        if self.processed_images:
+        if self.images:
             self.current_index = 0
+            self.filmstrip.set_items(len(self.images))
             self.load_current_image()
+            # Atual já decodificada; demais em segundo plano
+            self.images.prefetch(range(1, len(self.images)))
+            self.thumbnails.warm(self.image_paths)
+            self._schedule_session_save()
+    
+    def _reset_images(self):
+        """Descarta as imagens e o estado por imagem da sessão atual"""
+        self.image_paths = []
+        self.images.clear()
+        self.histories = []
+        self.zoom_memory = {}
+        self.crop_box = None
+        self.preview_cache.clear()
+        self._thumb_deferred.clear()
+        self.filmstrip.set_items(0)
+    
+    def _offer_resume(self):
+        """Oferece retomar a sessão anterior ao abrir o programa"""
+        if self.images:
+            return
+        manifest = self.session.load()
+        if not manifest or not manifest.get("images"):
+            return
+        
+        count = len(manifest["images"])
+        if messagebox.askyesno("Retomar Sessão", f"Retomar a sessão anterior ({count} fotos)?"):
+            self.resume_session(manifest)
+    
+    def resume_session(self, manifest):
+        """
+        Restaura arquivos, edições e zoom sem decodificar os originais
+        
+        As edições voltam como listas de operações (EditGraph) e só geram
+        pixels quando a imagem é exibida ou salva. A miniatura da imagem
+        atual aparece de imediato enquanto o original é decodificado.
+        """
+        self._reset_images()
+        changed = 0
+        
+        for entry in restore_entries(manifest, MAX_DIMENSION):
+            try:
+                self.images.add(entry["path"], size=entry["size"])
+            except Exception:
+                continue
+            index = len(self.image_paths)
+            self.image_paths.append(entry["path"])
+            self.histories.append(EditHistory(initial=entry["graph"], max_kb=self.undo_max_kb))
+            if entry["zoom"]:
+                self.zoom_memory[index] = entry["zoom"]
+            changed += entry["status"] == "changed"
+        
+        if not self.images:
+            messagebox.showinfo("Info", "Nenhum arquivo da sessão anterior foi encontrado.")
+            return
+        
+        self.current_index = min(manifest.get("current_index", 0), len(self.images) - 1)
+        self.filmstrip.set_items(len(self.images))
+        self.update_status()
+        self._show_thumbnail_placeholder()
+        self.after(10, self.load_current_image)
+        self.thumbnails.warm(self.image_paths)
+        
+        if changed:
+            messagebox.showinfo(
+                "Sessão", f"{changed} arquivo(s) foram alterados fora do editor; edições descartadas."
+            )
+    
+    def _edited_thumbnail(self, index, thumb):
+        """
+        Aplica à miniatura do original o crop e os ajustes da imagem
+        
+        Retorna None se a imagem tem crop mas o tamanho decodificado (sobre
+        o qual o crop foi definido) ainda não é conhecido.
+        """
+        graph = self._graph(index)
+        if graph.crop_box is not None:
+            size = self.images.known_size(index)
+            if size is None:
+                return None
+            thumb = thumb.crop(scale_box(graph.crop_box, size, thumb.size))
+        for contrast, brightness, mean in graph.enhancements:
+            thumb = adjust_contrast_brightness(thumb, contrast, brightness, mean)
+        return thumb
+    
+    def _show_thumbnail_placeholder(self):
+        """Miniatura em cache da imagem atual, editada, até o original carregar"""
+        thumb = self.thumbnails.get(self.image_paths[self.current_index])
+        if thumb is None:
+            return
+        thumb = self._edited_thumbnail(self.current_index, thumb)
+        if thumb is None:
+            return
+        
+        size = self.images.known_size(self.current_index)
+        if size is not None:
+            w, h = self._graph().size(size)
+            scale = self.zoom_memory.get(self.current_index) or min(800 / w, 650 / h, 1.0)
+        else:
+            w, h = thumb.size
+            scale = min(800 / w, 650 / h)
+        target = (max(1, int(w * scale)), max(1, int(h * scale)))
+        self.tk_image = ImageTk.PhotoImage(thumb.resize(target, Image.BILINEAR))
+        self.canvas.delete("all")
+        
+        cw = self.canvas.winfo_width()
+        ch = self.canvas.winfo_height()
+        self.canvas.create_image(
+            (cw if cw >= 10 else 800) // 2, (ch if ch >= 10 else 650) // 2,
+            image=self.tk_image
+        )
+    
+    def go_to_image(self, index):
+        """Seleção na faixa de miniaturas"""
+        if not self.images or index == self.current_index:
+            return
+        self.current_index = index
+        self.crop_box = None
+        self.update_status()
+        # Miniatura já na tela; o original é decodificado no próximo ciclo
+        self._show_thumbnail_placeholder()
+        self.filmstrip.set_current(index)
+        self.after(1, self.load_current_image)
+    
+    def _request_thumbnails(self, indices):
+        """Pede miniaturas ao cache em disco (geradas em segundo plano se faltarem)"""
+        if not self.image_paths:
+            return
+        wanted = {self.image_paths[i]: i for i in indices if i < len(self.image_paths)}
+        self.thumbnails.ensure(
+            list(wanted),
+            on_ready=lambda path, thumb: self._thumb_events.put((wanted[path], path, thumb))
+        )
+    
+    def _deliver_thumbnail(self, index, path, thumb):
+        """
+        Miniatura editada para a faixa
+        
+        Com crop e tamanho decodificado ainda desconhecido, fica adiada até
+        a decodificação (exibição ou prefetch) revelar o tamanho.
+        """
+        # A lista pode ter mudado desde o pedido
+        if index >= len(self.image_paths) or self.image_paths[index] != path:
+            return
+        edited = self._edited_thumbnail(index, thumb)
+        if edited is None:
+            self._thumb_deferred[index] = (path, thumb)
+            return
+        edited.thumbnail((Filmstrip.THUMB_SIZE, Filmstrip.THUMB_SIZE))
+        self.filmstrip.set_thumbnail(index, edited)
+    
+    def _poll_thumbnails(self):
+        """Entrega miniaturas prontas à faixa (poucas por ciclo: rolagem fluida)"""
+        for _ in range(16):
+            try:
+                index, path, thumb = self._thumb_events.get_nowait()
+            except queue.Empty:
+                break
+            self._deliver_thumbnail(index, path, thumb)
+        
+        ready = [i for i in self._thumb_deferred
+                 if i >= len(self.images) or self.images.known_size(i) is not None]
+        for index in ready:
+            self._deliver_thumbnail(index, *self._thumb_deferred.pop(index))
+        
+        self.after(16 if not self._thumb_events.empty() else 33, self._poll_thumbnails)
+    
+    def _edited(self, index=None):
+        """Edição registrada: atualiza miniatura e agenda gravação da sessão"""
+        self.filmstrip.invalidate(index)
+        self._schedule_session_save()
+    
+    def _session_manifest(self):
+        return build_manifest(
+            self.image_paths,
+            [history.current for history in self.histories],
+            [self.images.known_size(index) for index in range(len(self.images))],
+            self.zoom_memory, self.current_index, MAX_DIMENSION
+        )
+    
+    def _schedule_session_save(self):
+        """Grava a sessão pouco depois da última alteração (em segundo plano)"""
+        if self._session_save_pending is not None:
+            self.after_cancel(self._session_save_pending)
+        
+        def save():
+            self._session_save_pending = None
+            self.session.save_async(self._session_manifest())
+        
+        self._session_save_pending = self.after(1500, save)
     
     def load_current_image(self):
         """Carrega imagem atual"""
-        if not self.processed_images:
+        if not self.images:
             return
         
         # Restaurar zoom
         if self.current_index in self.zoom_memory:
             self.scale_var.set(self.zoom_memory[self.current_index])
         else:
-            img = self.processed_images[self.current_index]
-            scale = compute_initial_scale(img, 800, 650)
+            # Só o tamanho editado: não renderiza o crop em resolução total
+            scale = compute_initial_scale(self._current_size(), 800, 650)
             self.scale_var.set(scale)
             self.zoom_memory[self.current_index] = scale
         
         self.refresh_preview()
         self.update_status()
+        self.filmstrip.set_current(self.current_index)
+        self.after_idle(self._warm_preview_cache)
     
     def refresh_preview(self):
         """Atualiza preview"""
-        if not self.processed_images:
+        if not self.images:
             return
         
-        img = self.processed_images[self.current_index].copy()
-        
-        # APLICAR BORDA SE ATIVADA
-        if self.border_var.get():
-            img = add_border(img, border_width=5, border_color="black")
-        
+        # Render síncrono na cópia de exibição (barato) substitui os pendentes
+        self.preview_renderer.cancel()
+        display_img = render_adjustments(self._get_display_proxy(), **self._adjustment_params())
+        self._show_display_image(display_img)
+    
+    def _adjustment_params(self):
+        """Valores atuais dos sliders de ajuste"""
+        return {
+            "contrast": self.contrast_var.get(),
+            "brightness": self.brightness_var.get(),
+            "quality": self.quality_var.get()
+        }
+    
+    def _get_display_proxy(self):
+        """Cópia da imagem atual em tamanho de exibição (sem borda)"""
+        pyramid = self.preview_cache.get(self.images[self.current_index])
+        return self._graph().render_display(pyramid, self.scale_var.get())
+    
+    def _warm_preview_cache(self):
+        """Constrói pirâmides das imagens vizinhas para navegação instantânea"""
+        for index in (self.current_index + 1, self.current_index - 1):
+            if 0 <= index < len(self.images):
+                self.preview_cache.get(self.images[index])
+    
+    def on_zoom_change(self):
+        """Slider de zoom movido"""
+        if not self.images:
+            return
+        self.zoom_memory[self.current_index] = self.scale_var.get()
+        self.refresh_preview()
+    
+    def _show_display_image(self, display_img):
+        """Desenha imagem já em escala de exibição, com borda se ativada"""
+        # APLICAR BORDA SE ATIVADA (proporcional ao zoom)
         scale = self.scale_var.get()
-        display_img = resize_image(img, scale)
+        content_size = display_img.size
+        border = 0
+        if self.border_var.get():
+            border = max(1, round(5 * scale))
+            display_img = add_border(display_img, border_width=border, border_color="black")
         
         self.tk_image = ImageTk.PhotoImage(display_img)
         self.canvas.delete("all")
@@ -223,38 +514,79 @@ class PhotoEditor(ctk.CTk):
         if ch < 10:
             ch = 650
         
-        x = cw // 2
-        y = ch // 2
-        self.canvas.create_image(x, y, image=self.tk_image)
+        # Canto superior esquerdo explícito: a seleção é convertida para
+        # pixels da imagem com a mesma origem usada no desenho
+        x = cw // 2 - display_img.width // 2
+        y = ch // 2 - display_img.height // 2
+        self.canvas.create_image(x, y, image=self.tk_image, anchor="nw")
+        
+        image_size = self._current_size()
+        self.canvas.set_view(
+            (x + border, y + border),
+            content_size[0] / image_size[0] if image_size[0] else scale,
+            image_size
+        )
+    
+    def on_adjust_preview(self):
+        """Slider de ajuste movido: renderiza preview fora da thread do Tk"""
+        if not self.images:
+            return
+        
+        self.preview_renderer.request(self._get_display_proxy(), **self._adjustment_params())
+        
+        if not self._preview_polling:
+            self._preview_polling = True
+            self.after(10, self._poll_preview)
+    
+    def _poll_preview(self):
+        """Exibe o render mais recente entregue pelo worker"""
+        latest = None
+        while True:
+            try:
+                generation, img = self._preview_events.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.preview_renderer.generation:
+                latest = img
+        
+        if isinstance(latest, Exception):
+            # Mantém o último preview bom na tela e avisa na barra de status
+            self.update_status()
+            self.status_label.configure(
+                text=f"{self.status_label.cget('text')}  ⚠ Erro no preview: {latest}"
+            )
+        elif latest is not None:
+            self._show_display_image(latest)
+        
+        if self.preview_renderer.pending:
+            self.after(10, self._poll_preview)
+        else:
+            self._preview_polling = False
+            if not self._preview_events.empty():
+                self._preview_polling = True
+                self.after(10, self._poll_preview)
     
     def prev_image(self):
         """Imagem anterior"""
-        if not self.processed_images:
+        if not self.images:
             return
-        self.current_index = (self.current_index - 1) % len(self.processed_images)
+        self.current_index = (self.current_index - 1) % len(self.images)
         self.load_current_image()
     
     def next_image(self):
         """Próxima imagem"""
-        if not self.processed_images:
+        if not self.images:
             return
-        self.current_index = (self.current_index + 1) % len(self.processed_images)
+        self.current_index = (self.current_index + 1) % len(self.images)
         self.load_current_image()
     
     def on_crop_selection(self, box):
         """Callback seleção crop"""
-        if not self.processed_images:
+        if not self.images:
             return
         
-        img = self.processed_images[self.current_index]
-        scale = self.scale_var.get()
-        
-        x0 = int(box[0] / scale)
-        y0 = int(box[1] / scale)
-        x1 = int(box[2] / scale)
-        y1 = int(box[3] / scale)
-        
-        self.crop_box = enforce_3x4((x0, y0, x1, y1), img.size)
+        # Box já em pixels da imagem, na proporção (ver ImageCanvas)
+        self.crop_box = box
     
     def crop_selection(self):
         """Corta seleção"""
@@ -262,47 +594,57 @@ class PhotoEditor(ctk.CTk):
             messagebox.showinfo("Info", "Nenhuma seleção para cortar.")
             return
         
-        img = self.processed_images[self.current_index]
-        self.processed_images[self.current_index] = img.crop(self.crop_box)
+        self._push_edit(self._graph().cropped(self.crop_box))
         self.crop_box = None
         self.load_current_image()
     
     def remove_current(self):
         """Remove imagem"""
-        if not self.processed_images:
+        if not self.images:
             return
         
-        if len(self.processed_images) == 1:
-            self.processed_images.clear()
-            self.original_images.clear()
+        if len(self.images) == 1:
+            self.images.clear()
+            self.histories.clear()
             self.image_paths.clear()
             self.current_index = 0
             self.zoom_memory.clear()
             self.canvas.delete("all")
+            self.filmstrip.set_items(0)
             self.update_status()
+            self._schedule_session_save()
             messagebox.showinfo("Info", "Última imagem removida.")
             return
         
-        del self.processed_images[self.current_index]
-        del self.original_images[self.current_index]
+        del self.images[self.current_index]
+        del self.histories[self.current_index]
         del self.image_paths[self.current_index]
         
         if self.current_index in self.zoom_memory:
             del self.zoom_memory[self.current_index]
         
-        if self.current_index >= len(self.processed_images):
-            self.current_index = len(self.processed_images) - 1
+        if self.current_index >= len(self.images):
+            self.current_index = len(self.images) - 1
         
+        self.filmstrip.set_items(len(self.images))
         self.load_current_image()
+        self._schedule_session_save()
     
     def auto_crop_face(self):
-        """Crop facial automático"""
+        """Crop facial automático sobre a imagem atual (preserva edições)"""
+        if not self.images:
+            return
+        
         try:
-            path = self.image_paths[self.current_index]
-            result = expand_and_pad_face_crop(path)
+            # Detecção só precisa da geometria atual, não dos ajustes de cor
+            graph = self._graph()
+            box = face_crop_box(
+                graph.render_geometry(self.images[self.current_index]),
+                backend=self.face_detector, ratio=self.crop_ratio
+            )
             
-            if result:
-                self.processed_images[self.current_index] = result
+            if box:
+                self._push_edit(graph.cropped(box))
                 self.load_current_image()
             else:
                 messagebox.showwarning(
@@ -312,93 +654,346 @@ class PhotoEditor(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Erro", f"Erro detecção facial:\n{str(e)}")
     
-    def apply_changes(self):
-        """Aplica alterações (SEM BORDA)"""
-        if not self.processed_images:
+    def auto_crop_all(self):
+        """Crop facial automático em todas as imagens, em paralelo"""
+        if not self.images:
             return
         
-        img = self.processed_images[self.current_index].copy()
+        if self.batch_detector.running:
+            messagebox.showinfo("Info", "Detecção em andamento.")
+            return
         
-        img = apply_image_enhancements(
-            img,
-            contrast=self.contrast_var.get(),
-            brightness=self.brightness_var.get(),
-            quality=self.quality_var.get()
+        items = [(path, self.images.loader(i)) for i, path in enumerate(self.image_paths)]
+        self.batch_detector.start(
+            items,
+            on_progress=lambda done, total, _: self._detect_events.put(("progress", done, total)),
+            on_complete=lambda stats: self._detect_events.put(("done", stats, items))
         )
+        self.status_label.configure(text=f"Detectando faces 0/{len(items)}... (Esc cancela)")
+        self.after(50, self._poll_batch_detect)
+    
+    def _poll_batch_detect(self):
+        """Consome eventos da detecção em lote na thread do Tk"""
+        while True:
+            try:
+                event = self._detect_events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if event[0] == "progress":
+                _, done, total = event
+                self.status_label.configure(text=f"Detectando faces {done}/{total}... (Esc cancela)")
+                continue
+            
+            _, stats, items = event
+            
+            # Imagens podem ter sido removidas durante a detecção: casa por caminho
+            results = {path: result for (path, _), result in zip(items, stats["results"])}
+            indices, boxes, sizes = [], [], []
+            for index, path in enumerate(self.image_paths):
+                result = results.get(path)
+                box = pad_face_box(result["faces"], result["size"]) if result else None
+                if box:
+                    indices.append(index)
+                    boxes.append(box)
+                    sizes.append(result["size"])
+            
+            # Proporção aplicada a todas as boxes de uma vez
+            cropped = 0
+            if indices:
+                boxes = enforce_aspect(boxes, sizes, self.crop_ratio)
+                for index, box in zip(indices, boxes.tolist()):
+                    if self.histories[index].push(self._graph(index).recropped(box)):
+                        self.zoom_memory.pop(index, None)
+                        cropped += 1
+            
+            self.load_current_image()
+            if cropped:
+                self._edited()
+            
+            msg = f"{cropped} imagens cortadas ({stats['cached']} do cache)."
+            if stats["no_face"]:
+                msg += f"\n{stats['no_face']} sem face detectada."
+            if stats["failed"]:
+                msg += f"\n{stats['failed']} com erro."
+            if stats["cancelled"]:
+                msg += f"\n{stats['cancelled']} canceladas."
+            messagebox.showinfo("Auto Crop", msg)
+            return
+        
+        self.after(50, self._poll_batch_detect)
+    
+    def apply_changes(self):
+        """Aplica alterações (SEM BORDA; qualidade só na gravação)"""
+        if not self.images:
+            return
+        
+        contrast = self.contrast_var.get()
+        brightness = self.brightness_var.get()
+        
+        # Média de contraste fixada a partir da cópia de exibição: preview
+        # e gravação em resolução total produzem o mesmo resultado
+        mean = gray_mean(self._get_display_proxy())
+        self._push_edit(self._graph().enhanced(contrast, brightness, mean))
         
-        # BORDA NÃO É APLICADA AQUI, APENAS NO PREVIEW
+        # Ajustes já incorporados: sliders voltam ao neutro para o preview
+        self.contrast_var.set(1.0)
+        self.brightness_var.set(1.0)
+        self.control_panel.update_contrast_label(1.0)
+        self.control_panel.update_brightness_label(1.0)
         
-        self.processed_images[self.current_index] = img
         self.refresh_preview()
     
     def reset_image(self):
-        """Reseta imagem"""
-        if self.processed_images:
-            self.processed_images[self.current_index] = self.original_images[self.current_index].copy()
+        """Reseta imagem (pode ser desfeito)"""
+        if self.images and self._push_edit(EditGraph()):
+            self.load_current_image()
+    
+    def undo(self):
+        """Desfaz última edição da imagem atual"""
+        if self.images and self.histories[self.current_index].undo() is not None:
+            self.crop_box = None
             self.load_current_image()
+            self._edited(self.current_index)
+    
+    def redo(self):
+        """Refaz edição desfeita da imagem atual"""
+        if self.images and self.histories[self.current_index].redo() is not None:
+            self.crop_box = None
+            self.load_current_image()
+            self._edited(self.current_index)
+    
+    def _graph(self, index=None):
+        """Estado de edição atual de uma imagem"""
+        return self.histories[self.current_index if index is None else index].current
+    
+    def _push_edit(self, graph):
+        """Registra novo estado de edição da imagem atual"""
+        changed = self.histories[self.current_index].push(graph)
+        if changed:
+            self._edited(self.current_index)
+        return changed
+    
+    def _current_size(self):
+        """Tamanho da imagem atual com as edições"""
+        return self._graph().size(self.images.decoded_size(self.current_index))
+    
+    def _render_edited(self, index, border=False):
+        """Renderiza edições em resolução total"""
+        img = self._edited_loader(index)()
+        if border:
+            img = add_border(img, border_width=5, border_color="black")
+        return img
+    
+    def _edited_loader(self, index):
+        """
+        Função que renderiza a imagem editada só quando chamada (lotes)
+        
+        Crops de arquivos maiores que MAX_DIMENSION são lidos do original
+        em resolução total, faixa a faixa.
+        """
+        # Nunca decodifica na thread do Tk: tamanho desconhecido é obtido no worker
+        source = EditedSource(
+            self.image_paths[index], self._graph(index).ops,
+            self.images.known_size(index), self.images.max_dimension
+        )
+        if self.batch_executor.use_processes:
+            # Serializável: decodificação e render no processo filho
+            return source
+        
+        load = self.images.loader(index)
+        return lambda: source.render(load)
+    
+    def _max_bytes(self):
+        """Limite de tamanho do JPEG em bytes (None = sem limite)"""
+        try:
+            max_kb = max(0, int(self.max_kb_var.get()))
+        except (tk.TclError, ValueError):
+            max_kb = 0
+        self.config_mgr.set("max_file_kb", max_kb)
+        return max_kb * 1024 or None
     
     def save_image(self):
         """Salva imagem atual"""
-        if not self.processed_images:
+        if not self.images:
             messagebox.showinfo("Info", "Nenhuma imagem para salvar.")
             return
         
         try:
-            img = self.processed_images[self.current_index].copy()
-            
-            # APLICAR BORDA SE ATIVADA
-            if self.border_var.get():
-                img = add_border(img, border_width=5, border_color="black")
+            img = self._render_edited(self.current_index, border=self.border_var.get())
             
-            path = self.image_paths[self.current_index]
-            
-            if self.replace_var.get():
-                output_path = path
-            else:
-                output_path = FileManager.save_single_image(img, path)
+            output_path = FileManager.save_single_image(
+                img, quality=self.quality_var.get(),
+                overwrite=self.replace_var.get(),
+                original_path=self.image_paths[self.current_index],
+                max_bytes=self._max_bytes()
+            )
             
             if output_path:
-                img.save(output_path, quality=self.quality_var.get())
                 messagebox.showinfo("Sucesso", f"Salva em:\n{output_path}")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
     
     def save_all_images(self):
-        """Salva todas as imagens"""
-        if not self.processed_images:
+        """Salva todas as imagens em paralelo sem bloquear a interface"""
+        if not self.images:
             messagebox.showinfo("Info", "Nenhuma imagem para salvar.")
             return
         
-        try:
-            saved_count = 0
-            for i, img in enumerate(self.processed_images):
-                img_copy = img.copy()
-                
-                # APLICAR BORDA SE ATIVADA
-                if self.border_var.get():
-                    img_copy = add_border(img_copy, border_width=5, border_color="black")
-                
-                path = self.image_paths[i]
+        if self.batch_executor.running:
+            messagebox.showinfo("Info", "Salvamento em andamento.")
+            return
+        
+        targets = FileManager.get_batch_targets(
+            self.image_paths, overwrite=self.replace_var.get()
+        )
+        if not targets:
+            return
+        
+        max_bytes = self._max_bytes()
+        jobs = [
+            {
+                "image": self._edited_loader(index),
+                "output_path": target,
+                "border": self.border_var.get(),
+                "border_width": 5,
+                "border_color": "black",
+                "quality": self.quality_var.get(),
+                "max_bytes": max_bytes
+            }
+            for index, target in enumerate(targets)
+        ]
+        
+        self.batch_executor.start(
+            jobs,
+            on_progress=lambda done, total, _: self._save_events.put(("progress", done, total)),
+            on_complete=lambda stats: self._save_events.put(("done", stats))
+        )
+        self.status_label.configure(text=f"Salvando 0/{len(jobs)}... (Esc cancela)")
+        self.after(50, self._poll_batch_save)
+    
+    def _poll_batch_save(self):
+        """Consome eventos do executor na thread do Tk"""
+        while True:
+            try:
+                event = self._save_events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if event[0] == "progress":
+                _, done, total = event
+                self.status_label.configure(text=f"Salvando {done}/{total}... (Esc cancela)")
+            else:
+                stats = event[1]
+                self.update_status()
                 
-                if self.replace_var.get():
-                    output_path = path
-                else:
-                    output_path = FileManager.save_single_image(img_copy, path)
+                if stats["failed"]:
+                    erros = "\n".join(f"{p}: {e}" for p, e in stats["errors"][:5])
+                    messagebox.showerror("Erro", f"Erro ao salvar {stats['failed']} imagens:\n{erros}")
                 
-                if output_path:
-                    img_copy.save(output_path, quality=self.quality_var.get())
-                    saved_count += 1
+                msg = f"{stats['saved']} imagens salvas!"
+                if stats["cancelled"]:
+                    msg += f"\n{stats['cancelled']} canceladas."
+                messagebox.showinfo("Sucesso", msg)
+                return
+        
+        self.after(50, self._poll_batch_save)
+    
+    def print_sheet(self):
+        """Monta folhas de impressão (PDF/TIFF) com todas as fotos editadas"""
+        if not self.images:
+            messagebox.showinfo("Info", "Nenhuma imagem para imprimir.")
+            return
+        
+        if self._print_thread is not None and self._print_thread.is_alive():
+            messagebox.showinfo("Info", "Folhas em montagem.")
+            return
+        
+        try:
+            layout = SheetLayout(
+                paper=self.config_mgr.get("print_paper", "A4"),
+                photo=self.crop_ratio if self.crop_ratio in PHOTO_SIZES else "3x4",
+                dpi=self.config_mgr.get("print_dpi", 300)
+            )
+        except (KeyError, ValueError) as e:
+            messagebox.showerror("Erro", f"Configuração de impressão inválida:\n{e}")
+            return
+        
+        output_path = FileManager.ask_sheet_path()
+        if not output_path:
+            return
+        
+        # Cada foto é renderizada só quando a sua linha da folha é montada
+        items = [self._edited_loader(index) for index in range(len(self.images))]
+        border = self.border_var.get()
+        
+        def target():
+            try:
+                pages = save_sheets(
+                    items, output_path, layout, border=border,
+                    on_progress=lambda done, total: self._print_events.put(("progress", done, total))
+                )
+                self._print_events.put(("done", pages, output_path))
+            except Exception as e:
+                self._print_events.put(("error", str(e)))
+        
+        self._print_thread = threading.Thread(target=target, name="print-sheet", daemon=True)
+        self._print_thread.start()
+        self.status_label.configure(text=f"Montando folhas 0/{len(items)}...")
+        self.after(50, self._poll_print_sheet)
+    
+    def _poll_print_sheet(self):
+        """Consome eventos da montagem das folhas na thread do Tk"""
+        while True:
+            try:
+                event = self._print_events.get_nowait()
+            except queue.Empty:
+                break
             
-            messagebox.showinfo("Sucesso", f"{saved_count} imagens salvas!")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao salvar:\n{str(e)}")
+            if event[0] == "progress":
+                _, done, total = event
+                self.status_label.configure(text=f"Montando folhas {done}/{total}...")
+                continue
+            
+            self.update_status()
+            if event[0] == "error":
+                messagebox.showerror("Erro", f"Erro ao montar folhas:\n{event[1]}")
+            else:
+                _, pages, output_path = event
+                messagebox.showinfo("Sucesso", f"{pages} folha(s) salvas em:\n{output_path}")
+            return
+        
+        self.after(50, self._poll_print_sheet)
+    
+    def cancel_batch_save(self):
+        """Cancela salvamento ou detecção em lote em andamento"""
+        if self.batch_executor.running:
+            self.batch_executor.cancel()
+        if self.batch_detector.running:
+            self.batch_detector.cancel()
     
     def on_close(self):
         """Fecha aplicação"""
         if messagebox.askokcancel("Sair", "Deseja sair?"):
+            self.batch_executor.cancel()
+            self.batch_detector.cancel()
+            self.preview_renderer.stop()
+            
+            # Sessão final gravada de forma síncrona
+            if self._session_save_pending is not None:
+                self.after_cancel(self._session_save_pending)
+            self.session.close()
+            if self.images:
+                self.session.save(self._session_manifest())
+            else:
+                self.session.clear()
+            self.thumbnails.close()
+            
+            self.images.shutdown()
             self.destroy()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = PhotoEditor()
     app.mainloop()
         
\ No newline at end of file
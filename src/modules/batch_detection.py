@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Detecção facial em lote
+Executa a detecção em paralelo e guarda os resultados em disco por
+(caminho, mtime, tamanho, parâmetros), evitando detectar de novo ao
+reabrir a mesma pasta
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from .face_backends import DEFAULT_BACKEND, get_detector
+from .face_detection import DETECTION_PROXY_SIZE
+from .image_loader import MAX_DIMENSION
+
+CACHE_FILE = Path.home() / ".editor_fotos_3x4" / "detections.json"
+MAX_ENTRIES = 20000
+
+class DetectionCache:
+    """Índice em disco: chave do arquivo + parâmetros -> faces detectadas"""
+
+    def __init__(self, cache_file=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.cache_file = Path(cache_file)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except Exception:
+            self._entries = {}
+
+    @staticmethod
+    def key(path, params):
+        st = os.stat(path)
+        return json.dumps(
+            [os.path.abspath(path), st.st_mtime_ns, st.st_size, params], sort_keys=True
+        )
+
+    def get(self, path, params):
+        """Retorna {"size": [w, h], "faces": [[x, y, w, h], ...]} ou None"""
+        key = self.key(path, params)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def set(self, path, params, size, faces):
+        key = self.key(path, params)
+        entry = {"size": list(size), "faces": [[int(v) for v in face] for face in faces]}
+        with self._lock:
+            self._load()
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            # Dicionário mantém ordem de inserção: remove os mais antigos
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._dirty = True
+
+    def save(self):
+        """Grava o índice (arquivo temporário + rename)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries)
+            self._dirty = False
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_file.with_suffix(".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            print(f"Erro ao salvar cache de detecção: {e}")
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+class BatchDetector:
+    """
+    Detecta faces em várias imagens em paralelo
+
+    Cada item é (caminho, função que carrega a imagem). A imagem só é
+    decodificada se o resultado não estiver no cache. Threads bastam: o
+    OpenCV libera o GIL na detecção.
+    """
+
+    def __init__(self, cache=None, max_workers=None, proxy_size=DETECTION_PROXY_SIZE,
+                 refine=True, max_dimension=MAX_DIMENSION, backend=DEFAULT_BACKEND):
+        self.cache = cache if cache is not None else DetectionCache()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.proxy_size = proxy_size
+        self.refine = refine
+        self.detector = get_detector(backend)
+        self.params = {
+            "detector": self.detector.name, "proxy_size": proxy_size,
+            "refine": refine, "max_dimension": max_dimension
+        }
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def start(self, items, on_progress=None, on_complete=None):
+        """Executa em segundo plano (callbacks chamados fora da thread do Tk)"""
+        if self.running:
+            raise RuntimeError("Detecção já em execução")
+
+        self._cancel.clear()
+
+        def target():
+            stats = self._run(list(items), on_progress)
+            if on_complete:
+                on_complete(stats)
+
+        self._thread = threading.Thread(target=target, name="batch-detector", daemon=True)
+        self._thread.start()
+
+    def run(self, items, on_progress=None):
+        """Executa bloqueando e retorna as estatísticas"""
+        self._cancel.clear()
+        return self._run(list(items), on_progress)
+
+    def _detect(self, path, load):
+        image = load()
+        faces = self.detector.detect(image, proxy_size=self.proxy_size, refine=self.refine)
+        result = {"size": list(image.size), "faces": [[int(v) for v in f] for f in faces]}
+        try:
+            self.cache.set(path, self.params, image.size, faces)
+        except OSError:
+            pass
+        return result
+
+    def _run(self, items, on_progress):
+        total = len(items)
+        stats = {
+            "total": total, "detected": 0, "no_face": 0, "failed": 0, "cached": 0,
+            "cancelled": 0, "results": [None] * total, "errors": [], "elapsed": 0.0
+        }
+        start = time.perf_counter()
+        completed = 0
+
+        def finish(index, result):
+            nonlocal completed
+            completed += 1
+            stats["results"][index] = result
+            if result["faces"]:
+                stats["detected"] += 1
+            else:
+                stats["no_face"] += 1
+            if on_progress:
+                on_progress(completed, total, index)
+
+        # Resultados em cache não passam pelo pool
+        pending_items = []
+        for index, (path, load) in enumerate(items):
+            try:
+                cached = self.cache.get(path, self.params)
+            except OSError:
+                cached = None
+            if cached is not None:
+                stats["cached"] += 1
+                finish(index, cached)
+            else:
+                pending_items.append((index, path, load))
+
+        max_in_flight = self.max_workers * 2
+        next_item = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="face-detect") as pool:
+            pending = {}
+
+            while pending or (next_item < len(pending_items) and not self._cancel.is_set()):
+                while (next_item < len(pending_items) and len(pending) < max_in_flight
+                       and not self._cancel.is_set()):
+                    index, path, load = pending_items[next_item]
+                    pending[pool.submit(self._detect, path, load)] = (index, path)
+                    next_item += 1
+
+                if self._cancel.is_set():
+                    for future in pending:
+                        future.cancel()
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, path = pending.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        finish(index, future.result())
+                    except Exception as e:
+                        completed += 1
+                        stats["failed"] += 1
+                        stats["errors"].append((path, str(e)))
+                        if on_progress:
+                            on_progress(completed, total, index)
+
+        self.cache.save()
+        stats["cancelled"] = total - completed
+        stats["elapsed"] = time.perf_counter() - start
+        return stats
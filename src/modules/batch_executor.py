@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Executor paralelo de lotes
+Distribui borda, ajustes e codificação entre threads ou processos
+com callbacks de progresso e cancelamento
+"""
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
+
+try:
+    from .image_processing_hybrid import apply_image_enhancements, add_border
+except ImportError:
+    from .image_processing import apply_image_enhancements, add_border
+
+from .edit_graph import EditGraph
+from .encoder import encode_image
+from .image_loader import MAX_DIMENSION, load_image
+from .tiled_processing import render_full_resolution, source_size
+
+class EditedSource:
+    """
+    Imagem editada descrita por caminho, operações e tamanho decodificado
+
+    Serializável: em lotes com processos o arquivo é decodificado e as
+    edições aplicadas no processo filho. Crops de arquivos maiores que
+    max_dimension são lidos do original em resolução total.
+    """
+
+    def __init__(self, path, ops, decoded_size=None, max_dimension=MAX_DIMENSION):
+        self.path = path
+        self.ops = tuple(ops)
+        self.decoded_size = tuple(decoded_size) if decoded_size else None
+        self.max_dimension = max_dimension
+
+    def render(self, load=None):
+        """
+        Renderiza as edições; load() opcional fornece a decodificação
+        reduzida já em memória (ImageStore) em vez de ler o arquivo
+        """
+        load = load or (lambda: load_image(self.path, self.max_dimension))
+        graph = EditGraph(self.ops)
+        if graph.crop_box and max(source_size(self.path)) > self.max_dimension:
+            decoded_size = self.decoded_size or load().size
+            return render_full_resolution(self.path, graph, decoded_size,
+                                          max_side=self.max_dimension)
+        return graph.render(load())
+
+    def __call__(self):
+        return self.render()
+
+def _picklable(obj):
+    try:
+        pickle.dumps(obj)
+        return True
+    except Exception:
+        return False
+
+def export_image(image, output_path, border=False, border_width=5, border_color="black",
+                 contrast=1.0, brightness=1.0, quality=100, max_bytes=None):
+    """
+    Aplica ajustes e borda e grava a imagem (executado nos workers)
+
+    Gravação atômica com parâmetros do formato do destino; max_bytes
+    limita o tamanho de JPEGs (ver encoder.encode_to_size)
+
+    Returns:
+        Caminho gravado
+    """
+    if contrast != 1.0 or brightness != 1.0:
+        image = apply_image_enhancements(
+            image, contrast=contrast, brightness=brightness, quality=100
+        )
+
+    if border:
+        image = add_border(image, border_width=border_width, border_color=border_color)
+
+    return encode_image(image, output_path, quality=quality, max_bytes=max_bytes)
+
+def _export_job(job):
+    """export_image aceitando "image" como função que carrega a imagem"""
+    if "error" in job:
+        raise job["error"]
+    image = job["image"]
+    if callable(image):
+        job = dict(job, image=image())
+    return export_image(**job)
+
+class BatchExecutor:
+    """
+    Executa jobs de export_image em paralelo
+
+    Cada job é um dict com os argumentos de export_image; "image" pode ser
+    uma função, chamada só quando o job entra em execução. Threads são o
+    padrão (o Pillow libera o GIL na codificação e nos filtros); processos
+    podem ser usados com use_processes=True, e então "image" deve ser
+    serializável (EditedSource) para a carga acontecer no processo filho.
+    """
+
+    def __init__(self, max_workers=None, use_processes=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self._cancel = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self):
+        """Solicita cancelamento: jobs ainda não iniciados são descartados"""
+        self._cancel.set()
+
+    def start(self, jobs, on_progress=None, on_complete=None):
+        """
+        Executa o lote em segundo plano
+
+        Callbacks são chamados a partir da thread do executor; na GUI
+        devem apenas enfileirar eventos para a thread do Tk.
+        """
+        if self.running:
+            raise RuntimeError("Lote já em execução")
+
+        self._cancel.clear()
+
+        def target():
+            stats = self._run(list(jobs), on_progress)
+            if on_complete:
+                on_complete(stats)
+
+        self._thread = threading.Thread(target=target, name="batch-executor", daemon=True)
+        self._thread.start()
+
+    def run(self, jobs, on_progress=None):
+        """Executa o lote bloqueando até o fim e retorna as estatísticas"""
+        self._cancel.clear()
+        return self._run(list(jobs), on_progress)
+
+    def _run(self, jobs, on_progress):
+        total = len(jobs)
+        stats = {
+            "total": total, "saved": 0, "failed": 0, "cancelled": 0,
+            "outputs": [None] * total, "errors": [], "elapsed": 0.0
+        }
+        start = time.perf_counter()
+
+        executor_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        # Limita jobs em voo para não multiplicar cópias de imagens em memória
+        max_in_flight = self.max_workers * 2
+        next_index = 0
+        completed = 0
+
+        with executor_cls(max_workers=self.max_workers) as pool:
+            pending = {}
+
+            while pending or (next_index < total and not self._cancel.is_set()):
+                while (next_index < total and len(pending) < max_in_flight
+                       and not self._cancel.is_set()):
+                    job = jobs[next_index]
+                    if (self.use_processes and callable(job["image"])
+                            and not _picklable(job["image"])):
+                        # Closures não vão para outro processo: carrega aqui
+                        try:
+                            job = dict(job, image=job["image"]())
+                        except Exception as e:
+                            job = dict(job, image=None, error=e)
+                    pending[pool.submit(_export_job, job)] = next_index
+                    next_index += 1
+
+                if self._cancel.is_set():
+                    for future in pending:
+                        future.cancel()
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    if future.cancelled():
+                        continue
+
+                    completed += 1
+                    try:
+                        stats["outputs"][index] = future.result()
+                        stats["saved"] += 1
+                    except Exception as e:
+                        stats["failed"] += 1
+                        stats["errors"].append((jobs[index].get("output_path"), str(e)))
+
+                    if on_progress:
+                        on_progress(completed, total, index)
+
+        stats["cancelled"] = total - completed
+        stats["elapsed"] = time.perf_counter() - start
+        return stats
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+API assíncrona da ponte C#
+Métodos retornam Future, requisições duplicadas em voo são unificadas e
+chamadas de imagem única são agrupadas em uma invocação batch-*
+"""
+import asyncio
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .cs_bridge import CSharpBridge, get_cs_bridge
+
+def _chain(source: Future, target: Future, transform=None):
+    """Propaga resultado (ou exceção) de source para target"""
+    def done(f):
+        try:
+            result = f.result()
+            target.set_result(transform(result) if transform else result)
+        except Exception as e:
+            target.set_exception(e)
+    source.add_done_callback(done)
+
+
+class _MicroBatcher:
+    """Acumula itens por uma janela curta e executa um único lote"""
+
+    def __init__(self, run_batch: Callable[[List[Any]], Dict[str, Any]],
+                 executor: ThreadPoolExecutor, window: float, max_items: int):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.window = window
+        self.max_items = max_items
+        self.batches = 0
+        self._pending = []
+        self._count = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, items: List[Any]) -> Future:
+        future = Future()
+
+        with self._lock:
+            self._pending.append((items, future))
+            self._count += len(items)
+
+            if self._count >= self.max_items:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        return future
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending, self._count = self._pending, [], 0
+        if pending:
+            self.batches += 1
+            self.executor.submit(self._run, pending)
+
+    def _run(self, pending):
+        combined = [item for items, _ in pending for item in items]
+        try:
+            response = self.run_batch(combined)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        results = response.get("Results")
+        if results is None or len(results) != len(combined):
+            error = RuntimeError(f"Resposta de lote inválida: {response.get('Error', response)}")
+            for _, future in pending:
+                future.set_exception(error)
+            return
+
+        # Devolve a cada chamador a fatia correspondente aos seus itens
+        offset = 0
+        for items, future in pending:
+            future.set_result({"Results": results[offset:offset + len(items)]})
+            offset += len(items)
+
+
+class AsyncCSharpBridge:
+    """Variante não bloqueante da CSharpBridge"""
+
+    def __init__(self, bridge: Optional[CSharpBridge] = None, max_workers: int = 4,
+                 batch_window: float = 0.01, max_batch: int = 64):
+        self.bridge = bridge or get_cs_bridge()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cs-async")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+        self._resize_batcher = _MicroBatcher(
+            lambda items: self.bridge.batch_resize_images(
+                [i["Path"] for i in items], [i["Scale"] for i in items]
+            ),
+            self._executor, batch_window, max_batch
+        )
+        self._crop_batcher = _MicroBatcher(
+            self.bridge.batch_crop_images, self._executor, batch_window, max_batch
+        )
+
+    def _coalesce(self, operation: str, data: Any, start: Callable[[], Future]) -> Future:
+        """Reaproveita Future de requisição idêntica ainda em voo"""
+        key = f"{operation}:{json.dumps(data, sort_keys=True)}"
+
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                self.coalesced += 1
+                return existing
+
+            future = Future()
+            self._inflight[key] = future
+
+        def release(_):
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(release)
+        try:
+            _chain(start(), future)
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def apply_image_filters(self, path: str, contrast: float = 1.0,
+                            brightness: float = 0.0) -> Future:
+        """Aplica filtros (não há endpoint em lote: apenas unifica duplicatas)"""
+        data = {"ImagePath": path, "Contrast": contrast, "Brightness": brightness}
+        return self._coalesce("apply-filters", data, lambda: self._executor.submit(
+            self.bridge.apply_image_filters, path, contrast=contrast, brightness=brightness
+        ))
+
+    def batch_resize_images(self, paths: List[str], scales: List[float]) -> Future:
+        """Redimensiona; chamadas próximas no tempo viram um único batch-resize"""
+        items = [{"Path": p, "Scale": s} for p, s in zip(paths, scales)]
+        return self._coalesce("batch-resize", items,
+                              lambda: self._resize_batcher.submit(items))
+
+    def batch_crop_images(self, images: List[Dict[str, Any]]) -> Future:
+        """Crop; chamadas próximas no tempo viram um único batch-crop"""
+        return self._coalesce("batch-crop", images,
+                              lambda: self._crop_batcher.submit(list(images)))
+
+    def resize_image(self, path: str, scale: float) -> Future:
+        """Redimensiona uma imagem; Future resolve com o resultado individual"""
+        future = Future()
+        _chain(self.batch_resize_images([path], [scale]), future,
+               lambda response: response["Results"][0])
+        return future
+
+    def crop_image(self, image: Dict[str, Any]) -> Future:
+        """Crop de uma imagem; Future resolve com o resultado individual"""
+        future = Future()
+        _chain(self.batch_crop_images([image]), future,
+               lambda response: response["Results"][0])
+        return future
+
+    async def apply_image_filters_async(self, *args, **kwargs) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.apply_image_filters(*args, **kwargs))
+
+    async def batch_resize_images_async(self, paths: List[str], scales: List[float]) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.batch_resize_images(paths, scales))
+
+    async def batch_crop_images_async(self, images: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await asyncio.wrap_future(self.batch_crop_images(images))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            "inflight": inflight,
+            "coalesced": self.coalesced,
+            "resize_batches": self._resize_batcher.batches,
+            "crop_batches": self._crop_batcher.batches
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._resize_batcher.flush()
+        self._crop_batcher.flush()
+        self._executor.shutdown(wait=wait)
+
+_async_bridge = None
+_async_lock = threading.Lock()
+
+def get_async_cs_bridge() -> AsyncCSharpBridge:
+    """Retorna instância compartilhada da ponte assíncrona"""
+    global _async_bridge
+    with _async_lock:
+        if _async_bridge is None:
+            _async_bridge = AsyncCSharpBridge()
+        return _async_bridge
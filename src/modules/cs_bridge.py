@@ -3,63 +3,103 @@
 Módulo de ponte Python-C# otimizado
 Comunicação via JSON/subprocess com cache otimizado e fallback automático
 """
+import atexit
 import json
 import subprocess
 import os
 import logging
+import threading
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from functools import lru_cache
 from collections import OrderedDict
+from .cs_worker import WorkerPool
+from .shm_transport import image_to_shared, image_from_shared, release_shared
+from .fingerprint import file_fingerprint
 
 logger = logging.getLogger(__name__)
 
 class LRUCache:
-    """Cache LRU (Least Recently Used) com limite de tamanho e tempo"""
+    """Cache LRU (Least Recently Used) com orçamento em bytes, limite de itens e TTL"""
     
-    def __init__(self, max_size=100, ttl_seconds=300):
+    def __init__(self, max_size=100, ttl_seconds=300, max_bytes=8 * 1024 * 1024):
         self.cache = OrderedDict()
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.ttl = ttl_seconds
         self.timestamps = {}
+        self.sizes = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def estimate_size(value):
+        """Tamanho aproximado do valor em bytes (respostas JSON)"""
+        try:
+            return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        except (TypeError, ValueError):
+            return len(repr(value))
     
     def get(self, key):
         """Obtém item do cache se válido"""
-        if key not in self.cache:
-            return None
-        
-        # Verifica TTL
-        if time.time() - self.timestamps[key] > self.ttl:
-            self.delete(key)
-            return None
-        
-        # Move para o fim (mais recente)
-        self.cache.move_to_end(key)
-        return self.cache[key]
+        with self._lock:
+            if key not in self.cache:
+                self.misses += 1
+                return None
+            
+            # Verifica TTL
+            if time.time() - self.timestamps[key] > self.ttl:
+                self.delete(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            # Move para o fim (mais recente)
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return self.cache[key]
     
     def set(self, key, value):
-        """Adiciona item ao cache"""
-        if key in self.cache:
-            self.cache.move_to_end(key)
-        else:
-            if len(self.cache) >= self.max_size:
+        """Adiciona item ao cache, removendo os mais antigos até caber no orçamento"""
+        item_size = self.estimate_size(value)
+        
+        with self._lock:
+            self.delete(key)
+            
+            if item_size > self.max_bytes:
+                return
+            
+            while self.cache and (len(self.cache) >= self.max_size
+                                  or self.bytes + item_size > self.max_bytes):
                 # Remove o mais antigo
                 oldest = next(iter(self.cache))
                 self.delete(oldest)
-        
-        self.cache[key] = value
-        self.timestamps[key] = time.time()
+                self.evictions += 1
+            
+            self.cache[key] = value
+            self.timestamps[key] = time.time()
+            self.sizes[key] = item_size
+            self.bytes += item_size
     
     def delete(self, key):
         """Remove item do cache"""
-        self.cache.pop(key, None)
-        self.timestamps.pop(key, None)
+        with self._lock:
+            self.cache.pop(key, None)
+            self.timestamps.pop(key, None)
+            self.bytes -= self.sizes.pop(key, 0)
     
     def clear(self):
         """Limpa todo o cache"""
-        self.cache.clear()
-        self.timestamps.clear()
+        with self._lock:
+            self.cache.clear()
+            self.timestamps.clear()
+            self.sizes.clear()
+            self.bytes = 0
     
     def size(self):
         """Retorna tamanho atual"""
@@ -67,23 +107,51 @@ class LRUCache:
     
     def cleanup_expired(self):
         """Remove itens expirados"""
-        current_time = time.time()
-        expired = [
-            key for key, timestamp in self.timestamps.items()
-            if current_time - timestamp > self.ttl
-        ]
-        for key in expired:
-            self.delete(key)
+        with self._lock:
+            current_time = time.time()
+            expired = [
+                key for key, timestamp in self.timestamps.items()
+                if current_time - timestamp > self.ttl
+            ]
+            for key in expired:
+                self.delete(key)
+            self.expirations += len(expired)
+    
+    def stats(self):
+        """Contadores do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.cache),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
 
 
 class CSharpBridge:
     """Ponte Python-C# com cache otimizado e validação"""
     
-    def __init__(self):
-        self.cs_executable = self._find_cs_executable()
-        self.available = self.cs_executable is not None
-        # Cache LRU com máximo 100 itens, TTL 5 minutos
-        self._cache = LRUCache(max_size=100, ttl_seconds=300)
+    def __init__(self, cs_executable: Optional[str] = None,
+                 worker_command: Optional[List[str]] = None,
+                 pool_size: Optional[int] = None, use_workers: bool = True):
+        self.cs_executable = cs_executable or self._find_cs_executable()
+        
+        # Workers persistentes (--worker); subprocess por chamada como fallback
+        if worker_command is None and self.cs_executable:
+            worker_command = [self.cs_executable, "--worker"]
+        self.worker_command = worker_command if use_workers else None
+        self.pool_size = pool_size or min(4, os.cpu_count() or 1)
+        self._pool = None
+        self._pool_failed = False
+        self._pool_lock = threading.Lock()
+        
+        self.available = self.cs_executable is not None or self.worker_command is not None
+        # Cache LRU: máximo 100 itens / 8 MB, TTL 5 minutos
+        self._cache = LRUCache(max_size=100, ttl_seconds=300, max_bytes=8 * 1024 * 1024)
         
         if self.available:
             logger.info(f"C# disponível: {self.cs_executable}")
@@ -117,11 +185,86 @@ class CSharpBridge:
             self._cache.cleanup_expired()
         
         # Verifica cache
-        cache_key = f"{operation}:{json.dumps(data, sort_keys=True)}"
+        cache_key = self._cache_key(operation, data)
         cached = self._cache.get(cache_key)
         if cached is not None:
-            logger.debug(f"Cache hit: {operation}")
-            return cached
+            if self._outputs_exist(cached):
+                logger.debug(f"Cache hit: {operation}")
+                return cached
+            self._cache.delete(cache_key)
+        
+        response = self._run_operation(operation, data)
+        
+        # Adiciona ao cache
+        self._cache.set(cache_key, response)
+        logger.debug(f"Cache miss: {operation} (cache size: {self._cache.size()})")
+        
+        return response
+    
+    @staticmethod
+    def _cache_key(operation: str, data: Dict[str, Any]) -> str:
+        """
+        Chave do cache com caminhos trocados pelo hash do conteúdo
+        Arquivo alterado gera nova chave; arquivos idênticos compartilham a mesma
+        """
+        def content_addressed(value, key=""):
+            if isinstance(value, dict):
+                return {k: content_addressed(v, k) for k, v in value.items()}
+            if isinstance(value, list):
+                return [content_addressed(v, key) for v in value]
+            if isinstance(value, str) and key.endswith("Path"):
+                try:
+                    return f"content:{file_fingerprint(value)}"
+                except OSError:
+                    return value
+            return value
+        
+        return f"{operation}:{json.dumps(content_addressed(data), sort_keys=True)}"
+    
+    @staticmethod
+    def _outputs_exist(response: Dict[str, Any]) -> bool:
+        """Verifica se os arquivos de saída de uma resposta em cache ainda existem"""
+        results = response.get("Results", [response])
+        return all(
+            os.path.exists(r["OutputPath"])
+            for r in results if isinstance(r, dict) and r.get("OutputPath")
+        )
+    
+    def _get_worker_pool(self) -> Optional[WorkerPool]:
+        """Inicia o pool de workers na primeira chamada"""
+        if self.worker_command is None or self._pool_failed:
+            return None
+        
+        with self._pool_lock:
+            if self._pool is None and not self._pool_failed:
+                pool = WorkerPool(self.worker_command, size=self.pool_size)
+                if pool.start():
+                    self._pool = pool
+                    atexit.register(pool.stop)
+                    logger.info(f"Pool C# iniciado com {self.pool_size} workers")
+                else:
+                    pool.stop()
+                    self._pool_failed = True
+                    logger.warning("Workers C# indisponíveis - usando subprocess por chamada")
+            return self._pool
+    
+    def _run_operation(self, operation: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa via worker persistente ou, na falha, via subprocess"""
+        pool = self._get_worker_pool()
+        if pool is not None:
+            try:
+                return pool.request(operation, data)
+            except Exception as e:
+                if self.cs_executable is None:
+                    raise RuntimeError(f"Erro comunicação C#: {e}")
+                logger.warning(f"Worker C# falhou, usando subprocess: {e}")
+        
+        return self._run_subprocess(operation, data)
+    
+    def _run_subprocess(self, operation: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa operação em um processo C# dedicado"""
+        if self.cs_executable is None:
+            raise RuntimeError("Executável C# não encontrado")
         
         try:
             json_input = json.dumps(data, ensure_ascii=False)
@@ -139,13 +282,7 @@ class CSharpBridge:
             if result.returncode != 0:
                 raise RuntimeError(f"Erro C#: {result.stderr}")
             
-            response = json.loads(result.stdout)
-            
-            # Adiciona ao cache
-            self._cache.set(cache_key, response)
-            logger.debug(f"Cache miss: {operation} (cache size: {self._cache.size()})")
-            
-            return response
+            return json.loads(result.stdout)
             
         except subprocess.TimeoutExpired:
             raise RuntimeError("Timeout C# (30s)")
@@ -169,6 +306,33 @@ class CSharpBridge:
             "Brightness": brightness
         })
     
+    def supports_raw_transport(self) -> bool:
+        """Transporte por memória compartilhada exige workers persistentes"""
+        return self._get_worker_pool() is not None
+    
+    def apply_image_filters_raw(self, image, contrast: float = 1.0,
+                                brightness: float = 0.0):
+        """
+        Aplica filtros em imagem em memória via memória compartilhada
+        Sem arquivos temporários; retorna nova PIL Image
+        """
+        pool = self._get_worker_pool()
+        if pool is None:
+            raise RuntimeError("Transporte em memória requer workers C#")
+        
+        shm, header = image_to_shared(image)
+        try:
+            result = pool.request("apply-filters-raw", {
+                "Image": header,
+                "Contrast": contrast,
+                "Brightness": brightness
+            })
+            if not result.get("Success"):
+                raise RuntimeError(f"Erro C#: {result.get('Error')}")
+            return image_from_shared(shm, header)
+        finally:
+            release_shared(shm)
+    
     def batch_crop_images(self, images: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Crop em lote"""
         return self._execute("batch-crop", {"Images": images})
@@ -178,13 +342,33 @@ class CSharpBridge:
         self._cache.clear()
         logger.info("Cache C# limpo")
     
+    def get_worker_stats(self) -> Dict[str, Any]:
+        """Retorna estado do pool de workers"""
+        pool = self._pool
+        return {
+            "enabled": self.worker_command is not None and not self._pool_failed,
+            "running": pool is not None,
+            "pool_size": self.pool_size,
+            "restarts": pool.restarts if pool else 0,
+            "workers": pool.health_check() if pool else []
+        }
+    
+    def shutdown(self):
+        """Encerra os workers persistentes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.stop()
+                self._pool = None
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
-        return {
-            "size": self._cache.size(),
+        stats = self._cache.stats()
+        stats.update({
             "max_size": self._cache.max_size,
+            "max_bytes": self._cache.max_bytes,
             "ttl_seconds": self._cache.ttl
-        }
+        })
+        return stats
 
 # Instância singleton
 _bridge = CSharpBridge()
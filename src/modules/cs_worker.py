@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Workers C# persistentes
+Processos de longa duração falando JSON com prefixo de tamanho via stdin/stdout
+
+Protocolo (cada quadro = uint32 little-endian com o tamanho + JSON UTF-8):
+    requisição: {"Id": 1, "Operation": "apply-filters", "Data": {...}}
+    resposta:   {"Id": 1, "Result": {...}}  ou  {"Id": 1, "Error": "..."}
+A operação "ping" responde {"Pong": true} e serve como health check.
+"""
+import json
+import logging
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<I")
+
+def write_frame(stream, payload: Dict[str, Any]):
+    """Escreve um quadro JSON com prefixo de tamanho"""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    stream.write(_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+def _read_exact(stream, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def read_frame(stream) -> Optional[Dict[str, Any]]:
+    """Lê um quadro JSON; retorna None no fim do stream"""
+    header = _read_exact(stream, _HEADER.size)
+    if header is None:
+        return None
+    body = _read_exact(stream, _HEADER.unpack(header)[0])
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+class CSharpWorker:
+    """Processo worker persistente com pipeline de requisições"""
+
+    def __init__(self, command: List[str], timeout: float = 30):
+        self.command = command
+        self.timeout = timeout
+        self._process = None
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader = None
+        self._closed = False
+        self.requests = 0
+        self.started_at = None
+
+    @property
+    def alive(self) -> bool:
+        return (self._process is not None and not self._closed
+                and self._process.poll() is None)
+
+    @property
+    def load(self) -> int:
+        """Requisições em andamento"""
+        return len(self._pending)
+
+    def start(self):
+        """Inicia o processo e a thread leitora de respostas"""
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        self.started_at = time.time()
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(self._process,), name="cs-worker-reader", daemon=True
+        )
+        self._reader.start()
+        return self
+
+    def submit(self, operation: str, data: Dict[str, Any]) -> Future:
+        """
+        Envia requisição sem esperar a resposta
+        Várias requisições podem estar em voo no mesmo worker
+        """
+        future = Future()
+
+        if not self.alive:
+            raise RuntimeError("Worker C# não está em execução")
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Worker C# encerrado")
+            self._next_id += 1
+            request_id = self._next_id
+            self._pending[request_id] = future
+            self.requests += 1
+
+        # Lock separado para escrita: a thread leitora nunca espera por ele
+        try:
+            with self._write_lock:
+                write_frame(self._process.stdin, {
+                    "Id": request_id, "Operation": operation, "Data": data
+                })
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise RuntimeError(f"Falha ao enviar para worker C#: {e}")
+
+        return future
+
+    def request(self, operation: str, data: Dict[str, Any],
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Envia requisição e aguarda a resposta
+
+        Sem resposta no prazo o processo é considerado travado e morto: as
+        requisições pendentes falham e o pool reinicia o worker.
+        """
+        future = self.submit(operation, data)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            logger.warning(f"Worker C# não respondeu a '{operation}' - encerrando")
+            self.kill()
+            raise
+
+    def ping(self, timeout: float = 5) -> bool:
+        """Health check"""
+        try:
+            return bool(self.request("ping", {}, timeout=timeout).get("Pong"))
+        except Exception:
+            return False
+
+    def stop(self):
+        """Encerra o processo"""
+        process = self._process
+        if process is None:
+            return
+
+        try:
+            process.stdin.close()
+            process.wait(timeout=2)
+        except Exception:
+            process.kill()
+
+    def kill(self):
+        """Mata o processo (travado); a thread leitora falha os pendentes"""
+        with self._lock:
+            self._closed = True
+        if self._process is not None:
+            try:
+                self._process.kill()
+            except OSError:
+                pass
+
+    def _read_loop(self, process):
+        try:
+            while True:
+                message = read_frame(process.stdout)
+                if message is None:
+                    break
+
+                with self._lock:
+                    future = self._pending.pop(message.get("Id"), None)
+                if future is None:
+                    continue
+
+                if "Error" in message:
+                    future.set_exception(RuntimeError(f"Erro C#: {message['Error']}"))
+                else:
+                    future.set_result(message.get("Result", {}))
+        except Exception as e:
+            logger.warning(f"Leitura do worker C# falhou: {e}")
+        finally:
+            # Processo caiu: falha todas as requisições pendentes
+            with self._lock:
+                self._closed = True
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("Worker C# encerrado"))
+
+
+class WorkerPool:
+    """Pool de N workers persistentes com health check e reinício automático"""
+
+    def __init__(self, command: List[str], size: int = 2, timeout: float = 30,
+                 max_restarts: int = 5):
+        self.command = command
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self._workers: List[Optional[CSharpWorker]] = [None] * self.size
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Inicia os workers; retorna False se nenhum responder ao ping"""
+        with self._lock:
+            for i in range(self.size):
+                self._workers[i] = self._spawn()
+        return any(w is not None for w in self._workers)
+
+    def _spawn(self) -> Optional[CSharpWorker]:
+        try:
+            worker = CSharpWorker(self.command, timeout=self.timeout).start()
+        except OSError as e:
+            logger.warning(f"Falha ao iniciar worker C#: {e}")
+            return None
+
+        if not worker.ping():
+            worker.stop()
+            return None
+        return worker
+
+    def _acquire(self) -> CSharpWorker:
+        """Worker vivo com menor carga, reiniciando os que caíram"""
+        with self._lock:
+            for i, worker in enumerate(self._workers):
+                if worker is not None and worker.alive:
+                    continue
+                if worker is not None:
+                    if self.restarts >= self.max_restarts:
+                        self._workers[i] = None
+                        continue
+                    self.restarts += 1
+                    logger.warning("Worker C# caiu - reiniciando")
+                    self._workers[i] = self._spawn()
+
+            alive = [w for w in self._workers if w is not None and w.alive]
+            if not alive:
+                raise RuntimeError("Nenhum worker C# disponível")
+            return min(alive, key=lambda w: w.load)
+
+    def submit(self, operation: str, data: Dict[str, Any]) -> Future:
+        return self._acquire().submit(operation, data)
+
+    def request(self, operation: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa requisição; repete uma vez se o worker cair no meio"""
+        worker = self._acquire()
+        try:
+            return worker.request(operation, data)
+        except RuntimeError:
+            if worker.alive:
+                raise
+            return self._acquire().request(operation, data)
+
+    def health_check(self) -> List[Dict[str, Any]]:
+        """Pinga todos os workers"""
+        with self._lock:
+            workers = list(self._workers)
+
+        report = []
+        for worker in workers:
+            if worker is None:
+                report.append({"alive": False, "responsive": False, "requests": 0, "load": 0})
+                continue
+            report.append({
+                "alive": worker.alive,
+                "responsive": worker.alive and worker.ping(),
+                "requests": worker.requests,
+                "load": worker.load
+            })
+        return report
+
+    def stop(self):
+        with self._lock:
+            for worker in self._workers:
+                if worker is not None:
+                    worker.stop()
+            self._workers = [None] * self.size
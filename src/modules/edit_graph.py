@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Edições não destrutivas
+Cada imagem carrega uma lista imutável de operações; os pixels só são
+gerados na exibição (sobre a cópia reduzida) e no salvamento (uma vez,
+em resolução total, com o crop feito antes dos ajustes)
+"""
+from .image_processing import add_border, adjust_contrast_brightness
+
+class EditGraph:
+    """
+    Operações de uma imagem, em ordem:
+      ("crop", (x0, y0, x1, y1))            box em coordenadas da origem
+      ("enhance", contraste, brilho, média)  média de contraste já fixada
+
+    Crops são guardados em coordenadas da imagem de origem, então vários
+    crops se reduzem ao último. Ajustes com média fixada são pontuais e
+    podem ser aplicados depois do crop sem mudar o resultado.
+    """
+
+    __slots__ = ("ops",)
+
+    def __init__(self, ops=()):
+        self.ops = tuple(ops)
+
+    def __eq__(self, other):
+        return isinstance(other, EditGraph) and self.ops == other.ops
+
+    def __hash__(self):
+        return hash(self.ops)
+
+    def __bool__(self):
+        return bool(self.ops)
+
+    def __repr__(self):
+        return f"EditGraph({self.ops!r})"
+
+    @property
+    def crop_box(self):
+        """Box final em coordenadas da origem (None = imagem inteira)"""
+        for op in reversed(self.ops):
+            if op[0] == "crop":
+                return op[1]
+        return None
+
+    @property
+    def enhancements(self):
+        return [op[1:] for op in self.ops if op[0] == "enhance"]
+
+    def size(self, source_size):
+        """Tamanho da imagem editada"""
+        box = self.crop_box
+        if box is None:
+            return source_size
+        return (box[2] - box[0], box[3] - box[1])
+
+    def cropped(self, box):
+        """Novo grafo com crop; box em coordenadas da imagem editada"""
+        x0, y0, x1, y1 = box
+        base = self.crop_box
+        if base is not None:
+            x0, y0, x1, y1 = x0 + base[0], y0 + base[1], x1 + base[0], y1 + base[1]
+        return EditGraph(self.ops + (("crop", (int(x0), int(y0), int(x1), int(y1))),))
+
+    def recropped(self, box):
+        """Novo grafo com crop em coordenadas da origem (substitui o atual)"""
+        box = tuple(int(v) for v in box)
+        if box == self.crop_box:
+            return self
+        return EditGraph(self.ops + (("crop", box),))
+
+    def enhanced(self, contrast, brightness, mean):
+        """Novo grafo com ajuste de contraste/brilho"""
+        if contrast == 1.0 and brightness == 1.0:
+            return self
+        return EditGraph(self.ops + (("enhance", contrast, brightness, mean),))
+
+    def _apply_enhancements(self, image):
+        for contrast, brightness, mean in self.enhancements:
+            image = adjust_contrast_brightness(image, contrast, brightness, mean)
+        return image
+
+    def render_geometry(self, source):
+        """Apenas o crop (sem ajustes de cor)"""
+        box = self.crop_box
+        return source.crop(box) if box is not None else source
+
+    def render(self, source, border=False, border_width=5, border_color="black"):
+        """Resolução total: crop único, ajustes e borda opcional"""
+        image = self._apply_enhancements(self.render_geometry(source))
+        if image is source:
+            image = source.copy()
+        if border:
+            image = add_border(image, border_width=border_width, border_color=border_color)
+        return image
+
+    def render_display(self, pyramid, scale):
+        """Exibição: região recortada já na escala, a partir da pirâmide"""
+        return self._apply_enhancements(pyramid.display(scale, self.crop_box))
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Histórico de desfazer/refazer por imagem
+Guarda estados EditGraph (tuplas imutáveis de operações, sem pixels);
+estados consecutivos compartilham as operações em comum
+"""
+import sys
+from collections import deque
+
+from .edit_graph import EditGraph
+
+DEFAULT_MAX_KB = 256
+
+def _state_bytes(graph):
+    # Só a tupla de referências é própria do estado: as operações são
+    # compartilhadas com os estados anteriores
+    return sys.getsizeof(graph.ops)
+
+class EditHistory:
+    """
+    Pilha de estados com cursor: desfazer/refazer em O(1)
+
+    Uma nova edição descarta os estados refazíveis. Quando o total passa
+    de max_kb, os estados mais antigos são esquecidos.
+    """
+
+    def __init__(self, initial=None, max_kb=DEFAULT_MAX_KB):
+        self.max_bytes = int(max_kb * 1024)
+        self._undo = deque()
+        self._redo = []
+        self._current = initial if initial is not None else EditGraph()
+        self._bytes = _state_bytes(self._current)
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def push(self, graph):
+        """Registra novo estado; retorna False se nada mudou"""
+        if graph == self._current:
+            return False
+
+        for state in self._redo:
+            self._bytes -= _state_bytes(state)
+        self._redo.clear()
+
+        self._undo.append(self._current)
+        self._current = graph
+        self._bytes += _state_bytes(graph)
+
+        while self._bytes > self.max_bytes and self._undo:
+            self._bytes -= _state_bytes(self._undo.popleft())
+        return True
+
+    def undo(self):
+        """Volta um estado; retorna o estado atual (None se não há)"""
+        if not self._undo:
+            return None
+        self._redo.append(self._current)
+        self._current = self._undo.pop()
+        return self._current
+
+    def redo(self):
+        """Avança um estado; retorna o estado atual (None se não há)"""
+        if not self._redo:
+            return None
+        self._undo.append(self._current)
+        self._current = self._redo.pop()
+        return self._current
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Codificação de imagens
+Parâmetros de gravação por formato, escrita atômica (arquivo temporário
++ rename) e JPEG com tamanho máximo em bytes
+"""
+import io
+import math
+import os
+import threading
+from contextlib import contextmanager
+
+from PIL import Image
+
+DEFAULT_QUALITY = 95
+
+# Tamanho máximo: faixa de qualidade e limite de codificações por imagem
+MIN_QUALITY = 30
+SCALED_QUALITY = 75
+MAX_SIZE_ENCODES = 5
+
+FORMAT_BY_EXTENSION = {
+    ".jpg": "JPEG",
+    ".jpeg": "JPEG",
+    ".png": "PNG",
+    ".bmp": "BMP",
+    ".tif": "TIFF",
+    ".tiff": "TIFF",
+}
+
+# Modos aceitos por formato; outros são convertidos antes de gravar
+_FORMAT_MODES = {
+    "JPEG": ("RGB", "L", "CMYK"),
+    "BMP": ("RGB", "L", "1", "P", "RGBA"),
+}
+
+def format_from_path(path, default="JPEG"):
+    """Formato do Pillow a partir da extensão do arquivo"""
+    return FORMAT_BY_EXTENSION.get(os.path.splitext(path)[1].lower(), default)
+
+def encoder_settings(format_type, quality=DEFAULT_QUALITY):
+    """
+    Argumentos de image.save por formato
+
+    JPEG: croma 4:2:0 (caminho SIMD mais rápido do libjpeg-turbo) e sem
+    optimize/progressive, que exigem passadas extras sobre os coeficientes.
+    PNG: zlib nível 1, bem mais rápido que o padrão (6) em fotos, onde
+    níveis altos quase não reduzem o tamanho.
+    """
+    if format_type == "JPEG":
+        return {
+            "quality": int(quality),
+            "subsampling": 2,
+            "optimize": False,
+            "progressive": False,
+        }
+    if format_type == "PNG":
+        return {"compress_level": 1}
+    if format_type == "TIFF":
+        return {"compression": "raw"}
+    return {}
+
+def prepare_image(image, format_type):
+    """Converte o modo da imagem se o formato não o suporta"""
+    modes = _FORMAT_MODES.get(format_type)
+    if modes is None or image.mode in modes:
+        return image
+    if image.mode in ("RGBA", "LA", "PA") and format_type == "JPEG":
+        # JPEG não tem alfa: compõe sobre branco
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+@contextmanager
+def atomic_output(path):
+    """
+    Caminho temporário na pasta de destino; renomeado para path ao sair
+    sem erro e removido em caso de falha
+    """
+    folder, name = os.path.split(os.path.abspath(path))
+    tmp = os.path.join(folder, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def _atomic_write(path, write):
+    with atomic_output(path) as tmp:
+        # open() em vez de mkstemp: o arquivo final mantém as permissões
+        # padrão (umask) em vez de 0600. "wb" sobrescreve um temporário
+        # deixado por uma falha anterior (mesmo pid e thread reutilizados)
+        with open(tmp, "wb") as f:
+            write(f)
+    return path
+
+def atomic_save(image, path, format_type=None, **settings):
+    """
+    Grava em arquivo temporário na mesma pasta e renomeia por cima do
+    destino: uma falha no meio nunca deixa um arquivo truncado
+    """
+    format_type = format_type or format_from_path(path)
+    return _atomic_write(path, lambda f: image.save(f, format_type, **settings))
+
+def _jpeg_bytes(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", **encoder_settings("JPEG", quality))
+    return buffer.getvalue()
+
+def _next_quality(lo, lo_size, hi, hi_size, max_bytes):
+    """
+    Próxima qualidade entre lo (cabe) e hi (não cabe)
+
+    O tamanho cresce aproximadamente exponencial com a qualidade, então
+    interpolar em log acerta perto do limite em 1 ou 2 tentativas; sem os
+    dois tamanhos, usa o ponto médio.
+    """
+    if lo_size is None or hi_size is None or hi_size <= lo_size:
+        guess = (lo + hi) // 2
+    else:
+        t = math.log(max_bytes / lo_size) / math.log(hi_size / lo_size)
+        guess = lo + int(t * (hi - lo))
+    return min(max(guess, lo + 1), hi - 1)
+
+def _scaled(image, scale, buffer=None):
+    """
+    image reduzida por scale; com buffer (cópia já reduzida de image),
+    redimensiona a partir dele, bem mais barato que do original
+    """
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    source = buffer if buffer is not None else image
+    # reducing_gap: reduce() inteiro primeiro, filtro só no último passo
+    return source.resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+def encode_to_size(image, max_bytes, max_quality=DEFAULT_QUALITY, min_quality=MIN_QUALITY,
+                   allow_scale=True, max_encodes=MAX_SIZE_ENCODES):
+    """
+    JPEG com no máximo max_bytes, na maior qualidade encontrada
+
+    Codifica em memória: primeiro max_quality (basta se já couber). Com
+    allow_scale, testa min_quality; se nem ela cabe, fixa SCALED_QUALITY
+    e busca a maior resolução que cabe. Todas as tentativas, inclusive as
+    de redução, contam para max_encodes.
+
+    Returns:
+        (bytes, info) com info = {"quality", "scale", "size", "encodes", "fits"}
+    """
+    image = prepare_image(image, "JPEG")
+    source = image
+    scale = 1.0
+    encodes = 0
+    min_quality = min(min_quality, max_quality)
+
+    def encode(quality):
+        nonlocal encodes
+        encodes += 1
+        return _jpeg_bytes(image, quality)
+
+    def result(quality, data):
+        return data, {
+            "quality": quality, "scale": scale, "size": image.size,
+            "encodes": encodes, "fits": len(data) <= max_bytes
+        }
+
+    data = encode(max_quality)
+    if len(data) <= max_bytes:
+        return result(max_quality, data)
+
+    # lo: maior qualidade que cabe (lo_data None = nenhuma ainda)
+    # hi: menor qualidade que não cabe
+    lo, lo_data = min_quality - 1, None
+    hi, hi_size = max_quality, len(data)
+
+    if allow_scale:
+        if min_quality < max_quality:
+            data = encode(min_quality)
+        if len(data) <= max_bytes:
+            lo, lo_data = min_quality, data
+        else:
+            # Tamanho em SCALED_QUALITY na resolução original, interpolado
+            # em log entre min_quality e max_quality
+            quality = min(max(SCALED_QUALITY, min_quality), max_quality)
+            full_size = hi_size
+            if max_quality > min_quality:
+                t = (quality - min_quality) / (max_quality - min_quality)
+                full_size = len(data) * (hi_size / len(data)) ** t
+            return _encode_scaled(source, quality, full_size, max_bytes,
+                                  max_encodes - encodes, encodes)
+
+    while hi - lo > 1 and encodes < max_encodes:
+        quality = _next_quality(lo, len(lo_data) if lo_data else None, hi, hi_size, max_bytes)
+        data = encode(quality)
+        if len(data) <= max_bytes:
+            lo, lo_data = quality, data
+        else:
+            hi, hi_size = quality, len(data)
+
+    if lo_data is None:
+        return result(min_quality, data)
+    return result(lo, lo_data)
+
+def _encode_scaled(source, quality, full_size, max_bytes, budget, encodes):
+    """
+    Maior escala de source que cabe em max_bytes na qualidade fixa
+
+    O tamanho é tratado como potência da escala (área: expoente ~2),
+    ajustado em log-log entre a maior escala que cabe e a menor que não
+    cabe; a busca sobe ou desce e para perto do limite ou sem tentativas.
+
+    O original é reduzido uma vez (reduce inteiro, média de blocos: barato)
+    para um buffer com pelo menos 1,25x a escala estimada; as tentativas
+    partem desse buffer, refeito do original só se a busca precisar de
+    escala maior que a dele.
+    """
+    target = max_bytes * 0.92
+    fit = None                      # (escala, imagem, bytes) que cabe
+    miss = (1.0, full_size)         # (escala, tamanho) que não cabe
+    scale = math.sqrt(target / full_size)
+    image = data = None
+    buffer_scale, buffer = 1.0, None
+
+    for _ in range(max(0, budget)):
+        if buffer is None or scale > buffer_scale:
+            factor = max(1, int(1 / (1.25 * scale)))
+            buffer_scale = 1.0 / factor
+            buffer = source.reduce(factor) if factor > 1 else source
+        image = _scaled(source, scale, buffer)
+        data = _jpeg_bytes(image, quality)
+        encodes += 1
+        if len(data) <= max_bytes:
+            fit = (scale, image, data)
+            if len(data) >= max_bytes * 0.85:
+                break
+        else:
+            miss = (scale, len(data))
+
+        if fit is None:
+            scale *= math.sqrt(target / miss[1])
+            continue
+        (fit_scale, _, fit_data), (miss_scale, miss_size) = fit, miss
+        if miss_scale - fit_scale < 0.005 * miss_scale:
+            break
+        exponent = 2.0
+        if miss_size > len(fit_data):
+            exponent = math.log(miss_size / len(fit_data)) / math.log(miss_scale / fit_scale)
+        scale = fit_scale * (target / len(fit_data)) ** (1 / max(exponent, 0.5))
+        scale = min(max(scale, fit_scale * 1.005), miss_scale * 0.995)
+
+    if fit is not None:
+        scale, image, data = fit
+    if data is None:
+        image, data = source, b""
+    return data, {
+        "quality": quality, "scale": scale, "size": image.size,
+        "encodes": encodes, "fits": bool(data) and len(data) <= max_bytes
+    }
+
+def encode_image(image, path, format_type=None, quality=DEFAULT_QUALITY, max_bytes=None):
+    """
+    Grava a imagem com os parâmetros do formato (deduzido da extensão)
+
+    max_bytes (só JPEG) limita o tamanho do arquivo: quality passa a ser
+    a qualidade máxima da busca (ver encode_to_size).
+
+    Returns:
+        Caminho gravado
+    """
+    format_type = format_type or format_from_path(path)
+    image = prepare_image(image, format_type)
+
+    if max_bytes and format_type == "JPEG":
+        data, info = encode_to_size(image, max_bytes, max_quality=quality)
+        if not info["fits"]:
+            raise ValueError(
+                f"Não foi possível gravar abaixo de {max_bytes // 1024} KB "
+                f"({len(data) // 1024} KB em {info['size'][0]}x{info['size'][1]})"
+            )
+        return _atomic_write(path, lambda f: f.write(data))
+
+    return atomic_save(image, path, format_type, **encoder_settings(format_type, quality))
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Backends de detecção facial
+Haar cascade (padrão) e YuNet (cv2.FaceDetectorYN, CPU) atrás da mesma
+interface, com tempo medido por backend
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .face_detection import DETECTION_PROXY_SIZE, detect_faces_image
+
+DEFAULT_BACKEND = "haar"
+
+YUNET_MODEL_NAMES = (
+    "face_detection_yunet_2023mar.onnx",
+    "face_detection_yunet_2022mar.onnx",
+)
+
+class FaceDetectorBackend:
+    """Interface: detect(image) -> lista de [x, y, w, h] na imagem original"""
+
+    name = None
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "faces": 0, "total_ms": 0.0}
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def detect(self, image, proxy_size=DETECTION_PROXY_SIZE, refine=True, bgr=False):
+        """
+        Args:
+            image: PIL Image ou array NumPy (RGB, BGR com bgr=True, ou cinza)
+            proxy_size: Maior lado da cópia reduzida (None = resolução total)
+            refine: Refino em resolução total (quando o backend suporta)
+        """
+        start = time.perf_counter()
+        faces = self._detect(image, proxy_size, refine, bgr)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._stats_lock:
+            self._stats["calls"] += 1
+            self._stats["faces"] += len(faces)
+            self._stats["total_ms"] += elapsed_ms
+        return faces
+
+    def _detect(self, image, proxy_size, refine, bgr):
+        raise NotImplementedError
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["avg_ms"] = stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+class HaarBackend(FaceDetectorBackend):
+    """Haar cascade (scaleFactor=1.1, minNeighbors=5) com proxy e refino"""
+
+    name = "haar"
+
+    def _detect(self, image, proxy_size, refine, bgr):
+        return detect_faces_image(image, proxy_size=proxy_size, refine=refine, bgr=bgr)
+
+def find_yunet_model():
+    """Busca o modelo ONNX do YuNet (variável de ambiente ou pastas conhecidas)"""
+    env_path = os.environ.get("EDITOR_YUNET_MODEL")
+    if env_path and os.path.exists(env_path):
+        return env_path
+
+    folders = [os.path.dirname(os.path.abspath(__file__))]
+    if hasattr(sys, '_MEIPASS'):
+        folders.append(sys._MEIPASS)
+    if getattr(sys, 'frozen', False):
+        folders.append(os.path.dirname(sys.executable))
+    folders.append(str(Path.home() / ".editor_fotos_3x4" / "models"))
+
+    for folder in folders:
+        for name in YUNET_MODEL_NAMES:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                return path
+    return None
+
+class YuNetBackend(FaceDetectorBackend):
+    """
+    Rede YuNet via cv2.FaceDetectorYN (OpenCV >= 4.8, CPU)
+
+    Mais tolerante a rostos inclinados que o Haar; roda sempre na cópia
+    reduzida, sem etapa de refino.
+    """
+
+    name = "yunet"
+    score_threshold = 0.7
+    nms_threshold = 0.3
+    top_k = 50
+
+    def __init__(self, model_path=None):
+        super().__init__()
+        self.model_path = model_path or find_yunet_model()
+        if not self.model_path:
+            raise FileNotFoundError(
+                f"Modelo YuNet não encontrado ({YUNET_MODEL_NAMES[0]})"
+            )
+        self._local = threading.local()
+
+    @classmethod
+    def available(cls):
+        return hasattr(cv2, "FaceDetectorYN") and find_yunet_model() is not None
+
+    def _detector(self, size):
+        # Uma instância por thread: o detector guarda o tamanho de entrada
+        detector = getattr(self._local, "detector", None)
+        if detector is None:
+            detector = cv2.FaceDetectorYN.create(
+                self.model_path, "", size,
+                self.score_threshold, self.nms_threshold, self.top_k
+            )
+            self._local.detector = detector
+        detector.setInputSize(size)
+        return detector
+
+    def _detect(self, image, proxy_size, refine, bgr):
+        if isinstance(image, Image.Image):
+            img_w, img_h = image.size
+            factor = -(-max(img_w, img_h) // proxy_size) if proxy_size else 1
+            small = image.reduce(factor) if factor > 1 else image
+            arr = cv2.cvtColor(np.asarray(small.convert("RGB")), cv2.COLOR_RGB2BGR)
+        else:
+            arr = np.asarray(image)
+            img_h, img_w = arr.shape[:2]
+            if arr.ndim == 2:
+                arr = cv2.cvtColor(arr, cv2.COLOR_GRAY2BGR)
+            elif not bgr:
+                arr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+            scale = proxy_size / max(img_w, img_h) if proxy_size else 1.0
+            if scale < 1.0:
+                arr = cv2.resize(
+                    arr, (max(1, round(img_w * scale)), max(1, round(img_h * scale))),
+                    interpolation=cv2.INTER_AREA
+                )
+
+        small_h, small_w = arr.shape[:2]
+        _, detections = self._detector((small_w, small_h)).detect(arr)
+        if detections is None:
+            return []
+
+        sx, sy = img_w / small_w, img_h / small_h
+        faces = []
+        for x, y, w, h in detections[:, :4]:
+            x0 = max(0, int(x * sx))
+            y0 = max(0, int(y * sy))
+            x1 = min(img_w, int((x + w) * sx))
+            y1 = min(img_h, int((y + h) * sy))
+            if x1 > x0 and y1 > y0:
+                faces.append([x0, y0, x1 - x0, y1 - y0])
+        return faces
+
+BACKENDS = {
+    HaarBackend.name: HaarBackend,
+    YuNetBackend.name: YuNetBackend,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def available_backends():
+    """Nomes dos backends utilizáveis nesta instalação"""
+    return [name for name, cls in BACKENDS.items() if cls.available()]
+
+def get_detector(name=None):
+    """
+    Instância compartilhada do backend; cai para o Haar se o pedido
+    não estiver disponível
+    """
+    if isinstance(name, FaceDetectorBackend):
+        return name
+
+    name = name or DEFAULT_BACKEND
+    with _instances_lock:
+        backend = _instances.get(name)
+        if backend is not None:
+            return backend
+
+        cls = BACKENDS.get(name)
+        try:
+            if cls is None or not cls.available():
+                raise FileNotFoundError(f"Backend '{name}' indisponível")
+            backend = cls()
+        except Exception as e:
+            if name == DEFAULT_BACKEND:
+                raise
+            print(f"Detector {name} indisponível, usando {DEFAULT_BACKEND}: {e}")
+            backend = _instances.get(DEFAULT_BACKEND) or BACKENDS[DEFAULT_BACKEND]()
+            _instances[DEFAULT_BACKEND] = backend
+
+        _instances[name] = backend
+        return backend
+
+def get_detector_stats():
+    """Tempo e número de faces por backend já utilizado"""
+    with _instances_lock:
+        backends = {backend.name: backend for backend in _instances.values()}
+    return {name: backend.stats() for name, backend in backends.items()}
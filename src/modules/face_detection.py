@@ -5,11 +5,26 @@ Suporte para caminhos com acentos no Windows
 """
 import os
 import sys
+import threading
+import time
 import cv2
 import numpy as np
 from PIL import Image
 
-def get_cascade_path():
+from .geometry import DEFAULT_RATIO, enforce_box
+
+# Cache do classificador: caminho resolvido uma vez por processo e
+# uma instância por thread (CascadeClassifier não é reentrante)
+_cascade_lock = threading.Lock()
+_cascade_path = None
+_cascade_generation = 0
+_cascade_local = threading.local()
+_cascade_stats = {"loads": 0, "hits": 0, "load_time_ms": 0.0, "path_lookups": 0}
+
+# Maior lado da cópia reduzida usada na busca de faces
+DETECTION_PROXY_SIZE = 640
+
+def _find_cascade_path():
     """
     Busca o arquivo haarcascade em múltiplos locais
     CORRIGIDO: Prioriza locais mais confiáveis
@@ -46,10 +61,28 @@ def get_cascade_path():
     
     return None
 
+def get_cascade_path():
+    """
+    Retorna caminho do haarcascade, resolvido uma única vez por processo
+    """
+    global _cascade_path
+    
+    with _cascade_lock:
+        if _cascade_path is None:
+            _cascade_stats["path_lookups"] += 1
+            _cascade_path = _find_cascade_path()
+        return _cascade_path
+
 def get_cascade_classifier():
     """
-    Retorna CascadeClassifier carregado ou None
+    Retorna CascadeClassifier da thread atual, carregando na primeira chamada
     """
+    cached = getattr(_cascade_local, "detector", None)
+    if cached is not None and cached[0] == _cascade_generation:
+        with _cascade_lock:
+            _cascade_stats["hits"] += 1
+        return cached[1]
+    
     cascade_path = get_cascade_path()
     
     if not cascade_path:
@@ -58,7 +91,9 @@ def get_cascade_classifier():
             "Verifique se o arquivo existe na instalação."
         )
     
+    start = time.perf_counter()
     detector = cv2.CascadeClassifier(cascade_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
     
     if detector.empty():
         raise RuntimeError(
@@ -66,8 +101,29 @@ def get_cascade_classifier():
             "Arquivo pode estar corrompido."
         )
     
+    with _cascade_lock:
+        _cascade_stats["loads"] += 1
+        _cascade_stats["load_time_ms"] += elapsed_ms
+    
+    _cascade_local.detector = (_cascade_generation, detector)
     return detector
 
+def get_cascade_stats():
+    """Métricas do cache de classificadores"""
+    with _cascade_lock:
+        stats = dict(_cascade_stats)
+        stats["path"] = _cascade_path
+    stats["avg_load_time_ms"] = stats["load_time_ms"] / stats["loads"] if stats["loads"] else 0.0
+    return stats
+
+def clear_cascade_cache():
+    """Invalida caminho e instâncias em cache (recarregadas sob demanda)"""
+    global _cascade_path, _cascade_generation
+    
+    with _cascade_lock:
+        _cascade_path = None
+        _cascade_generation += 1
+
 def load_image_opencv(image_path):
     """
     Carrega imagem com suporte UTF-8/acentos
@@ -85,7 +141,142 @@ def load_image_opencv(image_path):
     except Exception:
         return None
 
-def detect_faces(image_path):
+def _iou(a, b):
+    """Intersecção sobre união de duas boxes (x, y, w, h)"""
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union else 0.0
+
+def _largest_face(faces):
+    """Face de maior área (o retrato principal em fotos 3x4)"""
+    return max(faces, key=lambda f: f[2] * f[3])
+
+def _detect_multiscale(detector, gray, min_size=(30, 30), max_size=None):
+    faces = detector.detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=min_size,
+        maxSize=max_size or (0, 0)
+    )
+    return [[int(v) for v in f] for f in faces] if len(faces) > 0 else []
+
+def _refine_face(detector, read_region, img_size, box, margin=0.5):
+    """
+    Refina box na resolução total buscando só numa ROI ao redor dela
+    e só em escalas próximas ao tamanho já detectado
+    
+    read_region(x0, y0, x1, y1) retorna a ROI em tons de cinza
+    """
+    img_w, img_h = img_size
+    x, y, w, h = box
+    mx, my = int(w * margin), int(h * margin)
+    rx0, ry0 = max(0, x - mx), max(0, y - my)
+    rx1, ry1 = min(img_w, x + w + mx), min(img_h, y + h + my)
+    
+    min_side = int(min(w, h) * 0.7)
+    max_side = int(max(w, h) * 1.4)
+    faces = _detect_multiscale(
+        detector, read_region(rx0, ry0, rx1, ry1),
+        min_size=(min_side, min_side), max_size=(max_side, max_side)
+    )
+    if not faces:
+        return box
+    
+    faces = [[fx + rx0, fy + ry0, fw, fh] for fx, fy, fw, fh in faces]
+    return max(faces, key=lambda f: _iou(f, box))
+
+def _detect_on_proxy(detector, small, img_size, read_region, refine):
+    """Detecta na cópia reduzida e mapeia as boxes para a resolução total"""
+    sx = img_size[0] / small.shape[1]
+    sy = img_size[1] / small.shape[0]
+    
+    faces = [
+        [int(fx * sx), int(fy * sy), int(fw * sx), int(fh * sy)]
+        for fx, fy, fw, fh in _detect_multiscale(detector, small, min_size=(24, 24))
+    ]
+    
+    if refine:
+        faces = [_refine_face(detector, read_region, img_size, f) for f in faces]
+    
+    return faces
+
+def detect_faces_gray(gray, proxy_size=DETECTION_PROXY_SIZE, refine=True):
+    """
+    Detecta faces em imagem em tons de cinza
+    
+    Args:
+        gray: Array uint8 (H, W)
+        proxy_size: Maior lado da cópia reduzida usada na busca
+                    (None = busca na resolução total)
+        refine: Refina cada box numa ROI em resolução total
+    
+    Returns:
+        Lista de [x, y, w, h] em coordenadas da imagem original
+    """
+    detector = get_cascade_classifier()
+    img_h, img_w = gray.shape[:2]
+    
+    scale = proxy_size / max(img_w, img_h) if proxy_size else 1.0
+    if scale >= 1.0:
+        return _detect_multiscale(detector, gray)
+    
+    small = cv2.resize(
+        gray, (max(1, round(img_w * scale)), max(1, round(img_h * scale))),
+        interpolation=cv2.INTER_AREA
+    )
+    return _detect_on_proxy(
+        detector, small, (img_w, img_h),
+        lambda x0, y0, x1, y1: gray[y0:y1, x0:x1], refine
+    )
+
+def detect_faces_image(image, proxy_size=DETECTION_PROXY_SIZE, refine=True, bgr=False):
+    """
+    Detecta faces em imagem já decodificada, sem reler do disco
+    
+    Args:
+        image: PIL Image ou array NumPy (RGB, BGR com bgr=True, ou cinza)
+        proxy_size: Maior lado da cópia reduzida (None = resolução total)
+        refine: Refina cada box numa ROI em resolução total
+    
+    Returns:
+        Lista de [x, y, w, h]
+    """
+    if not isinstance(image, Image.Image):
+        # Array: cvtColor lê o buffer diretamente, sem cópias intermediárias
+        arr = np.asarray(image)
+        if arr.ndim == 2:
+            gray = arr
+        else:
+            gray = cv2.cvtColor(arr, cv2.COLOR_BGR2GRAY if bgr else cv2.COLOR_RGB2GRAY)
+        return detect_faces_gray(gray, proxy_size=proxy_size, refine=refine)
+    
+    # PIL não expõe o buffer para o NumPy sem cópia: reduz e converte para
+    # cinza no próprio PIL e só exporta o proxy e as ROIs de refino
+    img_w, img_h = image.size
+    factor = -(-max(img_w, img_h) // proxy_size) if proxy_size else 1
+    if factor <= 1:
+        return detect_faces_gray(np.asarray(image.convert("L")), proxy_size=None)
+    
+    detector = get_cascade_classifier()
+    small = np.asarray(image.reduce(factor).convert("L"))
+    return _detect_on_proxy(
+        detector, small, image.size,
+        lambda x0, y0, x1, y1: np.asarray(image.crop((x0, y0, x1, y1)).convert("L")),
+        refine
+    )
+
+def _detect_with_backend(image, proxy_size, refine, bgr, backend):
+    """Detecção pelo backend pedido (None = Haar direto)"""
+    if backend is None:
+        return detect_faces_image(image, proxy_size=proxy_size, refine=refine, bgr=bgr)
+    
+    from .face_backends import get_detector
+    return get_detector(backend).detect(image, proxy_size=proxy_size, refine=refine, bgr=bgr)
+
+def detect_faces(image_path, proxy_size=DETECTION_PROXY_SIZE, refine=True, backend=None):
     """
     Detecta todas as faces em uma imagem
     Retorna lista de coordenadas (x, y, w, h)
@@ -98,61 +289,52 @@ def detect_faces(image_path):
         return []
     
     try:
-        detector = get_cascade_classifier()
+        return _detect_with_backend(img_cv, proxy_size, refine, True, backend)
     except (FileNotFoundError, RuntimeError):
         return []
-    
-    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    
-    faces = detector.detectMultiScale(
-        gray,
-        scaleFactor=1.1,
-        minNeighbors=5,
-        minSize=(30, 30)
-    )
-    
-    return faces.tolist() if len(faces) > 0 else []
 
-def expand_and_pad_face_crop(path, pad_ratio=1.0):
+def face_crop_box(image, pad_ratio=1.0, proxy_size=DETECTION_PROXY_SIZE, refine=True, bgr=False,
+                  backend=None, ratio=DEFAULT_RATIO):
     """
-    Detecta face e retorna imagem cropada com proporção 3:4
+    Calcula box 3:4 (ou outra proporção) ao redor da maior face
     
     Args:
-        path: Caminho da imagem (suporta acentos)
+        image: PIL Image ou array NumPy (ver detect_faces_image)
         pad_ratio: Razão de padding (1.0 = 100% do tamanho da face)
+        backend: Nome do detector (ver face_backends; None = Haar)
+        ratio: Proporção do crop (ver geometry.RATIOS)
     
     Returns:
-        PIL Image cropada ou None se não detectar
+        Box (x0, y0, x1, y1) ou None se não detectar
     """
-    from .image_processing import enforce_3x4
-    
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Imagem não encontrada: {path}")
-    
-    img_cv = load_image_opencv(path)
-    if img_cv is None:
-        raise ValueError(f"Não foi possível carregar: {path}")
-    
     try:
-        detector = get_cascade_classifier()
+        faces = _detect_with_backend(image, proxy_size, refine, bgr, backend)
     except (FileNotFoundError, RuntimeError) as e:
         raise RuntimeError(f"Erro ao carregar detector facial: {str(e)}")
     
-    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
+    if len(faces) == 0:
+        return None
     
-    faces = detector.detectMultiScale(
-        gray,
-        scaleFactor=1.1,
-        minNeighbors=5,
-        minSize=(30, 30)
-    )
+    if isinstance(image, Image.Image):
+        img_size = image.size
+    else:
+        img_h, img_w = np.asarray(image).shape[:2]
+        img_size = (img_w, img_h)
+    
+    return box_from_faces(faces, img_size, pad_ratio, ratio)
+
+def pad_face_box(faces, img_size, pad_ratio=1.0):
+    """
+    Box com padding ao redor da maior face, ainda sem ajuste de proporção
     
+    Returns:
+        (x0, y0, x1, y1) ou None se não houver faces
+    """
     if len(faces) == 0:
         return None
     
-    x, y, w, h = faces[0]
-    
-    img_h, img_w = img_cv.shape[:2]
+    x, y, w, h = _largest_face(faces)
+    img_w, img_h = img_size
     
     pad_w = int(w * pad_ratio)
     pad_h = int(h * pad_ratio)
@@ -161,10 +343,76 @@ def expand_and_pad_face_crop(path, pad_ratio=1.0):
     y0 = max(0, y - pad_h // 2)
     x1 = min(img_w, x + w + pad_w // 2)
     y1 = min(img_h, y + h + pad_h // 2)
+    return (x0, y0, x1, y1)
+
+def box_from_faces(faces, img_size, pad_ratio=1.0, ratio=DEFAULT_RATIO):
+    """
+    Box na proporção pedida ao redor da maior face já detectada
     
-    box_3x4 = enforce_3x4((x0, y0, x1, y1), (img_w, img_h))
+    Args:
+        faces: Sequência de (x, y, w, h)
+        img_size: (largura, altura) da imagem em que as faces foram detectadas
+        pad_ratio: Razão de padding (1.0 = 100% do tamanho da face)
+        ratio: Proporção do crop (ver geometry.RATIOS)
     
-    img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
+    Returns:
+        Box (x0, y0, x1, y1) ou None se não houver faces
+    """
+    box = pad_face_box(faces, img_size, pad_ratio)
+    if box is None:
+        return None
+    return enforce_box(box, img_size, ratio)
+
+def crop_face(image, pad_ratio=1.0, proxy_size=DETECTION_PROXY_SIZE, refine=True, backend=None):
+    """
+    Crop 3:4 pela face de uma imagem já em memória
+    
+    Args:
+        image: PIL Image ou array NumPy RGB
+        pad_ratio: Razão de padding (1.0 = 100% do tamanho da face)
+    
+    Returns:
+        PIL Image cropada ou None se não detectar
+    """
+    box = face_crop_box(image, pad_ratio=pad_ratio, proxy_size=proxy_size, refine=refine,
+                        backend=backend)
+    if box is None:
+        return None
+    
+    if isinstance(image, Image.Image):
+        return image.crop(box)
+    
+    # Copia apenas a região recortada
+    x0, y0, x1, y1 = box
+    return Image.fromarray(np.ascontiguousarray(np.asarray(image)[y0:y1, x0:x1]))
+
+def expand_and_pad_face_crop(path, pad_ratio=1.0, proxy_size=DETECTION_PROXY_SIZE, refine=True,
+                             backend=None):
+    """
+    Detecta face e retorna imagem cropada com proporção 3:4
+    
+    Args:
+        path: Caminho da imagem (suporta acentos)
+        pad_ratio: Razão de padding (1.0 = 100% do tamanho da face)
+        proxy_size: Maior lado da cópia reduzida para detecção (None = resolução total)
+        refine: Refina a box detectada em resolução total
+        backend: Nome do detector (ver face_backends; None = Haar)
+    
+    Returns:
+        PIL Image cropada ou None se não detectar
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Imagem não encontrada: {path}")
+    
+    img_cv = load_image_opencv(path)
+    if img_cv is None:
+        raise ValueError(f"Não foi possível carregar: {path}")
+    
+    box = face_crop_box(img_cv, pad_ratio=pad_ratio, proxy_size=proxy_size,
+                        refine=refine, bgr=True, backend=backend)
+    if box is None:
+        return None
     
-    pil_img = Image.fromarray(img_rgb)
-    return pil_img.crop(box_3x4)
\ No newline at end of file
+    # Converte só a região recortada
+    x0, y0, x1, y1 = box
+    return Image.fromarray(cv2.cvtColor(img_cv[y0:y1, x0:x1], cv2.COLOR_BGR2RGB))
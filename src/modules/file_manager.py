@@ -5,6 +5,8 @@ Contém funcionalidades de salvamento e manipulação de arquivos
 import os
 from tkinter import filedialog, messagebox
 
+from .encoder import encode_image, format_from_path
+
 class FileManager:
     """
     Gerenciador de arquivos para o editor de fotos
@@ -41,55 +43,82 @@ class FileManager:
         )
     
     @staticmethod
-    def save_single_image(image, format_type, quality=90, overwrite=False, original_path=None):
+    def save_single_image(image, format_type=None, quality=90, overwrite=False, original_path=None,
+                          max_bytes=None):
         """
         Salva uma única imagem
+        format_type=None mantém a extensão original (ou usa a escolhida no diálogo)
+        max_bytes limita o tamanho de JPEGs (qualidade/resolução reduzidas)
         """
         ext_map = FileManager.get_extension_map()
         
         if overwrite and original_path:
-            base_name, _ = os.path.splitext(original_path)
-            save_path = base_name + ext_map[format_type]
+            base_name, ext = os.path.splitext(original_path)
+            save_path = base_name + (ext_map[format_type] if format_type else ext)
         else:
+            if format_type:
+                default_ext = ext_map[format_type]
+            else:
+                default_ext = os.path.splitext(original_path or "")[1] or ext_map["JPEG"]
             save_path = filedialog.asksaveasfilename(
-                defaultextension=ext_map[format_type],
+                defaultextension=default_ext,
                 filetypes=FileManager.get_file_types()
             )
             if not save_path:
                 return None
         
-        save_kwargs = {"quality": quality} if format_type == "JPEG" else {}
-        image.save(save_path, format_type, **save_kwargs)
+        encode_image(image, save_path, format_type or format_from_path(save_path), quality, max_bytes)
         
         return save_path
     
     @staticmethod
-    def save_batch_images(images, image_paths, format_type, quality=90, overwrite=False):
+    def ask_sheet_path():
+        """Diálogo para o arquivo das folhas de impressão (PDF ou TIFF)"""
+        return filedialog.asksaveasfilename(
+            title="Salvar folhas de impressão",
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf"), ("TIFF", "*.tiff;*.tif")]
+        ) or None
+    
+    @staticmethod
+    def get_batch_targets(image_paths, format_type=None, overwrite=False):
         """
-        Salva múltiplas imagens em lote
+        Calcula caminhos de destino para salvamento em lote
+        format_type=None mantém a extensão original
+        Retorna None se o usuário cancelar a escolha da pasta
         """
         ext_map = FileManager.get_extension_map()
         
+        def target_name(orig):
+            base_name, ext = os.path.splitext(orig)
+            return base_name + (ext_map[format_type] if format_type else ext)
+        
         if overwrite:
-            targets = []
-            for orig in image_paths:
-                base_name, _ = os.path.splitext(orig)
-                targets.append(base_name + ext_map[format_type])
-        else:
-            folder = filedialog.askdirectory(title="Selecione pasta para salvar todas")
-            if not folder:
-                return 0
-            targets = [
-                os.path.join(folder, os.path.splitext(os.path.basename(orig))[0] + ext_map[format_type])
-                for orig in image_paths
-            ]
+            return [target_name(orig) for orig in image_paths]
+        
+        folder = filedialog.askdirectory(title="Selecione pasta para salvar todas")
+        if not folder:
+            return None
+        return [
+            os.path.join(folder, os.path.basename(target_name(orig)))
+            for orig in image_paths
+        ]
+    
+    @staticmethod
+    def save_batch_images(images, image_paths, format_type, quality=90, overwrite=False,
+                          max_bytes=None):
+        """
+        Salva múltiplas imagens em lote
+        """
+        targets = FileManager.get_batch_targets(image_paths, format_type, overwrite)
+        if targets is None:
+            return 0
         
         saved = 0
-        save_kwargs = {"quality": quality} if format_type == "JPEG" else {}
         
         for img, target in zip(images, targets):
             try:
-                img.save(target, format_type, **save_kwargs)
+                encode_image(img, target, format_type, quality, max_bytes)
                 saved += 1
             except Exception as e:
                 messagebox.showerror("Erro ao salvar", f"Erro ao salvar {target}: {str(e)}")
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Impressão digital de arquivos
+Assinatura rápida por stat (mtime + tamanho + inode) e hash de conteúdo
+calculado sob demanda, uma única vez por assinatura
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+_CHUNK_SIZE = 1024 * 1024
+_MAX_ENTRIES = 4096
+
+_lock = threading.Lock()
+_hashes = OrderedDict()
+
+def file_signature(path):
+    """
+    Assinatura barata do arquivo: (mtime_ns, tamanho, inode)
+    Muda sempre que o arquivo é regravado
+    """
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _hash_file(path):
+    hasher = xxhash.xxh3_128() if xxhash else hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def file_fingerprint(path):
+    """
+    Hash do conteúdo do arquivo
+
+    O hash só é recalculado quando a assinatura (stat) muda; arquivos
+    idênticos em caminhos diferentes têm a mesma impressão digital.
+    """
+    key = (os.path.abspath(path),) + file_signature(path)
+
+    with _lock:
+        digest = _hashes.get(key)
+        if digest is not None:
+            _hashes.move_to_end(key)
+            return digest
+
+    digest = _hash_file(path)
+
+    # Arquivo alterado durante a leitura: não memoriza
+    if (key[0],) + file_signature(path) != key:
+        return digest
+
+    with _lock:
+        _hashes[key] = digest
+        while len(_hashes) > _MAX_ENTRIES:
+            _hashes.popitem(last=False)
+
+    return digest
+
+def clear_fingerprint_cache():
+    with _lock:
+        _hashes.clear()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Geometria de crop
+Ajuste de proporção vetorizado (N boxes de uma vez) usado pela seleção
+no canvas, pelo crop facial e pelos crops em lote
+"""
+import numpy as np
+
+# Proporções largura:altura em inteiros (aritmética exata)
+RATIOS = {
+    "3x4": (3, 4),
+    "5x7": (5, 7),
+    "35x45": (35, 45),   # passaporte 35x45 mm
+}
+DEFAULT_RATIO = "3x4"
+
+def _ratio(ratio):
+    if isinstance(ratio, str):
+        return RATIOS[ratio]
+    return ratio
+
+def enforce_aspect(boxes, sizes, ratio=DEFAULT_RATIO):
+    """
+    Clampa cada box dentro da imagem e reduz o lado excedente, centralizado,
+    até a proporção pedida
+
+    A altura resultante é a maior que cabe na box e a largura é derivada
+    dela (altura * num // den), então aplicar de novo não muda nada.
+
+    Args:
+        boxes: (N, 4) x0, y0, x1, y1
+        sizes: (N, 2) largura, altura das imagens (ou um único par)
+        ratio: Nome em RATIOS ou (num, den) de largura:altura
+
+    Returns:
+        Array int64 (N, 4)
+    """
+    num, den = _ratio(ratio)
+    boxes = np.atleast_2d(np.asarray(boxes, dtype=np.int64))
+    sizes = np.broadcast_to(np.asarray(sizes, dtype=np.int64), (len(boxes), 2))
+
+    # Ordena cantos e clampa na imagem
+    x0 = np.clip(np.minimum(boxes[:, 0], boxes[:, 2]), 0, sizes[:, 0])
+    x1 = np.clip(np.maximum(boxes[:, 0], boxes[:, 2]), 0, sizes[:, 0])
+    y0 = np.clip(np.minimum(boxes[:, 1], boxes[:, 3]), 0, sizes[:, 1])
+    y1 = np.clip(np.maximum(boxes[:, 1], boxes[:, 3]), 0, sizes[:, 1])
+
+    w = x1 - x0
+    h = y1 - y0
+
+    # Limitado pela altura se a largura comporta, senão pela largura
+    new_h = np.where(h * num // den <= w, h, w * den // num)
+    new_w = new_h * num // den
+
+    out_x0 = x0 + (w - new_w) // 2
+    out_y0 = y0 + (h - new_h) // 2
+    return np.stack([out_x0, out_y0, out_x0 + new_w, out_y0 + new_h], axis=1)
+
+def enforce_box(box, img_size, ratio=DEFAULT_RATIO):
+    """enforce_aspect para uma única box; retorna tupla de ints"""
+    return tuple(int(v) for v in enforce_aspect([box], [img_size], ratio)[0])
+
+def enforce_3x4(box, img_size):
+    """
+    Recebe box=(x0,y0,x1,y1) e img_size=(img_w,img_h),
+    clampa a box dentro da imagem e força a proporção 3:4 centralizando.
+    """
+    return enforce_box(box, img_size, "3x4")
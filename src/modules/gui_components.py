@@ -3,14 +3,18 @@
 Componentes de interface gráfica - Emojis Melhorados + Assinatura
 """
 import tkinter as tk
+from collections import OrderedDict
+
 import customtkinter as ctk
-from modules.image_processing import enforce_3x4
+from PIL import ImageTk
+from modules.geometry import DEFAULT_RATIO, enforce_box
 
 class ControlPanel(ctk.CTkScrollableFrame):
     """Painel de controle lateral"""
     
     def __init__(self, parent, callbacks, contrast_var, brightness_var, 
-                 quality_var, scale_var, border_var, replace_var, on_border_change=None):
+                 quality_var, scale_var, border_var, replace_var, on_border_change=None,
+                 on_adjust=None, on_zoom=None, max_kb_var=None):
         super().__init__(parent, width=280)
         
         self.callbacks = callbacks
@@ -20,7 +24,10 @@ class ControlPanel(ctk.CTkScrollableFrame):
         self.scale_var = scale_var
         self.border_var = border_var
         self.replace_var = replace_var
+        self.max_kb_var = max_kb_var
         self.on_border_change = on_border_change
+        self.on_adjust = on_adjust
+        self.on_zoom = on_zoom
         
         self.contrast_label = None
         self.brightness_label = None
@@ -77,6 +84,30 @@ class ControlPanel(ctk.CTkScrollableFrame):
             height=28
         ).pack(fill="x", pady=(0,5))
         
+        ctk.CTkButton(
+            self, text="●● Auto Crop Todas", 
+            command=self.callbacks['auto_crop_all'],
+            height=28
+        ).pack(fill="x", pady=(0,5))
+        
+        history_frame = ctk.CTkFrame(self, fg_color="transparent")
+        history_frame.pack(fill="x", pady=(0,5))
+        
+        ctk.CTkButton(
+            history_frame, text="↶ Desfazer", 
+            command=self.callbacks['undo'],
+            height=28
+        ).grid(row=0, column=0, sticky="ew", padx=(0,2))
+        
+        ctk.CTkButton(
+            history_frame, text="Refazer ↷", 
+            command=self.callbacks['redo'],
+            height=28
+        ).grid(row=0, column=1, sticky="ew", padx=(2,0))
+        
+        history_frame.columnconfigure(0, weight=1)
+        history_frame.columnconfigure(1, weight=1)
+        
         ctk.CTkButton(
             self, text="↺ Reverter", 
             command=self.callbacks['revert_current'],
@@ -109,7 +140,7 @@ class ControlPanel(ctk.CTkScrollableFrame):
             self, from_=0.5, to=2.0, 
             variable=self.contrast_var,
             number_of_steps=30,
-            command=self.update_contrast_label
+            command=self._on_contrast_slider
         ).pack(fill="x", pady=(0,5))
         
         # Brilho
@@ -126,7 +157,7 @@ class ControlPanel(ctk.CTkScrollableFrame):
             self, from_=0.5, to=2.0, 
             variable=self.brightness_var,
             number_of_steps=30,
-            command=self.update_brightness_label
+            command=self._on_brightness_slider
         ).pack(fill="x", pady=(0,5))
         
         # Qualidade
@@ -143,9 +174,19 @@ class ControlPanel(ctk.CTkScrollableFrame):
             self, from_=60, to=100, 
             variable=self.quality_var,
             number_of_steps=40,
-            command=self.update_quality_label
+            command=self._on_quality_slider
         ).pack(fill="x", pady=(0,5))
         
+        # Tamanho máximo do JPEG (0 = sem limite)
+        if self.max_kb_var is not None:
+            max_kb_frame = ctk.CTkFrame(self, fg_color="transparent")
+            max_kb_frame.pack(fill="x", pady=(0,5))
+            
+            ctk.CTkLabel(max_kb_frame, text="◇ Máx. KB (0 = livre):", anchor="w").pack(side="left")
+            ctk.CTkEntry(
+                max_kb_frame, textvariable=self.max_kb_var, width=60, justify="right"
+            ).pack(side="right")
+        
         # Zoom
         zoom_header = ctk.CTkFrame(self, fg_color="transparent")
         zoom_header.pack(fill="x", pady=(0,2))
@@ -160,7 +201,7 @@ class ControlPanel(ctk.CTkScrollableFrame):
             self, from_=0.1, to=2.0, 
             variable=self.scale_var,
             number_of_steps=38,
-            command=self.update_zoom_label
+            command=self._on_zoom_slider
         ).pack(fill="x", pady=(0,5))
         
         # BORDA
@@ -203,6 +244,12 @@ class ControlPanel(ctk.CTkScrollableFrame):
             self, text="▼ Salvar Todas", 
             command=self.callbacks['save_all'],
             height=35
+        ).pack(fill="x", pady=(0,5))
+        
+        ctk.CTkButton(
+            self, text="▦ Folha de Impressão", 
+            command=self.callbacks['print_sheet'],
+            height=35
         ).pack(fill="x", pady=(0,15))
         
         # ASSINATURA
@@ -226,6 +273,28 @@ class ControlPanel(ctk.CTkScrollableFrame):
         if self.on_border_change:
             self.on_border_change()
     
+    def _notify_adjust(self):
+        """Avisa mudança de ajuste para o preview ao vivo"""
+        if self.on_adjust:
+            self.on_adjust()
+    
+    def _on_contrast_slider(self, value):
+        self.update_contrast_label(value)
+        self._notify_adjust()
+    
+    def _on_brightness_slider(self, value):
+        self.update_brightness_label(value)
+        self._notify_adjust()
+    
+    def _on_quality_slider(self, value):
+        self.update_quality_label(value)
+        self._notify_adjust()
+    
+    def _on_zoom_slider(self, value):
+        self.update_zoom_label(value)
+        if self.on_zoom:
+            self.on_zoom()
+    
     def update_contrast_label(self, value):
         if self.contrast_label:
             self.contrast_label.configure(text=f"{float(value):.1f}")
@@ -246,18 +315,34 @@ class ControlPanel(ctk.CTkScrollableFrame):
 class ImageCanvas(tk.Canvas):
     """Canvas para exibição e seleção"""
     
-    def __init__(self, parent, on_selection):
+    def __init__(self, parent, on_selection, ratio=DEFAULT_RATIO):
         super().__init__(parent, bg="#1a1a1a", cursor="cross", highlightthickness=0)
         
         self.on_selection = on_selection
+        self.ratio = ratio
         self.start_x = self.start_y = 0
         self.rect = None
         self.dim_text = None
+        self.selection = None
+        self.view = None   # (x, y da imagem no canvas, escala, tamanho da imagem)
         
         self.bind("<ButtonPress-1>", self.on_press)
         self.bind("<B1-Motion>", self.on_drag)
         self.bind("<ButtonRelease-1>", self.on_release)
     
+    def set_view(self, origin, scale, image_size):
+        """Posição e escala da imagem exibida (para converter a seleção)"""
+        self.view = (origin[0], origin[1], scale, image_size)
+    
+    def to_image(self, x, y):
+        ox, oy, scale, _ = self.view
+        return int((x - ox) / scale), int((y - oy) / scale)
+    
+    def to_canvas(self, box):
+        ox, oy, scale, _ = self.view
+        x0, y0, x1, y1 = box
+        return ox + x0 * scale, oy + y0 * scale, ox + x1 * scale, oy + y1 * scale
+    
     def on_press(self, event):
         self.start_x, self.start_y = event.x, event.y
         if self.rect:
@@ -266,30 +351,33 @@ class ImageCanvas(tk.Canvas):
             self.delete(self.dim_text)
         self.rect = None
         self.dim_text = None
+        self.selection = None
     
     def on_drag(self, event):
         if self.rect:
             self.delete(self.rect)
         if self.dim_text:
             self.delete(self.dim_text)
+        self.rect = self.dim_text = self.selection = None
         
-        x0, y0 = self.start_x, self.start_y
-        x1, y1 = event.x, event.y
+        if self.view is None:
+            return
         
-        w, h = abs(x1 - x0), abs(y1 - y0)
+        w, h = abs(event.x - self.start_x), abs(event.y - self.start_y)
         if w < 5 or h < 5:
             return
         
-        target = 3/4
+        # Mesma geometria do crop final: o retângulo é a box exata em pixels
+        image_size = self.view[3]
+        box = enforce_box(
+            self.to_image(self.start_x, self.start_y) + self.to_image(event.x, event.y),
+            image_size, self.ratio
+        )
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return
         
-        if w / h > target:
-            new_h = int(w / target)
-            cy = (y0 + y1) // 2
-            y0, y1 = cy - new_h // 2, cy + new_h // 2
-        else:
-            new_w = int(h * target)
-            cx = (x0 + x1) // 2
-            x0, x1 = cx - new_w // 2, cx + new_w // 2
+        self.selection = box
+        x0, y0, x1, y1 = self.to_canvas(box)
         
         self.rect = self.create_rectangle(
             x0, y0, x1, y1,
@@ -298,11 +386,151 @@ class ImageCanvas(tk.Canvas):
         
         self.dim_text = self.create_text(
             (x0 + x1) // 2, y0 - 15,
-            text=f"{abs(x1-x0)}x{abs(y1-y0)}",
+            text=f"{box[2] - box[0]}x{box[3] - box[1]}",
             fill="lime", font=("Arial", 11, "bold")
         )
     
     def on_release(self, event):
-        if self.rect:
-            x0, y0, x1, y1 = self.coords(self.rect)
-            self.on_selection((int(x0), int(y0), int(x1), int(y1)))
\ No newline at end of file
+        if self.selection:
+            self.on_selection(self.selection)
+
+class Filmstrip(tk.Canvas):
+    """
+    Faixa de miniaturas virtualizada
+    
+    Só as células visíveis existem no canvas; rolar apenas move a vista e
+    cria/remove as poucas células que entram/saem. Miniaturas chegam
+    depois (set_thumbnail) e ficam num LRU limitado de PhotoImage.
+    """
+    
+    THUMB_SIZE = 96
+    PADDING = 6
+    MAX_PHOTOS = 300
+    
+    def __init__(self, parent, on_select, on_need=None):
+        self.cell = self.THUMB_SIZE + self.PADDING
+        super().__init__(
+            parent, bg="#111111", height=self.cell + self.PADDING,
+            highlightthickness=0, xscrollincrement=1
+        )
+        
+        self.on_select = on_select
+        self.on_need = on_need   # on_need(índices) pede miniaturas que faltam
+        self.count = 0
+        self.current = None
+        self._items = {}         # índice -> ids dos itens no canvas
+        self._photos = OrderedDict()
+        self._requested = None   # faixa do último pedido de miniaturas
+        
+        self.bind("<Configure>", lambda e: self._update_visible())
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<MouseWheel>", self._on_wheel)
+        self.bind("<Shift-MouseWheel>", self._on_wheel)
+        self.bind("<Button-4>", lambda e: self.scroll_by(-self.cell))
+        self.bind("<Button-5>", lambda e: self.scroll_by(self.cell))
+    
+    def set_items(self, count):
+        """Nova lista de imagens: descarta células e miniaturas"""
+        self.delete("all")
+        self._items.clear()
+        self._photos.clear()
+        self._requested = None
+        self.count = count
+        self.current = None
+        self.configure(scrollregion=(0, 0, max(1, count * self.cell), self.cell))
+        self.xview_moveto(0)
+        self._update_visible()
+    
+    def set_current(self, index):
+        """Destaca a imagem atual e a mantém visível"""
+        previous, self.current = self.current, index
+        for i in (previous, index):
+            if i in self._items:
+                self._draw_cell(i)
+        
+        left = self.canvasx(0)
+        width = self.winfo_width()
+        x = index * self.cell
+        if x < left or x + self.cell > left + width:
+            self.xview_moveto(max(0, x - (width - self.cell) / 2) / max(1, self.count * self.cell))
+        self._update_visible()
+    
+    def set_thumbnail(self, index, image):
+        """Miniatura pronta (PIL) para a célula index"""
+        if not 0 <= index < self.count:
+            return
+        self._photos[index] = ImageTk.PhotoImage(image)
+        self._photos.move_to_end(index)
+        while len(self._photos) > self.MAX_PHOTOS:
+            self._photos.popitem(last=False)
+        if index in self._items:
+            self._draw_cell(index)
+    
+    def invalidate(self, index=None):
+        """Descarta a miniatura (imagem editada; None = todas) e pede de novo"""
+        if index is None:
+            self._photos.clear()
+        else:
+            self._photos.pop(index, None)
+        self._requested = None
+        self._update_visible()
+    
+    def scroll_by(self, pixels):
+        self.xview_scroll(int(pixels), "units")
+        self._update_visible()
+    
+    def visible_range(self):
+        left = self.canvasx(0)
+        first = max(0, int(left // self.cell))
+        last = min(self.count, int((left + self.winfo_width()) // self.cell) + 1)
+        return first, last
+    
+    def _on_wheel(self, event):
+        self.scroll_by(-self.cell if event.delta > 0 else self.cell)
+    
+    def _on_click(self, event):
+        index = int(self.canvasx(event.x) // self.cell)
+        if 0 <= index < self.count:
+            self.on_select(index)
+    
+    def _draw_cell(self, index):
+        for item in self._items.pop(index, ()):
+            self.delete(item)
+        
+        x = index * self.cell + self.PADDING // 2
+        y = self.PADDING // 2
+        size = self.THUMB_SIZE
+        outline = "lime" if index == self.current else "#333333"
+        items = [self.create_rectangle(x, y, x + size, y + size, outline=outline,
+                                       width=2, fill="#1a1a1a")]
+        photo = self._photos.get(index)
+        if photo is not None:
+            self._photos.move_to_end(index)
+            items.append(self.create_image(x + size // 2, y + size // 2, image=photo))
+        else:
+            items.append(self.create_text(x + size // 2, y + size // 2, text=str(index + 1),
+                                          fill="gray50", font=("Arial", 10)))
+        self._items[index] = items
+    
+    def _update_visible(self):
+        first, last = self.visible_range()
+        # Margem de uma tela para cada lado: rolagem curta não espera miniaturas
+        span = last - first
+        keep = range(max(0, first - span), min(self.count, last + span))
+        
+        for index in [i for i in self._items if i not in keep]:
+            for item in self._items.pop(index):
+                self.delete(item)
+        for index in range(first, last):
+            if index not in self._items:
+                self._draw_cell(index)
+        
+        # Um pedido por faixa visível: o novo substitui o anterior (pedidos
+        # abandonados são repetidos aqui se a célula continuar sem miniatura)
+        if self.on_need and self._requested != (first, last):
+            self._requested = (first, last)
+            missing = [i for i in keep if i not in self._photos]
+            if missing:
+                # Visíveis primeiro, depois as da margem
+                missing.sort(key=lambda i: (not first <= i < last, abs(i - first)))
+                self.on_need(missing)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Carregamento de imagens
+Decodificação com limite de dimensão compartilhada entre GUI e pipeline
+"""
+from PIL import Image
+
+MAX_DIMENSION = 4000
+SUPPORTED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".tif")
+
+def is_supported_image(path):
+    """Verifica se a extensão do arquivo é suportada"""
+    return str(path).lower().endswith(SUPPORTED_EXTENSIONS)
+
+def load_image(path, max_dimension=MAX_DIMENSION):
+    """
+    Decodifica imagem em RGB limitando o maior lado a max_dimension
+
+    Args:
+        path: Caminho da imagem
+        max_dimension: Maior lado permitido (None = sem limite)
+
+    Returns:
+        PIL Image RGB
+    """
+    with Image.open(path) as src:
+        if max_dimension and max(src.size) > max_dimension:
+            # JPEG: decodifica já reduzido via escala DCT (1/2, 1/4, 1/8),
+            # sem ficar abaixo do tamanho final
+            ratio = max_dimension / max(src.size)
+            src.draft("RGB", (max(1, int(src.width * ratio)), max(1, int(src.height * ratio))))
+        img = src.convert("RGB")
+
+    if max_dimension and max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    return img
@@ -4,52 +4,17 @@ Módulo de processamento de imagem
 Contém todas as operações de manipulação de imagem
 """
 import io
-from PIL import Image, ImageEnhance, ImageOps
+import numpy as np
+from PIL import Image, ImageEnhance, ImageOps, ImageStat
 
-def enforce_3x4(box, img_size):
-    """
-    Recebe box=(x0,y0,x1,y1) e img_size=(img_w,img_h),
-    primeiro clampa a box dentro da imagem e só então força
-    a proporção 3:4 centralizando.
-    """
-    x0, y0, x1, y1 = box
-    img_w, img_h = img_size
-
-    x0 = max(0, min(x0, img_w))
-    y0 = max(0, min(y0, img_h))
-    x1 = max(0, min(x1, img_w))
-    y1 = max(0, min(y1, img_h))
-
-    w, h = x1 - x0, y1 - y0
-    target = 3/4
-
-    if w / h > target:
-        new_w = int(h * target)
-        cx = (x0 + x1) // 2
-        x0 = cx - new_w // 2
-        x1 = cx + new_w // 2
-    else:
-        new_h = int(w / target)
-        cy = (y0 + y1) // 2
-        y0 = cy - new_h // 2
-        y1 = cy + new_h // 2
-        
-    x0 = max(0, min(x0, img_w))
-    y0 = max(0, min(y0, img_h))
-    x1 = max(0, min(x1, img_w))
-    y1 = max(0, min(y1, img_h))
-
-    return (int(x0), int(y0), int(x1), int(y1))
+# Reexportado: enforce_3x4 era definido aqui
+from .geometry import enforce_3x4
 
 def apply_image_enhancements(image, contrast=1.0, brightness=1.0, quality=100):
     """
     Aplica melhorias de contraste, brilho e qualidade à imagem
     """
-    if contrast != 1.0:
-        image = ImageEnhance.Contrast(image).enhance(contrast)
-    
-    if brightness != 1.0:
-        image = ImageEnhance.Brightness(image).enhance(brightness)
+    image = adjust_contrast_brightness(image, contrast, brightness)
     
     if quality < 100:
         buffer = io.BytesIO()
@@ -59,6 +24,60 @@ def apply_image_enhancements(image, contrast=1.0, brightness=1.0, quality=100):
     
     return image
 
+def gray_mean(image):
+    """
+    Média de luminância usada pelo ajuste de contraste
+
+    Calculada pelos histogramas dos canais (sem converter para "L");
+    difere no máximo 1 nível da média do ImageEnhance.
+    """
+    if image.mode not in ("RGB", "RGBA"):
+        return int(ImageStat.Stat(image.convert("L")).mean[0] + 0.5)
+    
+    hist = image.histogram()
+    pixels = image.width * image.height or 1
+    means = [
+        sum(i * count for i, count in enumerate(hist[band * 256:(band + 1) * 256])) / pixels
+        for band in range(3)
+    ]
+    return int(0.299 * means[0] + 0.587 * means[1] + 0.114 * means[2] + 0.5)
+
+def contrast_brightness_lut(contrast=1.0, brightness=1.0, mean=128):
+    """
+    Tabela de 256 entradas equivalente a Contrast seguido de Brightness
+    (mesma aritmética do Image.blend: float32, truncamento e clamp a cada etapa)
+    """
+    values = np.arange(256, dtype=np.float32)
+    if contrast != 1.0:
+        mean = np.float32(mean)
+        values = np.clip(np.trunc(mean + np.float32(contrast) * (values - mean)), 0, 255)
+    if brightness != 1.0:
+        values = np.clip(np.trunc(np.float32(brightness) * values), 0, 255)
+    return values.astype(np.uint8).tolist()
+
+def adjust_contrast_brightness(image, contrast=1.0, brightness=1.0, mean=None):
+    """
+    Contraste e brilho numa única passada por tabela (LUT)
+
+    A média de contraste pode ser fixada para que crops e cópias reduzidas
+    tenham o mesmo resultado da imagem inteira.
+    """
+    if contrast == 1.0 and brightness == 1.0:
+        return image
+    
+    if image.mode not in ("L", "RGB", "RGBA"):
+        # Modos sem tabela de 8 bits: caminho do ImageEnhance
+        return ImageEnhance.Brightness(ImageEnhance.Contrast(image).enhance(contrast)).enhance(brightness)
+    
+    if mean is None and contrast != 1.0:
+        mean = gray_mean(image)
+    
+    lut = contrast_brightness_lut(contrast, brightness, mean or 0)
+    table = lut * (3 if image.mode != "L" else 1)
+    if image.mode == "RGBA":
+        table += list(range(256))   # alfa preservado
+    return image.point(table)
+
 def resize_image(image, scale_factor):
     """
     Redimensiona a imagem com o fator de escala especificado
@@ -76,7 +95,10 @@ def add_border(image, border_width=5, border_color="black"):
 def compute_initial_scale(pil_img, canvas_width, canvas_height):
     """
     Calcula escala inicial para ajustar imagem ao canvas
+    
+    Aceita a imagem ou só o seu tamanho (largura, altura).
     """
     if canvas_width < 10 or canvas_height < 10:
         canvas_width, canvas_height = 800, 650
-    return min(canvas_width / pil_img.width, canvas_height / pil_img.height, 1.0)
+    width, height = pil_img if isinstance(pil_img, tuple) else pil_img.size
+    return min(canvas_width / width, canvas_height / height, 1.0)
@@ -7,53 +7,36 @@ import io
 from PIL import Image, ImageEnhance, ImageOps
 from typing import List, Optional
 from .cs_bridge import get_cs_bridge, is_cs_available
-
-def enforce_3x4(box, img_size):
-    """Força proporção 3:4 com clamp de limites"""
-    x0, y0, x1, y1 = box
-    img_w, img_h = img_size
-    
-    # Clamp inicial
-    x0, y0 = max(0, min(x0, img_w)), max(0, min(y0, img_h))
-    x1, y1 = max(0, min(x1, img_w)), max(0, min(y1, img_h))
-    
-    w, h = x1 - x0, y1 - y0
-    target = 3/4
-    
-    # Ajusta proporção
-    if w / h > target:
-        new_w = int(h * target)
-        cx = (x0 + x1) // 2
-        x0, x1 = cx - new_w // 2, cx + new_w // 2
-    else:
-        new_h = int(w / target)
-        cy = (y0 + y1) // 2
-        y0, y1 = cy - new_h // 2, cy + new_h // 2
-    
-    # Clamp final
-    x0, y0 = max(0, min(x0, img_w)), max(0, min(y0, img_h))
-    x1, y1 = max(0, min(x1, img_w)), max(0, min(y1, img_h))
-    
-    return (int(x0), int(y0), int(x1), int(y1))
+from .image_processing import adjust_contrast_brightness
+# Reexportado: enforce_3x4 era definido aqui
+from .geometry import enforce_3x4
 
 def apply_image_enhancements(image, contrast=1.0, brightness=1.0, quality=100, use_cs=True):
     """Aplica melhorias com fallback automático"""
     
-    # Tenta C# se disponível e imagem tem arquivo
-    if use_cs and is_cs_available() and hasattr(image, 'filename') and image.filename:
+    # Tenta C#: pixels em memória compartilhada (workers) ou arquivo de origem
+    if use_cs and is_cs_available():
         try:
             bridge = get_cs_bridge()
             brightness_offset = (brightness - 1.0) * 100
+            processed = None
             
-            result = bridge.apply_image_filters(
-                image.filename,
-                contrast=contrast,
-                brightness=brightness_offset
-            )
+            if bridge.supports_raw_transport():
+                processed = bridge.apply_image_filters_raw(
+                    image,
+                    contrast=contrast,
+                    brightness=brightness_offset
+                )
+            elif getattr(image, 'filename', None):
+                result = bridge.apply_image_filters(
+                    image.filename,
+                    contrast=contrast,
+                    brightness=brightness_offset
+                )
+                if result.get('Success'):
+                    processed = Image.open(result['OutputPath'])
             
-            if result.get('Success'):
-                processed = Image.open(result['OutputPath'])
-                
+            if processed is not None:
                 if quality < 100:
                     buffer = io.BytesIO()
                     processed.save(buffer, format='JPEG', quality=quality)
@@ -64,9 +47,8 @@ def apply_image_enhancements(image, contrast=1.0, brightness=1.0, quality=100, u
         except Exception as e:
             print(f"Fallback Python: {e}")
     
-    # Fallback Python
-    img = ImageEnhance.Contrast(image).enhance(contrast)
-    img = ImageEnhance.Brightness(img).enhance(brightness)
+    # Fallback Python: contraste e brilho numa única passada (LUT)
+    img = adjust_contrast_brightness(image, contrast, brightness)
     
     if quality < 100:
         buffer = io.BytesIO()
@@ -116,10 +98,11 @@ def add_border(image, border_width=5, border_color="black"):
     return ImageOps.expand(image, border=border_width, fill=border_color)
 
 def compute_initial_scale(img, canvas_w, canvas_h):
-    """Calcula escala inicial"""
+    """Calcula escala inicial (imagem ou tamanho)"""
     if canvas_w < 10 or canvas_h < 10:
         canvas_w, canvas_h = 800, 650
-    return min(canvas_w / img.width, canvas_h / img.height, 1.0)
+    width, height = img if isinstance(img, tuple) else img.size
+    return min(canvas_w / width, canvas_h / height, 1.0)
 
 def get_performance_info():
     """Info sobre componentes de performance"""
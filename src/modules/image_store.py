@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de imagens da sessão
+Decodifica sob demanda e respeita um orçamento de memória: imagens que
+saem da memória são re-decodificadas do arquivo quando voltam a ser usadas
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .image_loader import MAX_DIMENSION, load_image
+
+DEFAULT_BUDGET_MB = 1024
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+class _Entry:
+    __slots__ = ("path", "image", "size")
+
+    def __init__(self, path):
+        self.path = path
+        self.image = None
+        self.size = None     # tamanho decodificado do arquivo (após redução)
+
+class ImageStore:
+    """
+    Lista de imagens com decodificação preguiçosa
+
+    Indexação funciona como uma lista (store[i], del store[i]); as edições
+    ficam fora daqui (EditGraph), então cada entrada é só o arquivo e a sua
+    decodificação. Quando a memória decodificada passa do orçamento, as
+    imagens usadas há mais tempo voltam a ser só o caminho do arquivo.
+    """
+
+    def __init__(self, memory_budget_mb=DEFAULT_BUDGET_MB, max_dimension=MAX_DIMENSION):
+        self.budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_dimension = max_dimension
+        self.decodes = 0
+        self._entries = []
+        self._resident = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._prefetch_pool = None
+        self._prefetch_generation = 0
+
+    def add(self, path, size=None):
+        """
+        Registra arquivo sem decodificar (valida apenas o cabeçalho)
+
+        size: tamanho decodificado já conhecido (sessão retomada), para
+        decoded_size() não precisar decodificar
+        """
+        with Image.open(path):
+            pass
+        entry = _Entry(path)
+        entry.size = tuple(size) if size else None
+        with self._lock:
+            self._entries.append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        with self._lock:
+            entry = self._entries[index]
+            if entry.image is not None:
+                self._resident.move_to_end(entry)
+                return entry.image
+
+        image = load_image(entry.path, self.max_dimension)
+        entry.size = image.size
+
+        with self._lock:
+            self.decodes += 1
+            # Outra thread pode ter carregado enquanto decodificávamos
+            if entry.image is not None:
+                return entry.image
+            self._make_resident(entry, image)
+            return image
+
+    def __delitem__(self, index):
+        with self._lock:
+            self._drop(self._entries.pop(index))
+
+    def clear(self):
+        with self._lock:
+            self._prefetch_generation += 1
+            self._entries.clear()
+            self._resident.clear()
+            self._bytes = 0
+
+    def path(self, index):
+        return self._entries[index].path
+
+    def decoded_size(self, index):
+        """Tamanho da decodificação reduzida do arquivo original"""
+        entry = self._entries[index]
+        if entry.size is None:
+            self[index]
+        return entry.size
+
+    def known_size(self, index):
+        """Tamanho decodificado se já conhecido (nunca decodifica)"""
+        return self._entries[index].size
+
+    def loader(self, index):
+        """Função que obtém a imagem só quando chamada (para lotes)"""
+        entry = self._entries[index]
+
+        def load():
+            with self._lock:
+                position = self._entries.index(entry)
+            return self[position]
+
+        return load
+
+    def prefetch(self, indices, max_workers=None):
+        """
+        Decodifica em segundo plano enquanto houver orçamento livre
+
+        Imagens pré-carregadas nunca tiram outras da memória e entram como
+        as menos recentes. Pedidos anteriores ainda na fila são abandonados.
+        """
+        with self._lock:
+            self._prefetch_generation += 1
+            generation = self._prefetch_generation
+            if self._prefetch_pool is None:
+                self._prefetch_pool = ThreadPoolExecutor(
+                    max_workers=max_workers or min(4, os.cpu_count() or 1),
+                    thread_name_prefix="image-prefetch"
+                )
+            entries = [self._entries[i] for i in indices]
+
+        for entry in entries:
+            self._prefetch_pool.submit(self._prefetch_entry, entry, generation)
+
+    def _prefetch_entry(self, entry, generation):
+        with self._lock:
+            if (generation != self._prefetch_generation or self._bytes >= self.budget
+                    or entry.image is not None):
+                return
+
+        try:
+            image = load_image(entry.path, self.max_dimension)
+        except Exception:
+            return
+
+        with self._lock:
+            size = _image_bytes(image)
+            if (generation != self._prefetch_generation or entry.image is not None
+                    or self._bytes + size > self.budget or entry not in self._entries):
+                return
+            self.decodes += 1
+            entry.size = image.size
+            entry.image = image
+            self._resident[entry] = size
+            self._resident.move_to_end(entry, last=False)
+            self._bytes += size
+
+    def shutdown(self):
+        with self._lock:
+            self._prefetch_generation += 1
+            pool, self._prefetch_pool = self._prefetch_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "images": len(self._entries),
+                "resident": len(self._resident),
+                "bytes": self._bytes,
+                "budget": self.budget,
+                "decodes": self.decodes
+            }
+
+    def _make_resident(self, entry, image):
+        entry.image = image
+        self._resident[entry] = _image_bytes(image)
+        self._bytes += self._resident[entry]
+        self._evict()
+
+    def _drop(self, entry):
+        if entry.image is not None:
+            self._bytes -= self._resident.pop(entry)
+            entry.image = None
+
+    def _evict(self):
+        # A entrada mais recente sempre permanece
+        while self._bytes > self.budget and len(self._resident) > 1:
+            entry, size = self._resident.popitem(last=False)
+            self._bytes -= size
+            entry.image = None
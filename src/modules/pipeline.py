@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Pipeline headless para processamento 3x4 em lote (sem Tk)
+Decodifica -> crop facial -> ajustes -> borda -> codifica
+
+Uso (a partir de src/):
+    python -m modules.pipeline <pasta_entrada> <pasta_saida> [opções]
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from .encoder import encode_image
+from .face_detection import crop_face
+from .image_loader import MAX_DIMENSION, is_supported_image, load_image
+
+try:
+    from .image_processing_hybrid import apply_image_enhancements, add_border
+except ImportError:
+    from .image_processing import apply_image_enhancements, add_border
+
+_DONE = object()
+
+def iter_image_paths(input_dir, recursive=False):
+    """
+    Percorre a pasta sob demanda, sem montar a lista completa em memória
+    """
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if recursive:
+                    yield from iter_image_paths(entry.path, recursive)
+            elif entry.is_file() and is_supported_image(entry.name):
+                yield entry.path
+
+def get_output_path(path, input_dir, output_dir):
+    """Caminho de saída .jpg espelhando subpastas da entrada"""
+    rel = os.path.relpath(path, input_dir)
+    return os.path.join(output_dir, os.path.splitext(rel)[0] + ".jpg")
+
+def process_image(image, auto_crop=True, pad_ratio=1.0, contrast=1.0,
+                  brightness=1.0, border=False, border_width=5, border_color="black",
+                  detector=None):
+    """
+    Aplica crop facial, ajustes e borda a uma imagem decodificada
+
+    Returns:
+        PIL Image processada ou None se nenhuma face for detectada
+    """
+    if auto_crop:
+        image = crop_face(image, pad_ratio=pad_ratio, backend=detector)
+        if image is None:
+            return None
+
+    # Qualidade é aplicada só na codificação final
+    if contrast != 1.0 or brightness != 1.0:
+        image = apply_image_enhancements(
+            image, contrast=contrast, brightness=brightness, quality=100
+        )
+
+    if border:
+        image = add_border(image, border_width=border_width, border_color=border_color)
+
+    return image
+
+class _Stage:
+    """Estágio do pipeline: N threads consumindo de uma fila limitada"""
+
+    def __init__(self, name, func, inbox, outbox, workers=1):
+        self.name = name
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self._active = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _run(self):
+        while True:
+            job = self.inbox.get()
+            if job is _DONE:
+                # Devolve o marcador para as demais threads do estágio
+                self.inbox.put(_DONE)
+                break
+
+            if job["error"] is None and not job["skipped"]:
+                try:
+                    self.func(job)
+                except Exception as e:
+                    job["error"] = f"{self.name}: {e}"
+                    job["image"] = None
+
+            self.outbox.put(job)
+
+        with self._lock:
+            self._active -= 1
+            last = self._active == 0
+        if last:
+            self.outbox.put(_DONE)
+
+def run_pipeline(input_dir, output_dir, auto_crop=True, pad_ratio=1.0,
+                 contrast=1.0, brightness=1.0, quality=100, border=False,
+                 border_width=5, border_color="black", max_dimension=MAX_DIMENSION,
+                 workers=None, queue_size=None, recursive=False, on_progress=None,
+                 detector=None, max_bytes=None):
+    """
+    Processa todas as imagens de input_dir gravando JPEGs em output_dir
+
+    Os arquivos fluem por estágios ligados por filas limitadas, então o
+    número de imagens em memória não depende do tamanho da pasta.
+
+    Args:
+        on_progress: Callback opcional (job, stats) chamado por imagem concluída
+        max_bytes: Tamanho máximo de cada JPEG (quality vira a qualidade máxima)
+
+    Returns:
+        Dict com total, processed, failed, no_face, elapsed e images_per_second
+    """
+    workers = workers or os.cpu_count() or 1
+    queue_size = queue_size or workers * 2
+
+    paths_q = queue.Queue(maxsize=queue_size)
+    decoded_q = queue.Queue(maxsize=queue_size)
+    processed_q = queue.Queue(maxsize=queue_size)
+    done_q = queue.Queue(maxsize=queue_size)
+
+    def decode(job):
+        job["image"] = load_image(job["path"], max_dimension)
+
+    def process(job):
+        result = process_image(
+            job["image"], auto_crop=auto_crop, pad_ratio=pad_ratio,
+            contrast=contrast, brightness=brightness, border=border,
+            border_width=border_width, border_color=border_color, detector=detector
+        )
+        if result is None:
+            job["skipped"] = True
+        job["image"] = result
+
+    def encode(job):
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+        encode_image(job["image"], job["output"], "JPEG", quality, max_bytes)
+        job["image"] = None
+
+    stages = [
+        _Stage("decode", decode, paths_q, decoded_q, workers=min(workers, 4)),
+        _Stage("process", process, decoded_q, processed_q, workers=workers),
+        _Stage("encode", encode, processed_q, done_q, workers=max(1, workers // 2)),
+    ]
+
+    def produce():
+        try:
+            for path in iter_image_paths(input_dir, recursive):
+                paths_q.put({
+                    "path": path,
+                    "output": get_output_path(path, input_dir, output_dir),
+                    "image": None,
+                    "error": None,
+                    "skipped": False
+                })
+        finally:
+            paths_q.put(_DONE)
+
+    stats = {"total": 0, "processed": 0, "failed": 0, "no_face": 0,
+             "elapsed": 0.0, "images_per_second": 0.0, "errors": []}
+
+    start = time.perf_counter()
+    for stage in stages:
+        stage.start()
+    threading.Thread(target=produce, name="produce", daemon=True).start()
+
+    while True:
+        job = done_q.get()
+        if job is _DONE:
+            break
+
+        stats["total"] += 1
+        if job["error"]:
+            stats["failed"] += 1
+            stats["errors"].append((job["path"], job["error"]))
+        elif job["skipped"]:
+            stats["no_face"] += 1
+        else:
+            stats["processed"] += 1
+
+        stats["elapsed"] = time.perf_counter() - start
+        stats["images_per_second"] = stats["total"] / stats["elapsed"] if stats["elapsed"] else 0.0
+
+        if on_progress:
+            on_progress(job, stats)
+
+    stats["elapsed"] = time.perf_counter() - start
+    stats["images_per_second"] = stats["total"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
+
+def _print_progress(job, stats):
+    if job["error"]:
+        print(f"✗ {job['path']}: {job['error']}")
+    elif job["skipped"]:
+        print(f"! {job['path']}: nenhuma face detectada")
+
+    if stats["total"] % 50 == 0:
+        print(f"  {stats['total']} imagens | {stats['images_per_second']:.1f} img/s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m modules.pipeline",
+        description="Processamento 3x4 em lote sem interface gráfica"
+    )
+    parser.add_argument("input_dir", help="Pasta com as imagens de entrada")
+    parser.add_argument("output_dir", help="Pasta de saída (JPEG)")
+    parser.add_argument("--no-auto-crop", action="store_true", help="Não recorta pela face")
+    parser.add_argument("--pad-ratio", type=float, default=1.0)
+    parser.add_argument("--contrast", type=float, default=1.0)
+    parser.add_argument("--brightness", type=float, default=1.0)
+    parser.add_argument("--quality", type=int, default=100)
+    parser.add_argument("--max-kb", type=int, default=None,
+                        help="Tamanho máximo de cada JPEG em KB (reduz qualidade/resolução)")
+    parser.add_argument("--border", action="store_true", help="Adiciona borda")
+    parser.add_argument("--border-width", type=int, default=5)
+    parser.add_argument("--border-color", default="black")
+    parser.add_argument("--max-dimension", type=int, default=MAX_DIMENSION)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--queue-size", type=int, default=None)
+    parser.add_argument("--recursive", action="store_true", help="Inclui subpastas")
+    parser.add_argument("--detector", default=None, help="Detector facial: haar (padrão) ou yunet")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"Pasta não encontrada: {args.input_dir}")
+
+    stats = run_pipeline(
+        args.input_dir, args.output_dir,
+        auto_crop=not args.no_auto_crop, pad_ratio=args.pad_ratio,
+        contrast=args.contrast, brightness=args.brightness, quality=args.quality,
+        border=args.border, border_width=args.border_width,
+        border_color=args.border_color, max_dimension=args.max_dimension,
+        workers=args.workers, queue_size=args.queue_size,
+        recursive=args.recursive, on_progress=_print_progress, detector=args.detector,
+        max_bytes=args.max_kb * 1024 if args.max_kb else None
+    )
+
+    print(
+        f"✓ {stats['processed']} processadas | {stats['no_face']} sem face | "
+        f"{stats['failed']} erros | {stats['elapsed']:.1f}s | "
+        f"{stats['images_per_second']:.1f} img/s"
+    )
+    return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Cache de pirâmide de resolução para o preview
+Cada imagem ganha níveis 1/2, 1/4, ... construídos uma única vez; o preview
+reamostra apenas a partir do nível mais próximo da escala de exibição
+"""
+import threading
+import weakref
+from collections import OrderedDict
+
+from PIL import Image
+
+MIN_LEVEL_SIZE = 128
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+class ProxyPyramid:
+    """Níveis reduzidos de uma imagem (o nível 0 é a própria imagem)"""
+
+    def __init__(self, image, min_size=MIN_LEVEL_SIZE):
+        self._base = weakref.ref(image)
+        self.size = image.size
+        self.levels = []
+        self._last = None
+
+        level = image
+        while min(level.size) // 2 >= min_size:
+            level = level.reduce(2)
+            self.levels.append(level)
+
+    @property
+    def base(self):
+        return self._base()
+
+    @property
+    def nbytes(self):
+        return sum(_image_bytes(level) for level in self.levels)
+
+    def _level(self, scale):
+        """Menor nível que ainda tem resolução >= escala pedida, e seu fator"""
+        chosen, chosen_factor = self.base, 1
+        factor = 1
+        for level in self.levels:
+            factor *= 2
+            if 1.0 / factor < scale:
+                break
+            chosen, chosen_factor = level, factor
+        return chosen, chosen_factor
+
+    def level_for(self, scale):
+        return self._level(scale)[0]
+
+    def display(self, scale, box=None):
+        """
+        Imagem em tamanho de exibição (memoriza o último pedido)
+
+        box recorta uma região em coordenadas da imagem base antes de escalar.
+        """
+        if self._last is not None and self._last[0] == (scale, box):
+            return self._last[1]
+
+        region = box or (0, 0) + self.size
+        nw = max(1, int((region[2] - region[0]) * scale))
+        nh = max(1, int((region[3] - region[1]) * scale))
+        source, factor = self._level(scale)
+        level_box = tuple(v / factor for v in region)
+
+        if source.size == (nw, nh) and box is None:
+            result = source
+        else:
+            result = source.resize((nw, nh), Image.LANCZOS, box=level_box)
+
+        self._last = ((scale, box), result)
+        return result
+
+class PreviewCache:
+    """
+    Pirâmides por imagem com limite de memória (LRU)
+
+    A chave é a identidade do objeto imagem: edições produzem objetos novos,
+    então entradas antigas deixam de casar e são descartadas.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, min_size=MIN_LEVEL_SIZE):
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, image):
+        """Retorna (ou constrói) a pirâmide da imagem"""
+        key = id(image)
+        with self._lock:
+            pyramid = self._entries.get(key)
+            if pyramid is not None and pyramid.base is image:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pyramid
+            if pyramid is not None:
+                self._remove(key)
+            self.misses += 1
+
+        pyramid = ProxyPyramid(image, self.min_size)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = pyramid
+            self._bytes += pyramid.nbytes
+            self._evict()
+        return pyramid
+
+    def display(self, image, scale, box=None):
+        """Imagem reamostrada para a escala de exibição"""
+        return self.get(image).display(scale, box)
+
+    def invalidate(self, image):
+        with self._lock:
+            pyramid = self._entries.get(id(image))
+            if pyramid is not None and pyramid.base is image:
+                self._remove(id(image))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        pyramid = self._entries.pop(key)
+        self._bytes -= pyramid.nbytes
+
+    def _evict(self):
+        # Primeiro as entradas cuja imagem já foi liberada
+        for key in [k for k, p in self._entries.items() if p.base is None]:
+            self._remove(key)
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
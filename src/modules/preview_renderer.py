@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Preview ao vivo dos ajustes
+Renderiza contraste/brilho/qualidade sobre a cópia em tamanho de exibição
+numa thread separada, descartando renders desatualizados
+"""
+import threading
+
+from .image_processing import apply_image_enhancements
+
+def render_adjustments(proxy, contrast=1.0, brightness=1.0, quality=100):
+    """Aplica os ajustes sobre a cópia de exibição"""
+    if contrast == 1.0 and brightness == 1.0 and quality >= 100:
+        return proxy
+    return apply_image_enhancements(
+        proxy, contrast=contrast, brightness=brightness, quality=quality
+    )
+
+class PreviewRenderer:
+    """
+    Worker de preview com semântica "último vence"
+
+    Cada request substitui o anterior ainda não iniciado; resultados de
+    gerações antigas são descartados em vez de entregues. on_result é
+    chamado na thread do worker com (geração, imagem); se o render atual
+    falha, on_error recebe (geração, exceção) e o worker segue ativo.
+    """
+
+    def __init__(self, on_result, render_func=render_adjustments, on_error=None):
+        self.on_result = on_result
+        self.on_error = on_error
+        self.render_func = render_func
+        self.generation = 0
+        self.rendered = 0
+        self.dropped = 0
+        self._job = None
+        self._busy = False
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="preview-renderer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Há render aguardando ou em andamento"""
+        with self._cond:
+            return self._job is not None or self._busy
+
+    def request(self, proxy, **params):
+        """Agenda render; retorna a geração associada"""
+        with self._cond:
+            self.generation += 1
+            if self._job is not None:
+                self.dropped += 1
+            self._job = (self.generation, proxy, params)
+            self._cond.notify()
+            return self.generation
+
+    def cancel(self):
+        """Invalida renders pendentes e em andamento"""
+        with self._cond:
+            self.generation += 1
+            self._job = None
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._job = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                generation, proxy, params = self._job
+                self._job = None
+                self._busy = True
+
+            error = None
+            try:
+                result = self.render_func(proxy, **params)
+            except Exception as e:
+                error, result = e, None
+
+            with self._cond:
+                current = generation == self.generation
+                if current:
+                    self.rendered += 1
+                else:
+                    self.dropped += 1
+
+            if current and error is not None:
+                if self.on_error:
+                    self.on_error(generation, error)
+                else:
+                    print(f"Erro no preview: {error}")
+            elif current and result is not None:
+                self.on_result(generation, result)
+
+            # Só libera depois de entregar, para quem consulta "pending"
+            with self._cond:
+                self._busy = False
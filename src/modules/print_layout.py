@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Folhas de impressão
+Distribui várias fotos 3x4 (ou 5x7, 35x45) em páginas A4/10x15 no DPI
+escolhido, com marcas de corte, gravando PDF ou TIFF de várias páginas
+uma página por vez
+"""
+import os
+
+from PIL import Image, ImageDraw, TiffImagePlugin
+
+from .encoder import atomic_output
+from .geometry import DEFAULT_RATIO
+from .image_processing import add_border
+
+# Tamanhos em milímetros (largura, altura), retrato
+PAPER_SIZES = {
+    "A4": (210, 297),
+    "10x15": (100, 150),
+}
+PHOTO_SIZES = {
+    "3x4": (30, 40),
+    "5x7": (50, 70),
+    "35x45": (35, 45),
+}
+DEFAULT_PAPER = "A4"
+DEFAULT_DPI = 300
+
+def mm_to_px(mm, dpi):
+    return int(round(mm * dpi / 25.4))
+
+class SheetLayout:
+    """
+    Grade de fotos de uma página, em pixels no DPI pedido
+
+    A orientação "auto" escolhe entre retrato e paisagem a que comporta
+    mais fotos. A grade fica centralizada na área útil.
+    """
+
+    def __init__(self, paper=DEFAULT_PAPER, photo=DEFAULT_RATIO, dpi=DEFAULT_DPI,
+                 margin_mm=5, gap_mm=2, orientation="auto"):
+        self.paper = paper
+        self.photo = photo
+        self.dpi = dpi
+
+        paper_w, paper_h = PAPER_SIZES[paper]
+        photo_w, photo_h = PHOTO_SIZES[photo]
+
+        def grid(page_w, page_h):
+            cols = int((page_w - 2 * margin_mm + gap_mm) // (photo_w + gap_mm))
+            rows = int((page_h - 2 * margin_mm + gap_mm) // (photo_h + gap_mm))
+            return max(0, cols), max(0, rows)
+
+        options = {"portrait": (paper_w, paper_h), "landscape": (paper_h, paper_w)}
+        if orientation == "auto":
+            orientation = max(options, key=lambda o: grid(*options[o])[0] * grid(*options[o])[1])
+        page_w, page_h = options[orientation]
+        self.orientation = orientation
+
+        self.cols, self.rows = grid(page_w, page_h)
+        if self.cols == 0 or self.rows == 0:
+            raise ValueError(f"Foto {photo} não cabe no papel {paper}")
+
+        self.page_size = (mm_to_px(page_w, dpi), mm_to_px(page_h, dpi))
+        self.photo_size = (mm_to_px(photo_w, dpi), mm_to_px(photo_h, dpi))
+        self.margin = mm_to_px(margin_mm, dpi)
+        self.gap = mm_to_px(gap_mm, dpi)
+
+        grid_w = self.cols * self.photo_size[0] + (self.cols - 1) * self.gap
+        grid_h = self.rows * self.photo_size[1] + (self.rows - 1) * self.gap
+        self.origin = ((self.page_size[0] - grid_w) // 2, (self.page_size[1] - grid_h) // 2)
+
+    @property
+    def per_page(self):
+        return self.cols * self.rows
+
+    def pages(self, count):
+        return -(-count // self.per_page)
+
+    def cell(self, row, col):
+        """Canto superior esquerdo da foto (linha, coluna)"""
+        return (
+            self.origin[0] + col * (self.photo_size[0] + self.gap),
+            self.origin[1] + row * (self.photo_size[1] + self.gap)
+        )
+
+    def cut_lines(self):
+        """Posições x e y das bordas das fotos (onde cortar)"""
+        xs, ys = [], []
+        for col in range(self.cols):
+            x = self.cell(0, col)[0]
+            xs += [x, x + self.photo_size[0]]
+        for row in range(self.rows):
+            y = self.cell(row, 0)[1]
+            ys += [y, y + self.photo_size[1]]
+        return sorted(set(xs)), sorted(set(ys))
+
+def _load(item, size):
+    if callable(item):
+        item = item()
+    if isinstance(item, (str, os.PathLike)):
+        with Image.open(item) as img:
+            # JPEG: decodifica já reduzido para perto do tamanho da célula
+            img.draft("RGB", size)
+            return img.convert("RGB")
+    return item
+
+def fit_photo(image, layout, border=False, border_color="black"):
+    """Foto no tamanho exato da célula (corte central se a proporção diferir)"""
+    size = layout.photo_size
+    border_width = max(1, mm_to_px(0.4, layout.dpi)) if border else 0
+    inner = (size[0] - 2 * border_width, size[1] - 2 * border_width)
+
+    # Corte central na proporção da célula e redução num único resize
+    image = image.convert("RGB")
+    scale = min(image.width / inner[0], image.height / inner[1])
+    # Arredondamento em float pode deixar a box um pouco fora da imagem
+    crop_w = min(image.width, inner[0] * scale)
+    crop_h = min(image.height, inner[1] * scale)
+    x0 = max(0.0, (image.width - crop_w) / 2)
+    y0 = max(0.0, (image.height - crop_h) / 2)
+    photo = image.resize(inner, Image.LANCZOS, box=(x0, y0, x0 + crop_w, y0 + crop_h),
+                         reducing_gap=2.0)
+    if border:
+        photo = add_border(photo, border_width=border_width, border_color=border_color)
+    return photo
+
+def _draw_cut_marks(page, layout):
+    # Marcas só nas margens, alinhadas às bordas das fotos: não invadem as fotos
+    draw = ImageDraw.Draw(page)
+    width = max(1, layout.dpi // 150)
+    clearance = mm_to_px(1, layout.dpi)
+    page_w, page_h = layout.page_size
+    grid_x0, grid_y0 = layout.origin
+    grid_x1 = page_w - grid_x0
+    grid_y1 = page_h - grid_y0
+    xs, ys = layout.cut_lines()
+
+    for x in xs:
+        if grid_y0 - clearance > 0:
+            draw.line([(x, 0), (x, grid_y0 - clearance)], fill="black", width=width)
+            draw.line([(x, grid_y1 + clearance), (x, page_h)], fill="black", width=width)
+    for y in ys:
+        if grid_x0 - clearance > 0:
+            draw.line([(0, y), (grid_x0 - clearance, y)], fill="black", width=width)
+            draw.line([(grid_x1 + clearance, y), (page_w, y)], fill="black", width=width)
+
+def compose_pages(items, layout, border=False, border_color="black", cut_marks=True,
+                  on_progress=None):
+    """
+    Gera as páginas uma a uma
+
+    Cada página é alocada uma vez e preenchida linha a linha com paste;
+    cada foto é carregada só quando a sua linha é montada e descartada
+    depois de reduzida ao tamanho da célula.
+
+    Args:
+        items: Sequência de PIL Images, caminhos ou funções que retornam a imagem
+        on_progress: Callback opcional (fotos concluídas, total)
+    """
+    items = list(items)
+    total = len(items)
+    done = 0
+
+    for start in range(0, total, layout.per_page):
+        page = Image.new("RGB", layout.page_size, "white")
+        page_items = items[start:start + layout.per_page]
+
+        for row in range(layout.rows):
+            row_items = page_items[row * layout.cols:(row + 1) * layout.cols]
+            if not row_items:
+                break
+            for col, item in enumerate(row_items):
+                photo = fit_photo(_load(item, layout.photo_size), layout, border, border_color)
+                page.paste(photo, layout.cell(row, col))
+                done += 1
+                if on_progress:
+                    on_progress(done, total)
+
+        if cut_marks:
+            _draw_cut_marks(page, layout)
+        yield page
+
+def save_sheets(items, output_path, layout=None, border=False, border_color="black",
+                cut_marks=True, on_progress=None):
+    """
+    Grava as folhas em PDF ou TIFF de várias páginas
+
+    Cada página é anexada ao arquivo assim que fica pronta (PDF com
+    append=True, TIFF com AppendingTiffWriter), então só uma página fica
+    em memória. O arquivo final só aparece quando todas foram gravadas.
+
+    Returns:
+        Número de páginas
+    """
+    layout = layout or SheetLayout()
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext not in (".pdf", ".tif", ".tiff"):
+        raise ValueError(f"Formato de folha não suportado: {ext} (use PDF ou TIFF)")
+    items = list(items)
+    if not items:
+        raise ValueError("Nenhuma foto para a folha")
+
+    pages = compose_pages(items, layout, border, border_color, cut_marks, on_progress)
+    count = 0
+
+    with atomic_output(output_path) as tmp:
+        if ext == ".pdf":
+            for page in pages:
+                page.save(tmp, "PDF", resolution=layout.dpi, append=count > 0)
+                count += 1
+        else:
+            with TiffImagePlugin.AppendingTiffWriter(tmp, True) as tiff:
+                for page in pages:
+                    page.save(tiff, "TIFF", dpi=(layout.dpi, layout.dpi),
+                              compression="tiff_deflate")
+                    tiff.newFrame()
+                    count += 1
+
+    return count
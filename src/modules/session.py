@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Sessão de trabalho
+Manifesto em disco com os arquivos abertos, suas impressões digitais e a
+lista de edições de cada um, para retomar o trabalho depois de fechar
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .edit_graph import EditGraph
+from .encoder import atomic_output
+from .fingerprint import file_fingerprint, file_signature
+
+SESSION_FILE = Path.home() / ".editor_fotos_3x4" / "session.json"
+SESSION_VERSION = 1
+
+def ops_to_json(graph):
+    """Operações do EditGraph em listas serializáveis"""
+    return [[op[0], list(op[1])] if op[0] == "crop" else list(op) for op in graph.ops]
+
+def graph_from_json(ops):
+    """Reconstrói o EditGraph sem tocar nos pixels"""
+    return EditGraph(
+        ("crop", tuple(int(v) for v in op[1])) if op[0] == "crop" else tuple(op)
+        for op in ops
+    )
+
+def build_manifest(paths, graphs, sizes, zoom_memory, current_index, max_dimension):
+    """
+    Fotografia do estado da sessão (chamada na thread do Tk; barata)
+
+    sizes: tamanho decodificado de cada imagem (None se ainda não lido);
+    os crops estão nessas coordenadas.
+    """
+    return {
+        "version": SESSION_VERSION,
+        "current_index": current_index,
+        "max_dimension": max_dimension,
+        "images": [
+            {
+                "path": os.path.abspath(path),
+                "ops": ops_to_json(graph),
+                "size": list(size) if size else None,
+                "zoom": zoom_memory.get(index)
+            }
+            for index, (path, graph, size) in enumerate(zip(paths, graphs, sizes))
+        ]
+    }
+
+def _add_fingerprints(manifest):
+    # Assinatura (stat) para todos; hash do conteúdo só para imagens com
+    # edições, as únicas que precisam ser validadas ao retomar
+    for entry in manifest["images"]:
+        try:
+            entry["signature"] = list(file_signature(entry["path"]))
+            entry["fingerprint"] = file_fingerprint(entry["path"]) if entry["ops"] else None
+        except OSError:
+            entry["signature"] = entry["fingerprint"] = None
+    return manifest
+
+def restore_entries(manifest, max_dimension):
+    """
+    Entradas utilizáveis do manifesto
+
+    Arquivos ausentes são descartados. Se o arquivo mudou (assinatura e
+    hash diferentes) ou a redução na abertura mudou, as edições daquele
+    arquivo são descartadas: os crops não valeriam mais.
+
+    Returns:
+        Lista de dicts com path, graph, size, zoom e status ("ok" ou "changed")
+    """
+    same_dimension = manifest.get("max_dimension") == max_dimension
+    entries = []
+
+    for item in manifest.get("images", []):
+        path = item["path"]
+        try:
+            signature = list(file_signature(path))
+        except OSError:
+            continue
+
+        valid = same_dimension and (
+            signature == item.get("signature")
+            or (item.get("fingerprint") and file_fingerprint(path) == item["fingerprint"])
+        )
+        if valid or not item.get("ops"):
+            entries.append({
+                "path": path, "graph": graph_from_json(item.get("ops", [])),
+                "size": tuple(item["size"]) if valid and item.get("size") else None,
+                "zoom": item.get("zoom"), "status": "ok"
+            })
+        else:
+            entries.append({
+                "path": path, "graph": EditGraph(), "size": None,
+                "zoom": None, "status": "changed"
+            })
+
+    return entries
+
+class SessionStore:
+    """
+    Grava o manifesto em JSON (arquivo temporário + rename)
+
+    save_async grava numa única thread: o hash dos arquivos editados pode
+    levar alguns segundos na primeira vez (depois fica memorizado).
+    Gravações pendentes são substituídas pela mais recente.
+    """
+
+    def __init__(self, session_file=SESSION_FILE):
+        self.session_file = Path(session_file)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session")
+        self._lock = threading.Lock()
+        self._latest = 0
+
+    def load(self):
+        """Manifesto salvo ou None"""
+        try:
+            with open(self.session_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception:
+            return None
+        if manifest.get("version") != SESSION_VERSION:
+            return None
+        return manifest
+
+    def save(self, manifest):
+        data = json.dumps(_add_fingerprints(manifest))
+        try:
+            self.session_file.parent.mkdir(parents=True, exist_ok=True)
+            with atomic_output(self.session_file) as tmp:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(data)
+        except Exception as e:
+            print(f"Erro ao salvar sessão: {e}")
+
+    def save_async(self, manifest):
+        with self._lock:
+            self._latest += 1
+            ticket = self._latest
+
+        def job():
+            if ticket == self._latest:
+                self.save(manifest)
+
+        return self._pool.submit(job)
+
+    def clear(self):
+        try:
+            self.session_file.unlink()
+        except OSError:
+            pass
+
+    def close(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Transporte binário de pixels via memória compartilhada
+Entrega o buffer da imagem ao worker C# sem arquivos temporários
+
+O cabeçalho enviado no JSON descreve o buffer:
+    {"Shm": nome, "Width": w, "Height": h, "Stride": bytes_por_linha, "Format": "RGB24"}
+"""
+from multiprocessing import shared_memory
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+_FORMATS = {"RGB": ("RGB24", 3), "RGBA": ("RGBA32", 4)}
+
+def image_to_shared(image: Image.Image) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copia os pixels para um bloco de memória compartilhada
+
+    Returns:
+        (bloco, cabeçalho) - o chamador deve chamar release_shared(bloco)
+    """
+    if image.mode not in _FORMATS:
+        image = image.convert("RGB")
+
+    fmt, channels = _FORMATS[image.mode]
+    width, height = image.size
+    stride = width * channels
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, stride * height))
+    try:
+        view = np.ndarray((height, width, channels), dtype=np.uint8, buffer=shm.buf)
+        view[...] = np.asarray(image)
+        del view
+    except Exception:
+        release_shared(shm)
+        raise
+
+    header = {
+        "Shm": shm.name, "Width": width, "Height": height,
+        "Stride": stride, "Format": fmt
+    }
+    return shm, header
+
+def image_from_shared(shm: shared_memory.SharedMemory, header: Dict[str, Any]) -> Image.Image:
+    """Cria PIL Image a partir do bloco (copia os pixels para fora dele)"""
+    channels = 4 if header["Format"] == "RGBA32" else 3
+    width, height, stride = header["Width"], header["Height"], header["Stride"]
+
+    view = np.ndarray((height, stride), dtype=np.uint8, buffer=shm.buf)
+    pixels = view[:, :width * channels].reshape(height, width, channels).copy()
+    # Solta a referência ao buffer antes que o bloco seja fechado
+    del view
+
+    return Image.fromarray(pixels)
+
+def release_shared(shm: shared_memory.SharedMemory):
+    """Fecha e remove o bloco"""
+    shm.close()
+    try:
+        shm.unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Índice de miniaturas
+Miniaturas JPEG guardadas em SQLite por (caminho, assinatura do arquivo):
+reabrir uma pasta mostra as miniaturas sem decodificar os originais
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from .fingerprint import file_signature
+
+THUMBNAIL_DB = Path.home() / ".editor_fotos_3x4" / "thumbnails.db"
+THUMBNAIL_SIZE = 160
+MAX_ENTRIES = 20000
+TOUCH_BATCH = 64
+
+class ThumbnailCache:
+    """
+    Miniaturas persistentes
+
+    Entradas são invalidadas quando a assinatura (mtime, tamanho, inode)
+    do arquivo muda; acima de max_entries saem as usadas há mais tempo
+    (o uso é gravado em lotes). Geração usa draft do JPEG (decodificação em 1/2, 1/4
+    ou 1/8 da resolução), bem mais barata que abrir o original inteiro.
+    """
+
+    def __init__(self, db_path=THUMBNAIL_DB, size=THUMBNAIL_SIZE, max_entries=MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.size = size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._warm_pool = None
+        self._generation = 0
+        self._touched = {}       # caminho -> último uso ainda não gravado
+
+    def _connect(self):
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS thumbnails ("
+                "path TEXT PRIMARY KEY, signature TEXT, size INTEGER, "
+                "width INTEGER, height INTEGER, data BLOB, used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS thumbnails_used ON thumbnails(used)")
+        return self._conn
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path), json.dumps(file_signature(path))
+
+    def get(self, path):
+        """Miniatura em cache ou None (arquivo alterado ou nunca visto)"""
+        try:
+            key, signature = self._key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM thumbnails WHERE path = ? AND signature = ? AND size = ?",
+                (key, signature, self.size)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+
+        image = Image.open(io.BytesIO(row[0]))
+        image.load()
+        return image
+
+    def _flush_touched(self):
+        # Chamado com o lock
+        if self._touched and self._conn is not None:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE thumbnails SET used = ? WHERE path = ?",
+                    [(used, key) for key, used in self._touched.items()]
+                )
+        self._touched.clear()
+
+    def put(self, path, image):
+        """Guarda a miniatura de image (reduzida aqui se necessário)"""
+        key, signature = self._key(path)
+        thumb = image.convert("RGB")
+        if max(thumb.size) > self.size:
+            thumb.thumbnail((self.size, self.size), Image.BILINEAR)
+
+        buffer = io.BytesIO()
+        thumb.save(buffer, "JPEG", quality=85)
+
+        with self._lock:
+            conn = self._connect()
+            self._touched.pop(key, None)
+            self._flush_touched()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, signature, self.size, thumb.width, thumb.height,
+                     buffer.getvalue(), time.time())
+                )
+                count = conn.execute("SELECT COUNT(*) FROM thumbnails").fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM thumbnails WHERE path IN ("
+                        "SELECT path FROM thumbnails ORDER BY used LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        return thumb
+
+    def generate(self, path):
+        """Decodifica reduzido (draft) e guarda a miniatura"""
+        with Image.open(path) as img:
+            img.draft("RGB", (self.size, self.size))
+            thumb = img.convert("RGB")
+        thumb.thumbnail((self.size, self.size), Image.BILINEAR)
+        with self._lock:
+            self.generated += 1
+        return self.put(path, thumb)
+
+    def get_or_create(self, path):
+        return self.get(path) or self.generate(path)
+
+    def ensure(self, paths, on_ready=None, max_workers=None):
+        """
+        Gera em segundo plano as miniaturas que faltam
+
+        on_ready(path, miniatura) é chamado fora da thread do Tk. Pedidos
+        anteriores ainda na fila são abandonados.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=max_workers or min(4, os.cpu_count() or 1),
+                    thread_name_prefix="thumbnails"
+                )
+
+        def job(path):
+            if generation != self._generation:
+                return
+            try:
+                thumb = self.get_or_create(path)
+            except Exception:
+                return
+            if on_ready:
+                on_ready(path, thumb)
+
+        for path in paths:
+            self._pool.submit(job, path)
+
+    def warm(self, paths):
+        """
+        Gera em segundo plano (uma thread, baixa prioridade) as miniaturas
+        de todos os arquivos, para a próxima abertura vir toda do disco
+
+        Independente de ensure: pedidos da faixa visível não esperam nesta
+        fila, e um novo ensure não cancela o aquecimento.
+        """
+        with self._lock:
+            if self._warm_pool is None:
+                self._warm_pool = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="thumbnails-warm"
+                )
+            pool = self._warm_pool
+
+        def job(path):
+            try:
+                self.get_or_create(path)
+            except Exception:
+                pass
+
+        return [pool.submit(job, path) for path in paths]
+
+    def stats(self):
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM thumbnails").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses,
+                "generated": self.generated}
+
+    def close(self):
+        with self._lock:
+            self._generation += 1
+            pools = [self._pool, self._warm_pool]
+            self._pool = self._warm_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touched()
+                self._conn.close()
+                self._conn = None
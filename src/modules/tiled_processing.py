@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Processamento em faixas a partir da resolução total
+Recorta a região pedida direto do arquivo original e aplica os ajustes
+faixa a faixa, sem montar a imagem inteira na memória quando o formato
+permite leitura parcial (BMP e TIFF sem compressão); PNG decodifica só
+até a última linha do crop e JPEG usa a escala DCT quando o crop pode
+sair reduzido
+"""
+import math
+import threading
+
+from PIL import Image
+
+from .image_processing import adjust_contrast_brightness
+
+TILE_ROWS = 256
+_BAND_MODES = ("L", "RGB", "RGBA")
+
+# Renders que decodificam o original inteiro ao mesmo tempo (lotes)
+MAX_FULL_RESOLUTION_RENDERS = 2
+_full_resolution_slots = threading.BoundedSemaphore(MAX_FULL_RESOLUTION_RENDERS)
+
+def source_size(path):
+    """Tamanho do arquivo em resolução total (lê só o cabeçalho)"""
+    with Image.open(path) as img:
+        return img.size
+
+def scale_box(box, from_size, to_size):
+    """Converte box entre duas resoluções da mesma imagem"""
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    x0, y0, x1, y1 = box
+    return (
+        max(0, int(round(x0 * sx))), max(0, int(round(y0 * sy))),
+        min(to_size[0], int(round(x1 * sx))), min(to_size[1], int(round(y1 * sy)))
+    )
+
+def _raw_layout(img):
+    """
+    (offset, rawmode, stride, orientação) se os pixels estão gravados sem
+    compressão num único bloco; None caso contrário
+    """
+    if len(img.tile) != 1 or img.mode not in _BAND_MODES:
+        return None
+
+    tile = img.tile[0]
+    codec, extents, offset, args = tile[0], tile[1], tile[2], tile[3]
+    if codec != "raw" or tuple(extents) != (0, 0) + img.size:
+        return None
+
+    if isinstance(args, str):
+        args = (args, 0, 1)
+    rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+    if ";" in rawmode:
+        return None
+
+    try:
+        pixel_bytes = len(Image.new(img.mode, (1, 1)).tobytes("raw", rawmode))
+    except Exception:
+        return None
+
+    return offset, rawmode, stride or img.width * pixel_bytes, orientation or 1
+
+def _iter_raw_bands(path, img, layout, box, tile_rows):
+    offset, rawmode, stride, orientation = layout
+    x0, y0, x1, y1 = box
+
+    with open(path, "rb") as f:
+        for top in range(y0, y1, tile_rows):
+            bottom = min(top + tile_rows, y1)
+            rows = bottom - top
+            # Orientação -1 (BMP): linhas gravadas de baixo para cima
+            first = top if orientation > 0 else img.height - bottom
+            f.seek(offset + first * stride)
+            data = f.read(rows * stride)
+            band = Image.frombytes(img.mode, (img.width, rows), data, "raw",
+                                   rawmode, stride, orientation)
+            yield top - y0, band.crop((x0, 0, x1, rows))
+
+def _limit_rows(img, rows):
+    """
+    PNG não entrelaçado é decodificado de cima para baixo: encurtar a
+    imagem faz o decoder parar na última linha pedida
+    """
+    if len(img.tile) != 1 or img.tile[0][0] != "zip" or img.info.get("interlace"):
+        return
+    tile = img.tile[0]
+    img._size = (img.width, rows)
+    img.tile = [(tile[0], (0, 0, img.width, rows)) + tuple(tile[2:])]
+
+def _decode_region(img, box, max_side=None):
+    """
+    Região box decodificada no modo do arquivo
+
+    JPEG com crop maior que max_side decodifica na menor escala DCT (1/2,
+    1/4, 1/8) que ainda deixa o crop com max_side; a box é convertida
+    para essa escala. Retorna (região, escala).
+    """
+    x0, y0, x1, y1 = box
+    scale = 1.0
+    longest = max(x1 - x0, y1 - y0)
+
+    if img.format == "JPEG" and max_side and longest > max_side:
+        ratio = max_side / longest
+        full_size = img.size
+        img.draft(img.mode if img.mode in _BAND_MODES else "RGB",
+                  (math.ceil(img.width * ratio), math.ceil(img.height * ratio)))
+        scale = img.width / full_size[0]
+        box = scale_box(box, full_size, img.size)
+    else:
+        _limit_rows(img, y1)
+
+    # Corta antes de converter: a conversão só copia a região
+    return img.crop(box), scale
+
+def _iter_decoded_bands(region, tile_rows):
+    for top in range(0, region.height, tile_rows):
+        yield top, region.crop((0, top, region.width, min(top + tile_rows, region.height)))
+
+def read_region(path, box, enhancements=(), tile_rows=TILE_ROWS, max_side=None):
+    """
+    Lê box (coordenadas da resolução total) do arquivo em RGB
+
+    Args:
+        path: Caminho da imagem
+        box: (x0, y0, x1, y1) na resolução total
+        enhancements: Sequência de (contraste, brilho, média) aplicada por faixa
+        tile_rows: Altura das faixas
+        max_side: Maior lado do resultado (None = resolução total)
+
+    Returns:
+        PIL Image RGB do tamanho do box (ou reduzida a max_side)
+    """
+    with Image.open(path) as img:
+        x0, y0, x1, y1 = box
+        box = (max(0, x0), max(0, y0), min(img.width, x1), min(img.height, y1))
+
+        layout = _raw_layout(img)
+        if layout is not None:
+            size = (box[2] - box[0], box[3] - box[1])
+            bands = _iter_raw_bands(path, img, layout, box, tile_rows)
+        else:
+            region, _ = _decode_region(img, box, max_side)
+            size = region.size
+            bands = _iter_decoded_bands(region, tile_rows)
+
+        output = Image.new("RGB", size)
+
+        for top, band in bands:
+            band = band.convert("RGB")
+            # Ajustes com média fixada são pontuais: faixa a faixa = imagem inteira
+            for contrast, brightness, mean in enhancements:
+                band = adjust_contrast_brightness(band, contrast, brightness, mean)
+            output.paste(band, (0, top))
+
+    if max_side and max(output.size) > max_side:
+        output.thumbnail((max_side, max_side), Image.LANCZOS)
+    return output
+
+def render_full_resolution(path, graph, decoded_size, max_side=None):
+    """
+    Renderiza as edições recortando do arquivo original
+
+    decoded_size é o tamanho da imagem (reduzida) sobre a qual o crop do
+    grafo foi definido. No máximo MAX_FULL_RESOLUTION_RENDERS decodificam
+    ao mesmo tempo. Retorna None se o grafo não tem crop.
+    """
+    if graph.crop_box is None:
+        return None
+    box = scale_box(graph.crop_box, decoded_size, source_size(path))
+    with _full_resolution_slots:
+        return read_region(path, box, graph.enhancements, max_side=max_side)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de gravação em lote: image.save padrão x encode_image
+Grava o mesmo lote de fotos nos dois modos e compara o tempo total;
+com --max-kb mede a latência por imagem do JPEG com tamanho máximo
+
+Uso: python tests/benchmark_encoder.py [imagens] [formato] [qualidade]
+     python tests/benchmark_encoder.py --max-kb 100
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import numpy as np
+from PIL import Image, ImageFilter
+from modules.encoder import encode_image, encode_to_size
+
+EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "TIFF": ".tiff", "BMP": ".bmp"}
+
+def _photo(size, seed):
+    # Ruído suavizado: comprime como foto, não como ruído puro
+    rng = np.random.RandomState(seed)
+    noise = Image.fromarray(rng.randint(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8))
+    return noise.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+
+def run_benchmark(count=24, format_type="JPEG", quality=95, size=(3000, 4000)):
+    images = [_photo(size, i % 4) for i in range(count)]
+    ext = EXTENSIONS[format_type]
+
+    with tempfile.TemporaryDirectory() as folder:
+        start = time.perf_counter()
+        for i, image in enumerate(images):
+            kwargs = {"quality": quality} if format_type == "JPEG" else {}
+            image.save(os.path.join(folder, f"seq_{i}{ext}"), format_type, **kwargs)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i, image in enumerate(images):
+            encode_image(image, os.path.join(folder, f"enc_{i}{ext}"), format_type, quality)
+        encoded = time.perf_counter() - start
+
+    print(f"{count} imagens {size[0]}x{size[1]} {format_type}")
+    print(f"image.save:   {sequential:.2f} s ({count / sequential:.1f} img/s)")
+    print(f"encode_image: {encoded:.2f} s ({count / encoded:.1f} img/s)")
+    print(f"speedup:      {sequential / encoded:.1f}x")
+
+def run_size_benchmark(max_kb=100, repeat=3):
+    print(f"JPEG <= {max_kb} KB")
+    print(f"{'tamanho':<11} {'ms/imagem':>10} {'encodes':>8} {'qualidade':>10} {'escala':>7} {'KB':>6}")
+    print("-" * 57)
+
+    for size in [(600, 800), (1200, 1600), (3000, 4000)]:
+        image = _photo(size, 0)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data, info = encode_to_size(image, max_kb * 1024)
+            best = min(best, time.perf_counter() - start)
+
+        name = f"{size[0]}x{size[1]}"
+        print(f"{name:<11} {best * 1000:>10.1f} {info['encodes']:>8} {info['quality']:>10} "
+              f"{info['scale']:>7.2f} {len(data) / 1024:>6.1f}")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--max-kb"]:
+        run_size_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100)
+        sys.exit()
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    format_type = sys.argv[2].upper() if len(sys.argv) > 2 else "JPEG"
+    quality = int(sys.argv[3]) if len(sys.argv) > 3 else 95
+    run_benchmark(count, format_type, quality)
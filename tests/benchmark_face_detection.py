@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark detecção facial: resolução total x cópia reduzida (proxy)
+Compara latência e IoU da maior face em relação ao caminho original
+
+Uso: python tests/benchmark_face_detection.py foto1.jpg [foto2.jpg ...]
+     python tests/benchmark_face_detection.py --backends foto1.jpg [...]
+     (compara os backends disponíveis: Haar, YuNet)
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import cv2
+from modules.face_backends import available_backends, get_detector, get_detector_stats
+from modules.face_detection import (
+    load_image_opencv, detect_faces_gray, get_cascade_classifier,
+    _largest_face, _iou
+)
+
+MODES = [
+    ("total", dict(proxy_size=None)),
+    ("proxy", dict(refine=False)),
+    ("proxy+refino", dict(refine=True)),
+]
+
+def _time_detection(gray, repeat, **kwargs):
+    best, faces = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        faces = detect_faces_gray(gray, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, faces
+
+def run_benchmark(paths, repeat=3):
+    get_cascade_classifier()
+
+    print(f"{'imagem':<30} {'modo':<14} {'ms':>9} {'speedup':>8} {'IoU':>6}")
+    print("-" * 71)
+
+    for path in paths:
+        img = load_image_opencv(path)
+        if img is None:
+            print(f"{Path(path).name:<30} erro ao carregar")
+            continue
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        reference_ms, reference = None, None
+        for name, kwargs in MODES:
+            ms, faces = _time_detection(gray, repeat, **kwargs)
+            face = _largest_face(faces) if faces else None
+
+            if reference_ms is None:
+                reference_ms, reference = ms, face
+
+            iou = _iou(face, reference) if face and reference else 0.0
+            print(f"{Path(path).name[:30]:<30} {name:<14} {ms:>9.1f} "
+                  f"{reference_ms / ms:>7.1f}x {iou:>6.3f}")
+
+def run_backend_benchmark(paths, repeat=3):
+    backends = [get_detector(name) for name in available_backends()]
+    print(f"backends: {', '.join(b.name for b in backends)}")
+    print(f"{'imagem':<30} {'backend':<10} {'ms':>9} {'faces':>6} {'IoU':>6}")
+    print("-" * 65)
+
+    for path in paths:
+        img = load_image_opencv(path)
+        if img is None:
+            print(f"{Path(path).name:<30} erro ao carregar")
+            continue
+
+        reference = None
+        for backend in backends:
+            best, faces = float("inf"), []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                faces = backend.detect(img, bgr=True)
+                best = min(best, time.perf_counter() - start)
+
+            face = _largest_face(faces) if faces else None
+            if reference is None:
+                reference = face
+            iou = _iou(face, reference) if face and reference else 0.0
+            print(f"{Path(path).name[:30]:<30} {backend.name:<10} {best * 1000:>9.1f} "
+                  f"{len(faces):>6} {iou:>6.3f}")
+
+    for name, stats in get_detector_stats().items():
+        print(f"{name}: {stats['calls']} chamadas, média {stats['avg_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args == ["--backends"]:
+        print(__doc__)
+        sys.exit(1)
+    if args[0] == "--backends":
+        run_backend_benchmark(args[1:])
+    else:
+        run_benchmark(args)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Worker substituto do FastImageOps.exe --worker para testes no Linux
+Fala o mesmo protocolo de quadros JSON com prefixo de tamanho
+"""
+import json
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import numpy as np
+from modules.cs_worker import _HEADER, _read_exact, write_frame
+
+def apply_filters_raw(data):
+    header = data["Image"]
+    shm = shared_memory.SharedMemory(name=header["Shm"])
+    # O bloco pertence ao processo cliente: não deixa o tracker removê-lo
+    resource_tracker.unregister(shm._name, "shared_memory")
+    try:
+        channels = 4 if header["Format"] == "RGBA32" else 3
+        view = np.ndarray((header["Height"], header["Stride"]), dtype=np.uint8, buffer=shm.buf)
+        pixels = view[:, :header["Width"] * channels].reshape(header["Height"], header["Width"], channels)
+        rgb = pixels[..., :3].astype(np.float32) * data["Contrast"] + data["Brightness"]
+        pixels[..., :3] = np.clip(rgb.astype(np.int32), 0, 255)
+        del view, pixels
+    finally:
+        shm.close()
+    return {"Success": True}
+
+def handle(operation, data):
+    if operation == "ping":
+        return {"Pong": True, "Pid": os.getpid()}
+    if operation == "apply-filters":
+        return {"Success": True, "OutputPath": data["ImagePath"], "Pid": os.getpid()}
+    if operation == "apply-filters-raw":
+        return apply_filters_raw(data)
+    if operation == "batch-resize":
+        return {"Results": [{"OriginalPath": i["Path"], "OutputPath": i["Path"], "Success": True}
+                            for i in data["Images"]]}
+    if operation == "batch-crop":
+        return {"Results": [{"Success": True} for _ in data["Images"]]}
+    if operation == "sleep":
+        time.sleep(data.get("Seconds", 0.1))
+        return {"Slept": True}
+    if operation == "crash":
+        sys.exit(1)
+    raise ValueError(f"Operação não reconhecida: {operation}")
+
+def main():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    while True:
+        header = _read_exact(stdin, _HEADER.size)
+        body = header and _read_exact(stdin, _HEADER.unpack(header)[0])
+        if body is None:
+            break
+        response = {"Id": None}
+        try:
+            request = json.loads(body.decode("utf-8"))
+            response["Id"] = request["Id"]
+            response["Result"] = handle(request["Operation"], request["Data"])
+        except Exception as e:
+            response["Error"] = str(e)
+        write_frame(stdout, response)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.batch_detection import BatchDetector, DetectionCache
+from modules.face_detection import box_from_faces
+
+def _items(folder, count, loads):
+    items = []
+    for i in range(count):
+        path = folder / f"aluno_{i}.png"
+        Image.new('RGB', (120, 160), 'white').save(path)
+
+        def load(path=path):
+            loads.append(path)
+            return Image.open(path).convert("RGB")
+
+        items.append((str(path), load))
+    return items
+
+def test_second_run_skips_detection(tmp_path):
+    cache_file = tmp_path / "cache" / "detections.json"
+    loads = []
+    items = _items(tmp_path, 6, loads)
+
+    stats = BatchDetector(DetectionCache(cache_file), max_workers=3).run(items)
+    assert stats["no_face"] == 6 and stats["cached"] == 0
+    assert len(loads) == 6
+    assert cache_file.exists()
+
+    # Nova instância lê o índice do disco
+    stats = BatchDetector(DetectionCache(cache_file), max_workers=3).run(items)
+    assert stats["cached"] == 6
+    assert len(loads) == 6
+    assert stats["results"][0] == {"size": [120, 160], "faces": []}
+
+def test_modified_file_is_detected_again(tmp_path):
+    cache = DetectionCache(tmp_path / "detections.json")
+    loads = []
+    items = _items(tmp_path, 2, loads)
+    detector = BatchDetector(cache, max_workers=1)
+    detector.run(items)
+
+    Image.new('RGB', (100, 100), 'black').save(items[0][0])
+    os.utime(items[0][0], ns=(0, 123456789))
+    stats = detector.run(items)
+
+    assert stats["cached"] == 1
+    assert stats["results"][0]["size"] == [100, 100]
+
+def test_params_are_part_of_key(tmp_path):
+    cache = DetectionCache(tmp_path / "detections.json")
+    path = tmp_path / "a.png"
+    Image.new('RGB', (10, 10)).save(path)
+
+    cache.set(str(path), {"refine": True}, (10, 10), [(1, 2, 3, 4)])
+    assert cache.get(str(path), {"refine": True})["faces"] == [[1, 2, 3, 4]]
+    assert cache.get(str(path), {"refine": False}) is None
+
+def test_box_from_faces_uses_largest():
+    box = box_from_faces([(10, 10, 20, 20), (100, 100, 60, 80)], (400, 400))
+    x0, y0, x1, y1 = box
+    assert x0 <= 100 and x1 >= 160
+    assert abs((x1 - x0) / (y1 - y0) - 0.75) < 0.02
+    assert box_from_faces([], (400, 400)) is None
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
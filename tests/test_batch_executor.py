@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from PIL import Image
+from modules.batch_executor import BatchExecutor, EditedSource
+from modules.edit_graph import EditGraph
+
+def _jobs(folder, count, **kwargs):
+    return [
+        dict(image=Image.new('RGB', (30, 40), 'white'),
+             output_path=str(folder / f"foto_{i}.jpg"), **kwargs)
+        for i in range(count)
+    ]
+
+def test_run_saves_all_with_progress(tmp_path):
+    progress = []
+    stats = BatchExecutor(max_workers=3).run(
+        _jobs(tmp_path, 8, border=True, quality=90),
+        on_progress=lambda done, total, index: progress.append((done, total))
+    )
+
+    assert stats["saved"] == 8
+    assert stats["cancelled"] == 0
+    assert progress[-1] == (8, 8)
+    with Image.open(stats["outputs"][0]) as img:
+        assert img.size == (40, 50)
+
+def test_cancel_stops_pending_jobs(tmp_path):
+    executor = BatchExecutor(max_workers=1)
+    stats = executor.run(
+        _jobs(tmp_path, 20),
+        on_progress=lambda done, total, index: executor.cancel()
+    )
+
+    assert stats["saved"] >= 1
+    assert stats["cancelled"] > 0
+    assert stats["saved"] + stats["cancelled"] == 20
+
+def test_failed_job_is_reported(tmp_path):
+    jobs = _jobs(tmp_path, 2)
+    jobs[1]["output_path"] = str(tmp_path / "inexistente" / "foto.jpg")
+    stats = BatchExecutor(max_workers=2).run(jobs)
+
+    assert stats["saved"] == 1
+    assert stats["failed"] == 1
+
+def test_lazy_image_jobs(tmp_path):
+    loaded = []
+
+    def loader():
+        loaded.append(1)
+        return Image.new('RGB', (30, 40), 'white')
+
+    jobs = [dict(image=loader, output_path=str(tmp_path / f"lazy_{i}.jpg")) for i in range(3)]
+    stats = BatchExecutor(max_workers=2).run(jobs)
+
+    assert stats["saved"] == 3
+    assert len(loaded) == 3
+
+def test_edited_source_renders_in_child_process(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"origem_{i}.png"
+        Image.new('RGB', (200, 300), (i * 40, 0, 0)).save(path)
+        paths.append(str(path))
+
+    graph = EditGraph().cropped((10, 20, 55, 80)).enhanced(1.0, 1.2, 128)
+    jobs = [
+        dict(image=EditedSource(path, graph.ops, max_dimension=150),
+             output_path=str(tmp_path / f"saida_{i}.png"))
+        for i, path in enumerate(paths)
+    ]
+    stats = BatchExecutor(max_workers=2, use_processes=True).run(jobs)
+
+    assert stats["saved"] == 3
+    for output, path in zip(stats["outputs"], paths):
+        # Crop definido sobre a decodificação reduzida (100x150): lido do
+        # original em resolução total
+        expected = EditedSource(path, graph.ops, (100, 150), max_dimension=150)()
+        with Image.open(output) as img:
+            assert img.size == (90, 120)
+            assert img.tobytes() == expected.tobytes()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.cs_async import AsyncCSharpBridge
+
+class FakeBridge:
+    """Ponte síncrona que só registra as chamadas"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, name, payload):
+        with self._lock:
+            self.calls.append((name, payload))
+        time.sleep(self.delay)
+
+    def apply_image_filters(self, path, contrast=1.0, brightness=0.0):
+        self._record("apply-filters", path)
+        return {"Success": True, "OutputPath": path}
+
+    def batch_resize_images(self, paths, scales):
+        self._record("batch-resize", list(paths))
+        return {"Results": [{"OriginalPath": p, "Scale": s, "Success": True}
+                            for p, s in zip(paths, scales)]}
+
+    def batch_crop_images(self, images):
+        self._record("batch-crop", list(images))
+        return {"Results": [{"OriginalPath": i["Path"], "Success": True} for i in images]}
+
+def test_duplicate_requests_are_coalesced():
+    fake = FakeBridge()
+    bridge = AsyncCSharpBridge(fake)
+    futures = [bridge.apply_image_filters("a.jpg", contrast=1.2) for _ in range(5)]
+
+    assert all(f.result(timeout=5)["Success"] for f in futures)
+    assert len(fake.calls) == 1
+    assert bridge.get_stats()["coalesced"] == 4
+    bridge.shutdown()
+
+def test_single_resizes_are_micro_batched():
+    fake = FakeBridge()
+    bridge = AsyncCSharpBridge(fake, batch_window=0.05)
+    futures = [bridge.resize_image(f"{i}.jpg", 0.5) for i in range(10)]
+
+    results = [f.result(timeout=5) for f in futures]
+    assert [r["OriginalPath"] for r in results] == [f"{i}.jpg" for i in range(10)]
+    assert [name for name, _ in fake.calls] == ["batch-resize"]
+    bridge.shutdown()
+
+def test_max_batch_flushes_early():
+    fake = FakeBridge(delay=0)
+    bridge = AsyncCSharpBridge(fake, batch_window=10, max_batch=4)
+    futures = [bridge.crop_image({"Path": f"{i}.jpg", "X": 0}) for i in range(8)]
+
+    assert all(f.result(timeout=5)["Success"] for f in futures)
+    assert len(fake.calls) == 2
+    bridge.shutdown()
+
+def test_asyncio_wrapper():
+    bridge = AsyncCSharpBridge(FakeBridge(delay=0))
+
+    async def run():
+        return await bridge.batch_resize_images_async(["a.jpg", "b.jpg"], [0.5, 0.25])
+
+    result = asyncio.run(run())
+    assert len(result["Results"]) == 2
+    bridge.shutdown()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
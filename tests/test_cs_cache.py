@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.cs_bridge import CSharpBridge, LRUCache
+from modules.fingerprint import file_fingerprint
+
+def test_lru_cache_evicts_by_bytes():
+    cache = LRUCache(max_size=100, max_bytes=100)
+    cache.set("a", {"v": "x" * 40})
+    cache.set("b", {"v": "y" * 40})
+    cache.set("c", {"v": "z" * 40})
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 100
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+def test_lru_cache_skips_oversized_values():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", {"v": "x" * 100})
+    assert cache.size() == 0
+
+def test_fingerprint_follows_content(tmp_path):
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    a.write_bytes(b"mesmo conteudo")
+    b.write_bytes(b"mesmo conteudo")
+    assert file_fingerprint(str(a)) == file_fingerprint(str(b))
+
+    before = file_fingerprint(str(a))
+    a.write_bytes(b"conteudo novo")
+    os.utime(a, ns=(0, 123456789))
+    assert file_fingerprint(str(a)) != before
+
+def test_cache_key_is_content_addressed(tmp_path):
+    a, b = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    a.write_bytes(b"pixels")
+    b.write_bytes(b"pixels")
+
+    key_a = CSharpBridge._cache_key("apply-filters", {"ImagePath": str(a), "Contrast": 1.2})
+    key_b = CSharpBridge._cache_key("apply-filters", {"ImagePath": str(b), "Contrast": 1.2})
+    assert key_a == key_b
+
+    a.write_bytes(b"editada")
+    os.utime(a, ns=(0, 987654321))
+    assert CSharpBridge._cache_key("apply-filters", {"ImagePath": str(a), "Contrast": 1.2}) != key_b
+
+def test_cache_stats_exposed():
+    stats = CSharpBridge(use_workers=False).get_cache_stats()
+    for key in ("hits", "misses", "evictions", "bytes", "max_bytes", "max_size", "ttl_seconds"):
+        assert key in stats
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import pytest
+from modules.cs_bridge import CSharpBridge
+from modules.cs_worker import CSharpWorker, WorkerPool
+
+FAKE_WORKER = [sys.executable, str(Path(__file__).parent / 'fake_cs_worker.py')]
+
+def test_worker_pipelines_requests():
+    worker = CSharpWorker(FAKE_WORKER).start()
+    try:
+        futures = [worker.submit("sleep", {"Seconds": 0.01}) for _ in range(5)]
+        assert all(f.result(timeout=10)["Slept"] for f in futures)
+        assert worker.ping()
+        assert worker.requests == 6
+    finally:
+        worker.stop()
+
+def test_worker_error_is_raised():
+    worker = CSharpWorker(FAKE_WORKER).start()
+    try:
+        with pytest.raises(RuntimeError):
+            worker.request("desconhecida", {})
+        assert worker.alive
+    finally:
+        worker.stop()
+
+def test_pool_restarts_crashed_worker():
+    pool = WorkerPool(FAKE_WORKER, size=1)
+    assert pool.start()
+    try:
+        first_pid = pool.request("ping", {})["Pid"]
+        with pytest.raises(RuntimeError):
+            pool._acquire().request("crash", {})
+
+        assert pool.request("ping", {})["Pid"] != first_pid
+        assert pool.restarts == 1
+        assert pool.health_check()[0]["responsive"]
+    finally:
+        pool.stop()
+
+def test_malformed_frame_does_not_kill_worker():
+    from modules.cs_worker import _HEADER
+    worker = CSharpWorker(FAKE_WORKER).start()
+    try:
+        with worker._write_lock:
+            worker._process.stdin.write(_HEADER.pack(5) + b"{nao ")
+            worker._process.stdin.flush()
+        assert worker.ping()
+    finally:
+        worker.stop()
+
+def test_pool_restarts_hung_worker():
+    from concurrent.futures import TimeoutError as FutureTimeout
+    pool = WorkerPool(FAKE_WORKER, size=1, timeout=0.5)
+    assert pool.start()
+    try:
+        first_pid = pool.request("ping", {})["Pid"]
+        with pytest.raises(FutureTimeout):
+            pool.request("sleep", {"Seconds": 30})
+
+        assert pool.request("ping", {})["Pid"] != first_pid
+        assert pool.restarts == 1
+    finally:
+        pool.stop()
+
+def test_bridge_uses_worker_pool():
+    bridge = CSharpBridge(worker_command=FAKE_WORKER, pool_size=2)
+    try:
+        assert bridge.available
+        result = bridge.apply_image_filters("foto.jpg", contrast=1.2)
+        assert result["Success"]
+
+        stats = bridge.get_worker_stats()
+        assert stats["running"]
+        assert len(stats["workers"]) == 2
+    finally:
+        bridge.shutdown()
+
+def test_bridge_raw_transport_roundtrip():
+    from PIL import Image
+    bridge = CSharpBridge(worker_command=FAKE_WORKER, pool_size=1)
+    try:
+        assert bridge.supports_raw_transport()
+        img = Image.new('RGB', (33, 7), (100, 50, 200))
+        result = bridge.apply_image_filters_raw(img, contrast=1.5, brightness=10)
+        assert result.size == (33, 7)
+        assert result.getpixel((32, 6)) == (160, 85, 255)
+    finally:
+        bridge.shutdown()
+
+def test_bridge_without_worker_support_falls_back():
+    bridge = CSharpBridge(worker_command=[sys.executable, "-c", "pass"])
+    with pytest.raises(RuntimeError):
+        bridge.apply_image_filters("foto.jpg")
+    assert not bridge.get_worker_stats()["enabled"]
+    assert not bridge.supports_raw_transport()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
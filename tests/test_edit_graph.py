@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageChops, ImageEnhance
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.edit_graph import EditGraph
+from modules.image_processing import adjust_contrast_brightness, gray_mean
+from modules.preview_cache import ProxyPyramid
+
+def _gradient(w=400, h=300):
+    return Image.linear_gradient("L").resize((w, h)).convert("RGB")
+
+def _max_diff(a, b):
+    return max(hi for _, hi in ImageChops.difference(a, b).getextrema())
+
+def test_adjust_matches_image_enhance():
+    img = _gradient()
+    expected = ImageEnhance.Brightness(ImageEnhance.Contrast(img).enhance(1.4)).enhance(0.8)
+    assert _max_diff(adjust_contrast_brightness(img, 1.4, 0.8), expected) == 0
+
+def test_crops_compose_in_source_coordinates():
+    graph = EditGraph().cropped((100, 50, 300, 250)).cropped((10, 20, 110, 170))
+    assert graph.crop_box == (110, 70, 210, 220)
+    assert graph.size((400, 300)) == (100, 150)
+    assert len(graph.ops) == 2
+
+def test_fused_render_equals_eager_edits():
+    source = _gradient()
+
+    # Caminho antigo: ajuste na imagem inteira e crop depois
+    eager = adjust_contrast_brightness(source, 1.5, 1.1)
+    eager = eager.crop((50, 40, 250, 240))
+
+    graph = EditGraph().enhanced(1.5, 1.1, gray_mean(source)).cropped((50, 40, 250, 240))
+    assert _max_diff(graph.render(source), eager) <= 1
+
+def test_render_does_not_touch_source():
+    source = _gradient()
+    rendered = EditGraph().render(source, border=True)
+    assert rendered.size == (410, 310)
+    assert source.size == (400, 300)
+    assert not EditGraph().enhanced(1.0, 1.0, 128)
+
+def test_display_render_matches_full_resolution():
+    source = _gradient(800, 600)
+    graph = EditGraph().cropped((100, 100, 500, 500)).enhanced(1.3, 1.0, 120)
+
+    display = graph.render_display(ProxyPyramid(source, min_size=64), 0.25)
+    full = graph.render(source).resize(display.size, Image.LANCZOS)
+    assert display.size == (100, 100)
+    assert _max_diff(display, full) <= 4
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
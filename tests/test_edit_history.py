@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.edit_graph import EditGraph
+from modules.edit_history import EditHistory
+
+def test_undo_redo_walks_states():
+    history = EditHistory()
+    cropped = history.current.cropped((0, 0, 300, 400))
+    enhanced = cropped.enhanced(1.2, 1.0, 128)
+    history.push(cropped)
+    history.push(enhanced)
+
+    assert history.undo() == cropped
+    assert history.undo() == EditGraph()
+    assert history.undo() is None
+    assert history.redo() == cropped
+    assert history.current == cropped and history.can_redo
+
+def test_new_edit_discards_redo_and_revert_is_undoable():
+    history = EditHistory()
+    history.push(EditGraph().cropped((0, 0, 30, 40)))
+    history.undo()
+    history.push(EditGraph().enhanced(1.5, 1.0, 100))
+    assert not history.can_redo
+
+    assert history.push(EditGraph())
+    assert history.undo() == EditGraph().enhanced(1.5, 1.0, 100)
+    assert not history.push(history.current)
+
+def test_memory_ceiling_drops_oldest_states():
+    history = EditHistory(max_kb=4)
+    graph = EditGraph()
+    for i in range(50):
+        graph = graph.enhanced(1.0 + (i + 1) / 1000, 1.0, 128)
+        history.push(graph)
+
+    assert history.nbytes <= 4096
+    steps = 0
+    while history.undo() is not None:
+        steps += 1
+    assert 0 < steps < 50
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import numpy as np
+from PIL import Image, ImageFilter
+from modules.encoder import (
+    MAX_SIZE_ENCODES, _jpeg_bytes, encode_image, encode_to_size, encoder_settings,
+    format_from_path
+)
+
+def _photo(size=(600, 800), seed=0):
+    rng = np.random.RandomState(seed)
+    noise = Image.fromarray(rng.randint(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8))
+    return noise.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+
+def test_format_from_extension():
+    assert format_from_path("a/foto.JPG") == "JPEG"
+    assert format_from_path("foto.tif") == "TIFF"
+    assert format_from_path("foto.png") == "PNG"
+    assert format_from_path("sem_extensao") == "JPEG"
+
+def test_jpeg_settings():
+    settings = encoder_settings("JPEG", 88)
+    assert settings["quality"] == 88
+    assert settings["optimize"] is False
+    assert encoder_settings("BMP") == {}
+
+@pytest.mark.parametrize("ext", [".jpg", ".png", ".bmp", ".tiff"])
+def test_encode_formats(tmp_path, ext):
+    path = str(tmp_path / f"foto{ext}")
+    assert encode_image(Image.new("RGBA", (30, 40), (200, 10, 10, 255)), path) == path
+    with Image.open(path) as img:
+        assert img.format == format_from_path(path)
+        assert img.size == (30, 40)
+    assert os.listdir(tmp_path) == [f"foto{ext}"]
+
+def test_failed_save_keeps_original(tmp_path):
+    path = tmp_path / "foto.jpg"
+    Image.new("RGB", (10, 10), "white").save(path)
+    before = path.read_bytes()
+
+    with pytest.raises(Exception):
+        encode_image(Image.new("RGB", (10, 10)), str(path), "FORMATO_INEXISTENTE")
+
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == ["foto.jpg"]
+
+def test_stale_temp_file_is_overwritten(tmp_path):
+    path = tmp_path / "foto.png"
+    stale = tmp_path / f".foto.png.{os.getpid()}.{threading.get_ident()}.tmp"
+    stale.write_bytes(b"restos de uma falha")
+
+    encode_image(Image.new("RGB", (10, 10)), str(path))
+    assert os.listdir(tmp_path) == ["foto.png"]
+
+@pytest.mark.parametrize("max_kb", [70, 100, 150])
+def test_encode_to_size_near_best_quality(max_kb):
+    image = _photo()
+    data, info = encode_to_size(image, max_kb * 1024)
+
+    assert len(data) <= max_kb * 1024
+    assert info["fits"] and info["scale"] == 1.0
+    assert info["encodes"] <= MAX_SIZE_ENCODES
+
+    # Melhor qualidade possível sem reduzir, por busca exaustiva
+    best = max(q for q in range(30, 96) if len(_jpeg_bytes(image, q)) <= max_kb * 1024)
+    assert best - info["quality"] <= 5
+
+def test_encode_to_size_scales_when_needed():
+    data, info = encode_to_size(_photo((1200, 1600)), 30 * 1024)
+
+    assert len(data) <= 30 * 1024
+    assert info["scale"] < 1.0
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == info["size"]
+
+@pytest.mark.parametrize("max_kb", [5, 100])
+def test_encode_to_size_scaled_lands_near_limit(max_kb):
+    data, info = encode_to_size(_photo((3000, 4000)), max_kb * 1024)
+
+    assert info["fits"] and info["scale"] < 1.0
+    assert info["encodes"] <= MAX_SIZE_ENCODES
+    assert len(data) >= 0.8 * max_kb * 1024
+
+@pytest.mark.parametrize("max_quality", [29, 30, 31])
+def test_encode_to_size_low_max_quality(max_quality):
+    data, info = encode_to_size(_photo(), 20 * 1024, max_quality=max_quality)
+
+    assert info["fits"] and len(data) <= 20 * 1024
+    assert info["quality"] <= max_quality
+    assert info["encodes"] <= MAX_SIZE_ENCODES
+
+def test_encode_image_max_bytes(tmp_path):
+    path = str(tmp_path / "foto.jpg")
+    encode_image(_photo(), path, quality=95, max_bytes=50 * 1024)
+    assert os.path.getsize(path) <= 50 * 1024
+
+    with pytest.raises(ValueError):
+        encode_image(_photo(), str(tmp_path / "x.jpg"), max_bytes=50)
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules import face_backends
+from modules.face_backends import (
+    BACKENDS, FaceDetectorBackend, available_backends, get_detector, get_detector_stats
+)
+from modules.face_detection import face_crop_box
+
+class FixedBackend(FaceDetectorBackend):
+    """Backend de teste que sempre encontra a mesma face"""
+
+    name = "fixo"
+
+    def _detect(self, image, proxy_size, refine, bgr):
+        return [[100, 80, 60, 80]]
+
+def test_haar_is_default_and_timed():
+    detector = get_detector()
+    assert detector.name == "haar"
+    assert "haar" in available_backends()
+
+    detector.detect(Image.new("RGB", (320, 240), "white"))
+    stats = get_detector_stats()["haar"]
+    assert stats["calls"] >= 1 and stats["avg_ms"] >= 0
+
+def test_unavailable_backend_falls_back_to_haar(monkeypatch):
+    monkeypatch.setattr(face_backends, "find_yunet_model", lambda: None)
+    monkeypatch.setattr(face_backends, "_instances", {})
+    assert get_detector("yunet").name == "haar"
+    assert get_detector("inexistente").name == "haar"
+
+def test_face_crop_box_uses_selected_backend(monkeypatch):
+    monkeypatch.setitem(BACKENDS, "fixo", FixedBackend)
+    monkeypatch.setattr(face_backends, "_instances", {})
+
+    image = np.zeros((400, 300, 3), dtype=np.uint8)
+    assert face_crop_box(image, backend="haar") is None
+
+    x0, y0, x1, y1 = face_crop_box(image, backend="fixo")
+    assert x0 <= 100 and x1 >= 160
+    assert get_detector_stats()["fixo"]["faces"] == 1
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -4,7 +4,11 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from modules.face_detection import detect_faces
+import threading
+from modules.face_detection import (
+    detect_faces, detect_faces_gray, get_cascade_classifier, get_cascade_stats,
+    clear_cascade_cache, crop_face, _iou
+)
 
 def test_detect_faces_function_exists():
     assert callable(detect_faces)
@@ -16,6 +20,43 @@ def test_detect_faces_with_invalid_path():
     except:
         assert True
 
+def test_cascade_classifier_cached_per_thread():
+    clear_cascade_cache()
+    first = get_cascade_classifier()
+    assert get_cascade_classifier() is first
+
+    others = []
+    t = threading.Thread(target=lambda: others.append(get_cascade_classifier()))
+    t.start()
+    t.join()
+    assert others[0] is not first
+
+    stats = get_cascade_stats()
+    assert stats["loads"] >= 2
+    assert stats["hits"] >= 1
+    assert stats["path"] is not None
+
+def test_clear_cascade_cache_reloads():
+    first = get_cascade_classifier()
+    clear_cascade_cache()
+    assert get_cascade_classifier() is not first
+
+def test_detect_faces_gray_proxy_on_blank_image():
+    import numpy as np
+    gray = np.full((1500, 2000), 128, dtype=np.uint8)
+    assert detect_faces_gray(gray, proxy_size=640) == []
+
+def test_crop_face_accepts_pil_and_array_without_face():
+    import numpy as np
+    from PIL import Image
+    img = Image.new('RGB', (1600, 1200), (120, 120, 120))
+    assert crop_face(img) is None
+    assert crop_face(np.zeros((1200, 1600, 3), dtype=np.uint8)) is None
+
+def test_iou():
+    assert _iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert _iou((0, 0, 10, 10), (20, 20, 10, 10)) == 0.0
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-v"])
\ No newline at end of file
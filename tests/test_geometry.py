@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.geometry import RATIOS, enforce_3x4, enforce_aspect, enforce_box
+
+def _random_boxes(rng, n=2000):
+    sizes = rng.integers(1, 5000, size=(n, 2))
+    # Cantos fora da imagem e invertidos de propósito
+    boxes = np.concatenate([
+        rng.integers(-200, 5200, size=(n, 1)), rng.integers(-200, 5200, size=(n, 1)),
+        rng.integers(-200, 5200, size=(n, 1)), rng.integers(-200, 5200, size=(n, 1)),
+    ], axis=1)
+    return boxes, sizes
+
+@pytest.mark.parametrize("ratio", list(RATIOS))
+def test_boxes_inside_image_with_exact_ratio(ratio):
+    num, den = RATIOS[ratio]
+    boxes, sizes = _random_boxes(np.random.default_rng(0))
+    out = enforce_aspect(boxes, sizes, ratio)
+
+    w = out[:, 2] - out[:, 0]
+    h = out[:, 3] - out[:, 1]
+    assert (out[:, 0] >= 0).all() and (out[:, 1] >= 0).all()
+    assert (out[:, 2] <= sizes[:, 0]).all() and (out[:, 3] <= sizes[:, 1]).all()
+    assert (w >= 0).all() and (h >= 0).all()
+    assert (w == h * num // den).all()
+
+@pytest.mark.parametrize("ratio", list(RATIOS))
+def test_idempotent(ratio):
+    boxes, sizes = _random_boxes(np.random.default_rng(1))
+    once = enforce_aspect(boxes, sizes, ratio)
+    assert (enforce_aspect(once, sizes, ratio) == once).all()
+
+def test_vectorized_equals_single_box():
+    boxes, sizes = _random_boxes(np.random.default_rng(2), n=300)
+    out = enforce_aspect(boxes, sizes, "5x7")
+    for box, size, expected in zip(boxes, sizes, out):
+        assert enforce_box(tuple(box), tuple(size), "5x7") == tuple(expected)
+
+def test_enforce_3x4_compat():
+    assert enforce_3x4((0, 0, 300, 400), (800, 600)) == (0, 0, 300, 400)
+    assert enforce_3x4((0, 0, 400, 400), (800, 600)) == (50, 0, 350, 400)
+    assert enforce_3x4((0, 0, 900, 900), (800, 600)) == (175, 0, 625, 600)
+
+def test_canvas_rectangle_matches_crop():
+    from modules.gui_components import ImageCanvas
+
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        image_size = tuple(int(v) for v in rng.integers(50, 4000, size=2))
+        scale = float(rng.uniform(0.05, 2.0))
+        origin = tuple(int(v) for v in rng.integers(0, 300, size=2))
+        canvas = SimpleNamespace(view=(origin[0], origin[1], scale, image_size))
+
+        start = tuple(int(v) for v in rng.integers(0, 1200, size=2))
+        end = tuple(int(v) for v in rng.integers(0, 1200, size=2))
+        box = enforce_box(
+            ImageCanvas.to_image(canvas, *start) + ImageCanvas.to_image(canvas, *end),
+            image_size, "3x4"
+        )
+
+        # O retângulo desenhado volta exatamente para a box que será cortada
+        x0, y0, x1, y1 = ImageCanvas.to_canvas(canvas, box)
+        assert ((x0 - origin[0]) / scale, (y0 - origin[1]) / scale) == pytest.approx(box[:2])
+        assert ((x1 - origin[0]) / scale, (y1 - origin[1]) / scale) == pytest.approx(box[2:])
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -4,7 +4,12 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
-from modules.image_processing import enforce_3x4, compute_initial_scale
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from modules.image_processing import (
+    enforce_3x4, compute_initial_scale, adjust_contrast_brightness, gray_mean
+)
 
 def test_enforce_3x4_basic():
     result = enforce_3x4((0, 0, 300, 400), (800, 600))
@@ -18,6 +23,31 @@ def test_compute_initial_scale():
     
     assert isinstance(scale, (int, float))
     assert 0 < scale <= 1.0
+    assert compute_initial_scale((800, 600), 640, 480) == scale
+
+def _random_image(mode="RGB", size=(120, 90), seed=0):
+    bands = len(mode)
+    pixels = np.random.RandomState(seed).randint(0, 256, (size[1], size[0], bands), dtype=np.uint8)
+    return Image.fromarray(pixels if bands > 1 else pixels[:, :, 0])
+
+def test_lut_matches_image_enhance():
+    img = _random_image()
+    for contrast, brightness in [(1.4, 1.0), (1.0, 0.7), (0.6, 1.3), (2.0, 0.5)]:
+        expected = ImageEnhance.Brightness(ImageEnhance.Contrast(img).enhance(contrast)).enhance(brightness)
+        result = adjust_contrast_brightness(img, contrast, brightness)
+        diff = np.abs(np.asarray(result, dtype=int) - np.asarray(expected, dtype=int))
+        assert diff.max() <= 1
+
+def test_lut_preserves_alpha_and_neutral():
+    img = _random_image("RGBA")
+    result = adjust_contrast_brightness(img, 1.5, 0.8)
+    assert np.array_equal(np.asarray(result)[:, :, 3], np.asarray(img)[:, :, 3])
+    assert adjust_contrast_brightness(img) is img
+
+def test_gray_mean_from_histogram():
+    img = _random_image(seed=3)
+    expected = int(np.asarray(img.convert("L")).mean() + 0.5)
+    assert abs(gray_mean(img) - expected) <= 1
 
 if __name__ == "__main__":
     import pytest
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.image_loader import load_image
+from modules.image_store import ImageStore
+
+def _files(folder, count, size=(200, 100)):
+    paths = []
+    for i in range(count):
+        path = folder / f"foto_{i}.png"
+        Image.new('RGB', size, (i * 20, 0, 0)).save(path)
+        paths.append(str(path))
+    return paths
+
+def test_decodes_on_first_access(tmp_path):
+    store = ImageStore()
+    for path in _files(tmp_path, 3):
+        store.add(path)
+
+    assert store.stats()["decodes"] == 0
+    assert store[1].getpixel((0, 0)) == (20, 0, 0)
+    assert store[1] is store[1]
+    assert store.stats()["decodes"] == 1
+
+def test_invalid_file_rejected_on_add(tmp_path):
+    bad = tmp_path / "ruim.jpg"
+    bad.write_bytes(b"nao e imagem")
+    with pytest.raises(Exception):
+        ImageStore().add(str(bad))
+
+def test_budget_evicts_and_redecodes(tmp_path):
+    one_image = 200 * 100 * 3
+    store = ImageStore(memory_budget_mb=2.5 * one_image / (1024 * 1024))
+    for path in _files(tmp_path, 5):
+        store.add(path)
+
+    for i in range(5):
+        store[i]
+
+    stats = store.stats()
+    assert stats["resident"] == 2
+    assert stats["bytes"] <= store.budget
+
+    # Saiu da memória: relida do arquivo, tamanho continua conhecido
+    assert store.known_size(0) == (200, 100)
+    assert store[0].getpixel((0, 0)) == (0, 0, 0)
+    assert store.stats()["decodes"] == 6
+
+def test_delete_and_loader_follow_entries(tmp_path):
+    store = ImageStore()
+    for path in _files(tmp_path, 3):
+        store.add(path)
+
+    load_last = store.loader(2)
+    del store[0]
+    assert len(store) == 2
+    assert load_last().getpixel((0, 0)) == (40, 0, 0)
+
+def test_load_image_draft_keeps_target_size(tmp_path):
+    path = tmp_path / "grande.jpg"
+    Image.new('RGB', (3000, 2000), 'green').save(path, quality=90)
+
+    img = load_image(str(path), max_dimension=1000)
+    assert img.size == (1000, 666) or img.size == (1000, 667)
+    assert img.mode == "RGB"
+
+def test_prefetch_fills_budget_without_evicting(tmp_path):
+    one_image = 200 * 100 * 3
+    store = ImageStore(memory_budget_mb=3.5 * one_image / (1024 * 1024))
+    for path in _files(tmp_path, 6):
+        store.add(path)
+
+    current = store[0]
+    store.prefetch(range(1, 6))
+
+    deadline = time.time() + 5
+    while store.stats()["resident"] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+    stats = store.stats()
+    assert stats["resident"] == 3
+    assert stats["bytes"] <= store.budget
+    assert store[0] is current
+    store.shutdown()
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from PIL import Image
+from modules.pipeline import iter_image_paths, run_pipeline
+
+def _make_images(folder, count):
+    for i in range(count):
+        Image.new('RGB', (60, 80), (i * 10, 100, 150)).save(folder / f"foto_{i}.png")
+    (folder / "notas.txt").write_text("ignorar")
+
+def test_iter_image_paths_filters_extensions(tmp_path):
+    _make_images(tmp_path, 3)
+    paths = list(iter_image_paths(str(tmp_path)))
+    assert len(paths) == 3
+    assert all(p.endswith(".png") for p in paths)
+
+def test_run_pipeline_without_auto_crop(tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    _make_images(src, 7)
+
+    stats = run_pipeline(str(src), str(out), auto_crop=False, border=True,
+                         contrast=1.2, workers=2, queue_size=2)
+
+    assert stats["processed"] == 7
+    assert stats["failed"] == 0
+    assert stats["images_per_second"] > 0
+
+    outputs = sorted(out.glob("*.jpg"))
+    assert len(outputs) == 7
+    with Image.open(outputs[0]) as img:
+        assert img.size == (70, 90)
+
+def test_run_pipeline_reports_decode_errors(tmp_path):
+    (tmp_path / "quebrada.jpg").write_bytes(b"nao e imagem")
+    stats = run_pipeline(str(tmp_path), str(tmp_path / "out"), auto_crop=False, workers=1)
+    assert stats["failed"] == 1
+    assert stats["processed"] == 0
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
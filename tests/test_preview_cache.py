@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.preview_cache import PreviewCache, ProxyPyramid
+
+def test_pyramid_picks_nearest_level():
+    image = Image.new("RGB", (2000, 1600), "white")
+    pyramid = ProxyPyramid(image, min_size=128)
+
+    assert [level.size for level in pyramid.levels] == [(1000, 800), (500, 400), (250, 200)]
+    assert pyramid.level_for(1.5) is image
+    assert pyramid.level_for(0.5).size == (1000, 800)
+    assert pyramid.level_for(0.3).size == (1000, 800)
+    assert pyramid.level_for(0.2).size == (500, 400)
+    assert pyramid.display(0.3).size == (600, 480)
+
+def test_cache_reuses_and_invalidates_on_new_image():
+    cache = PreviewCache()
+    image = Image.new("RGB", (800, 600))
+
+    assert cache.get(image) is cache.get(image)
+    assert cache.stats()["hits"] == 1
+
+    edited = image.crop((0, 0, 400, 300))
+    assert cache.get(edited).size == (400, 300)
+    cache.invalidate(image)
+    assert cache.stats()["entries"] == 1
+
+def test_cache_respects_byte_budget():
+    images = [Image.new("RGB", (1024, 1024)) for _ in range(4)]
+    one = ProxyPyramid(images[0]).nbytes
+    cache = PreviewCache(max_bytes=one * 2)
+
+    for image in images:
+        cache.get(image)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= one * 2
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
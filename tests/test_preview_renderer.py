@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.preview_renderer import PreviewRenderer, render_adjustments
+
+def test_neutral_adjustments_return_proxy():
+    proxy = Image.new("RGB", (40, 30), "gray")
+    assert render_adjustments(proxy) is proxy
+    assert render_adjustments(proxy, contrast=1.5).size == proxy.size
+
+def test_latest_request_wins():
+    release = threading.Event()
+    delivered = []
+
+    def slow_render(proxy, **params):
+        release.wait(5)
+        return params["contrast"]
+
+    renderer = PreviewRenderer(lambda gen, img: delivered.append((gen, img)), render_func=slow_render)
+    renderer.request(None, contrast=1.0)
+    time.sleep(0.05)
+    for value in (1.1, 1.2, 1.3):
+        last = renderer.request(None, contrast=value)
+    release.set()
+
+    deadline = time.time() + 5
+    while renderer.pending and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert delivered == [(last, 1.3)]
+    assert renderer.dropped == 3
+    renderer.stop()
+
+def test_cancel_discards_running_render():
+    release = threading.Event()
+    delivered = []
+
+    renderer = PreviewRenderer(lambda gen, img: delivered.append(img),
+                               render_func=lambda proxy, **p: release.wait(5))
+    renderer.request(None)
+    time.sleep(0.05)
+    renderer.cancel()
+    release.set()
+
+    deadline = time.time() + 5
+    while renderer.pending and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert delivered == []
+    renderer.stop()
+
+def test_render_error_is_reported_and_worker_survives():
+    events = []
+    done = threading.Event()
+
+    def render(proxy, **params):
+        if params.get("fail"):
+            raise RuntimeError("falhou")
+        return "ok"
+
+    def on_error(gen, error):
+        events.append(("erro", gen, str(error)))
+
+    def on_result(gen, img):
+        events.append(("ok", gen, img))
+        done.set()
+
+    renderer = PreviewRenderer(on_result, render_func=render, on_error=on_error)
+    failed = renderer.request(None, fail=True)
+    deadline = time.time() + 5
+    while renderer.pending and time.time() < deadline:
+        time.sleep(0.01)
+    succeeded = renderer.request(None)
+    assert done.wait(5)
+
+    assert events == [("erro", failed, "falhou"), ("ok", succeeded, "ok")]
+    renderer.stop()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
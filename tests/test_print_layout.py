@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from PIL import Image, PdfParser
+from modules.print_layout import SheetLayout, compose_pages, fit_photo, mm_to_px, save_sheets
+
+def _photo(i=0):
+    return Image.new("RGB", (300, 400), (i * 20 % 256, 120, 200))
+
+def test_layout_grid():
+    layout = SheetLayout("A4", "3x4", dpi=300)
+    assert (layout.cols, layout.rows) == (6, 6)
+    assert layout.page_size == (2480, 3508)
+    assert layout.photo_size == (mm_to_px(30, 300), mm_to_px(40, 300))
+    assert layout.pages(37) == 2
+
+    # Células dentro da página e sem sobreposição
+    x, y = layout.cell(layout.rows - 1, layout.cols - 1)
+    assert x + layout.photo_size[0] <= layout.page_size[0]
+    assert y + layout.photo_size[1] <= layout.page_size[1]
+    assert layout.cell(0, 1)[0] - layout.cell(0, 0)[0] >= layout.photo_size[0]
+
+def test_auto_orientation_picks_more_photos():
+    layout = SheetLayout("10x15", "3x4", dpi=150)
+    assert layout.orientation == "landscape"
+    assert layout.per_page == 8
+
+def test_photo_too_large_for_paper():
+    with pytest.raises(ValueError):
+        SheetLayout("10x15", "5x7", margin_mm=30)
+
+def test_pages_are_composed_lazily():
+    layout = SheetLayout("10x15", "3x4", dpi=100)
+    loaded = []
+
+    def loader(i):
+        def load():
+            loaded.append(i)
+            return _photo(i)
+        return load
+
+    pages = compose_pages([loader(i) for i in range(10)], layout)
+    first = next(pages)
+    assert first.size == layout.page_size
+    assert loaded == list(range(layout.per_page))
+
+    # Foto colada na célula; fora dela fica branco
+    x, y = layout.cell(0, 0)
+    assert first.getpixel((x + 5, y + 5)) == (0, 120, 200)
+    assert first.getpixel((layout.page_size[0] // 2, 1)) in ((255, 255, 255), (0, 0, 0))
+
+    assert len(list(pages)) == 1
+    assert len(loaded) == 10
+
+def test_border_keeps_cell_size():
+    layout = SheetLayout("10x15", "3x4", dpi=200)
+    page = next(compose_pages([_photo()], layout, border=True, cut_marks=False))
+    x, y = layout.cell(0, 0)
+    assert page.getpixel((x, y)) == (0, 0, 0)
+    assert page.getpixel((x + layout.photo_size[0] // 2, y + layout.photo_size[1] // 2)) != (0, 0, 0)
+    assert page.getpixel((x + layout.photo_size[0], y)) == (255, 255, 255)
+
+@pytest.mark.parametrize("size", [(3000, 4000), (186, 248), (1200, 1600), (2401, 3200)])
+def test_fit_photo_realistic_sizes(size):
+    layout = SheetLayout("10x15", "3x4", dpi=300)
+    assert fit_photo(Image.new("RGB", size, "red"), layout).size == layout.photo_size
+    assert fit_photo(Image.new("RGB", size), layout, border=True).size == layout.photo_size
+
+def test_save_multipage_pdf_and_tiff(tmp_path):
+    layout = SheetLayout("10x15", "3x4", dpi=100)
+    items = [_photo(i) for i in range(20)]
+
+    pdf = tmp_path / "folhas.pdf"
+    assert save_sheets(items, str(pdf), layout) == 3
+    assert len(PdfParser.PdfParser(str(pdf)).pages) == 3
+
+    tiff = tmp_path / "folhas.tiff"
+    assert save_sheets(items, str(tiff), layout) == 3
+    with Image.open(tiff) as img:
+        assert img.n_frames == 3
+        assert img.size == layout.page_size
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["folhas.pdf", "folhas.tiff"]
+
+def test_save_camera_sized_photos(tmp_path):
+    path = tmp_path / "folha.pdf"
+    assert save_sheets([Image.new("RGB", (3000, 4000))] * 3, str(path), SheetLayout(dpi=100)) == 1
+
+def test_save_rejects_other_formats(tmp_path):
+    with pytest.raises(ValueError):
+        save_sheets([_photo()], str(tmp_path / "folha.png"))
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from PIL import Image
+from modules.edit_graph import EditGraph
+from modules.image_store import ImageStore
+from modules.session import (
+    SessionStore, build_manifest, graph_from_json, ops_to_json, restore_entries
+)
+
+def _images(folder, count):
+    paths = []
+    for i in range(count):
+        path = folder / f"foto_{i}.jpg"
+        Image.new("RGB", (300, 400), (i * 30, 80, 160)).save(path)
+        paths.append(str(path))
+    return paths
+
+def _graph():
+    return EditGraph().cropped((10, 20, 160, 220)).enhanced(1.2, 0.9, 118)
+
+def test_ops_round_trip():
+    graph = _graph()
+    assert graph_from_json(ops_to_json(graph)) == graph
+    assert graph_from_json([]) == EditGraph()
+
+def test_save_and_restore(tmp_path):
+    paths = _images(tmp_path, 3)
+    graphs = [_graph(), EditGraph(), _graph().cropped((0, 0, 30, 40))]
+    manifest = build_manifest(paths, graphs, [(300, 400), None, (300, 400)],
+                              {0: 0.5, 2: 1.5}, 2, 4000)
+
+    store = SessionStore(tmp_path / "sessao" / "session.json")
+    store.save_async(manifest).result()
+    store.close()
+
+    loaded = SessionStore(tmp_path / "sessao" / "session.json").load()
+    assert loaded["current_index"] == 2
+    entries = restore_entries(loaded, 4000)
+
+    assert [e["path"] for e in entries] == [os.path.abspath(p) for p in paths]
+    assert [e["graph"] for e in entries] == graphs
+    assert entries[0]["size"] == (300, 400)
+    assert entries[1]["size"] is None
+    assert entries[2]["zoom"] == 1.5
+    assert all(e["status"] == "ok" for e in entries)
+
+def test_changed_and_missing_files(tmp_path):
+    paths = _images(tmp_path, 3)
+    store = SessionStore(tmp_path / "session.json")
+    store.save(build_manifest(paths, [_graph()] * 3, [(300, 400)] * 3, {}, 0, 4000))
+
+    # Mesmo conteúdo regravado (assinatura muda, hash não): edições mantidas
+    data = Path(paths[0]).read_bytes()
+    os.remove(paths[0])
+    Path(paths[0]).write_bytes(data)
+    # Conteúdo diferente: edições descartadas
+    Image.new("RGB", (500, 300), "white").save(paths[1])
+    os.remove(paths[2])
+
+    entries = restore_entries(store.load(), 4000)
+    assert len(entries) == 2
+    assert entries[0]["status"] == "ok" and entries[0]["graph"] == _graph()
+    assert entries[1]["status"] == "changed" and entries[1]["graph"] == EditGraph()
+
+def test_other_max_dimension_drops_edits(tmp_path):
+    paths = _images(tmp_path, 1)
+    store = SessionStore(tmp_path / "session.json")
+    store.save(build_manifest(paths, [_graph()], [(300, 400)], {}, 0, 4000))
+
+    entries = restore_entries(store.load(), 2000)
+    assert entries[0]["status"] == "changed"
+
+def test_resume_does_not_decode(tmp_path):
+    paths = _images(tmp_path, 4)
+    store = SessionStore(tmp_path / "session.json")
+    store.save(build_manifest(paths, [_graph()] * 4, [(300, 400)] * 4, {}, 0, 4000))
+
+    images = ImageStore()
+    for entry in restore_entries(store.load(), 4000):
+        images.add(entry["path"], size=entry["size"])
+        assert entry["graph"].size(images.decoded_size(len(images) - 1)) == (150, 200)
+
+    assert images.decodes == 0
+
+def test_corrupt_session_is_ignored(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text("{ não é json")
+    assert SessionStore(path).load() is None
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from PIL import Image
+from modules.thumbnail_cache import ThumbnailCache
+
+def _photo(path, size=(1200, 1600), color=(200, 50, 50)):
+    Image.new("RGB", size, color).save(path, quality=90)
+    return str(path)
+
+def test_generate_and_persist(tmp_path):
+    path = _photo(tmp_path / "foto.jpg")
+    cache = ThumbnailCache(tmp_path / "thumbs.db", size=128)
+    thumb = cache.get_or_create(path)
+    assert max(thumb.size) == 128
+    assert cache.generated == 1
+    cache.close()
+
+    # Nova instância (novo processo): vem do disco
+    cache = ThumbnailCache(tmp_path / "thumbs.db", size=128)
+    again = cache.get(path)
+    assert again.size == thumb.size
+    assert cache.generated == 0
+    cache.close()
+
+def test_modified_file_is_invalidated(tmp_path):
+    path = _photo(tmp_path / "foto.jpg")
+    cache = ThumbnailCache(tmp_path / "thumbs.db")
+    cache.get_or_create(path)
+
+    time.sleep(0.01)
+    _photo(tmp_path / "foto.jpg", size=(800, 400))
+    assert cache.get(path) is None
+    assert cache.get_or_create(path).size == (160, 80)
+    cache.close()
+
+def test_prunes_oldest(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs.db", max_entries=3)
+    paths = [_photo(tmp_path / f"foto_{i}.jpg", size=(64, 64)) for i in range(5)]
+    for path in paths:
+        cache.generate(path)
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get(paths[0]) is None
+    assert cache.get(paths[-1]) is not None
+    cache.close()
+
+def test_prunes_least_recently_used(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs.db", max_entries=3)
+    paths = [_photo(tmp_path / f"foto_{i}.jpg", size=(64, 64)) for i in range(4)]
+    for path in paths[:3]:
+        cache.generate(path)
+        time.sleep(0.01)
+
+    # A mais antiga continua em uso: sai a segunda
+    assert cache.get(paths[0]) is not None
+    cache.generate(paths[3])
+
+    assert cache.get(paths[0]) is not None
+    assert cache.get(paths[1]) is None
+    cache.close()
+
+def test_ensure_in_background(tmp_path):
+    paths = [_photo(tmp_path / f"foto_{i}.jpg", size=(400, 300)) for i in range(6)]
+    cache = ThumbnailCache(tmp_path / "thumbs.db")
+    ready = []
+    done = threading.Event()
+
+    def on_ready(path, thumb):
+        ready.append(path)
+        if len(ready) == len(paths):
+            done.set()
+
+    cache.ensure(paths, on_ready)
+    assert done.wait(10)
+    assert sorted(ready) == sorted(paths)
+    assert cache.stats()["entries"] == 6
+    cache.close()
+
+def test_warm_is_not_cancelled_by_ensure(tmp_path):
+    paths = [_photo(tmp_path / f"foto_{i}.jpg", size=(400, 300)) for i in range(6)]
+    cache = ThumbnailCache(tmp_path / "thumbs.db")
+    futures = cache.warm(paths)
+    cache.ensure(paths[:1])
+    cache.ensure(paths[1:2])
+    for future in futures:
+        future.result(timeout=10)
+    cache.close()
+
+    cache = ThumbnailCache(tmp_path / "thumbs.db")
+    assert all(cache.get(path) is not None for path in paths)
+    cache.close()
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-v"])
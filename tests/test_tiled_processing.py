@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image, ImageChops
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from modules.edit_graph import EditGraph
+from modules.image_processing import adjust_contrast_brightness
+from modules import tiled_processing
+from modules.tiled_processing import (
+    MAX_FULL_RESOLUTION_RENDERS, _decode_region, _raw_layout, read_region,
+    render_full_resolution, scale_box
+)
+
+BOX = (37, 51, 301, 389)
+
+@pytest.fixture
+def source():
+    pixels = np.random.RandomState(0).randint(0, 256, (400, 360, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+@pytest.mark.parametrize("name, banded", [
+    ("foto.bmp", True), ("foto.tif", True), ("foto.png", False),
+])
+def test_region_matches_full_decode(tmp_path, source, name, banded):
+    path = tmp_path / name
+    source.save(path)
+
+    with Image.open(path) as img:
+        assert (_raw_layout(img) is not None) == banded
+
+    region = read_region(str(path), BOX, tile_rows=64)
+    assert ImageChops.difference(region, source.crop(BOX)).getbbox() is None
+
+def test_enhancements_applied_per_band(tmp_path, source):
+    path = tmp_path / "foto.bmp"
+    source.save(path)
+
+    expected = adjust_contrast_brightness(source.crop(BOX), 1.4, 0.9, 120)
+    region = read_region(str(path), BOX, enhancements=[(1.4, 0.9, 120)], tile_rows=50)
+    assert ImageChops.difference(region, expected).getbbox() is None
+
+def test_full_resolution_crop_from_reduced_box(tmp_path, source):
+    path = tmp_path / "foto.tif"
+    source.save(path)
+    reduced = source.resize((180, 200))
+
+    graph = EditGraph().cropped((30, 40, 120, 160))
+    assert scale_box(graph.crop_box, reduced.size, source.size) == (60, 80, 240, 320)
+
+    result = render_full_resolution(str(path), graph, reduced.size)
+    assert result.size == (180, 240)
+    assert ImageChops.difference(result, source.crop((60, 80, 240, 320))).getbbox() is None
+    assert render_full_resolution(str(path), EditGraph(), reduced.size) is None
+
+def test_png_decode_stops_at_last_crop_row(tmp_path, source):
+    path = tmp_path / "foto.png"
+    source.save(path)
+
+    with Image.open(path) as img:
+        region, scale = _decode_region(img, BOX)
+        assert img.size == (source.width, BOX[3])
+    assert scale == 1.0
+    assert ImageChops.difference(region, source.crop(BOX)).getbbox() is None
+
+def test_cmyk_region_is_converted_after_crop(tmp_path, source):
+    path = tmp_path / "scan.tif"
+    source.convert("CMYK").save(path, compression="tiff_deflate")
+
+    region = read_region(str(path), BOX)
+    expected = source.convert("CMYK").convert("RGB").crop(BOX)
+    assert region.mode == "RGB"
+    assert ImageChops.difference(region, expected).getbbox() is None
+
+def test_jpeg_reduced_decode_with_max_side(tmp_path):
+    path = tmp_path / "foto.jpg"
+    Image.new("RGB", (1600, 2400), (90, 140, 200)).save(path, quality=95)
+    box = (200, 400, 1400, 2000)
+
+    with Image.open(path) as img:
+        region, scale = _decode_region(img, box, max_side=400)
+    assert scale == 0.25
+    assert region.size == (300, 400)
+
+    result = read_region(str(path), box, max_side=300)
+    assert max(result.size) == 300
+    assert max(abs(a - b) for a, b in zip(result.getpixel((10, 10)), (90, 140, 200))) <= 3
+
+def test_full_resolution_renders_are_capped(tmp_path, source, monkeypatch):
+    path = tmp_path / "foto.png"
+    source.save(path)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow_read(*args, **kwargs):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    monkeypatch.setattr(tiled_processing, "read_region", slow_read)
+    graph = EditGraph().cropped((10, 10, 100, 130))
+    threads = [
+        threading.Thread(target=render_full_resolution, args=(str(path), graph, source.size))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == MAX_FULL_RESOLUTION_RENDERS
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])